@@ -3,355 +3,272 @@ A.E.G.I.S Drone Simulator Backend
 Flask server with real-time physics simulation, A.E.G.I.S doctrine, and WebSocket support
 """
 
-from flask import Flask, jsonify
+import os
+
+# 'threading' for development; 'eventlet' for production (see gunicorn.conf.py).
+# Cooperative servers must patch the standard library before anything else loads.
+ASYNC_MODE = os.environ.get('ASYNC_MODE', 'threading')
+if ASYNC_MODE == 'eventlet':
+    import eventlet
+    eventlet.monkey_patch()
+
+from flask import Flask, Response, jsonify
 from flask_cors import CORS
-from flask_socketio import SocketIO, emit
-import numpy as np
-from dataclasses import dataclass, asdict, field
-from typing import Dict, List, Tuple, Optional
+from flask_socketio import SocketIO, emit, join_room, leave_room
+from functools import partial
+from types import MappingProxyType
+from typing import Callable, Dict, FrozenSet, Iterable, List, Mapping, Optional, Set, Tuple
+import atexit
+import math
+import multiprocessing
 import threading
 import time
-import math
 import uuid
 
+import numpy as np
+
+from physics import (
+    THRESH_WARN, THRESH_REJECT, THRESH_ABORT,
+    RETROGRADE_CAUSES, BreadcrumbRing, FleetEngine, FleetSnapshot, PhysicsEngine
+)
+from checkpoint import Checkpoint, Checkpointer
+from controls import ControlMailbox
+from jamming import JamField, field_from_spec
+from metrics import MetricsRegistry, SamplingProfiler, TimedLock
+from recorder import FlightRecorder, list_recordings
+from replay import REPLAY_PREFIX, ReplayService
+from scheduler import FixedStepScheduler
+from sharding import ShardPool
+from telemetry import FleetFrameEncoder, TelemetryEncoder
+from terrain import Heightfield
+
 app = Flask(__name__, static_folder='../frontend/dist', static_url_path='')
 CORS(app)
 socketio = SocketIO(
     app,
     cors_allowed_origins="*",
-    async_mode='threading',
+    async_mode=ASYNC_MODE,
     ping_timeout=60,
     ping_interval=25,
     logger=False,
     engineio_logger=False
 )
 
-def to_native(obj):
-    """Convert numpy types to native Python types for JSON serialization"""
-    if isinstance(obj, np.ndarray):
-        return obj.tolist()
-    elif isinstance(obj, (np.int32, np.int64)):
-        return int(obj)
-    elif isinstance(obj, (np.float32, np.float64)):
-        return float(obj)
-    elif isinstance(obj, dict):
-        return {k: to_native(v) for k, v in obj.items()}
-    elif isinstance(obj, (list, tuple)):
-        return [to_native(item) for item in obj]
-    return obj
-
-# ==================== A.E.G.I.S DOCTRINE CONSTANTS ====================
-THRESH_WARN = 70.0          # Warning threshold for confidence
-THRESH_REJECT = 40.0        # Reject threshold (can't drop anchors below this)
-THRESH_ABORT = 10.0         # Abort threshold - triggers automatic retrograde
-JAM_SAFE_THRESHOLD = 30.0   # Below this GPS jam level, confidence can heal
-BATTERY_RTB_THRESHOLD = 15.0  # Battery % that triggers automatic RTB
-
-# ==================== DATA CLASSES ====================
-
-@dataclass
-class DroneState:
-    """Represents the complete state of a drone with A.E.G.I.S doctrine"""
-    # Position and motion
-    position: Tuple[float, float, float] = (0.0, 2.0, 0.0)  # x, y, z
-    velocity: Tuple[float, float, float] = (0.0, 0.0, 0.0)
-    rotation: Tuple[float, float, float] = (0.0, 0.0, 0.0)  # pitch, yaw, roll (radians)
-    angular_velocity: Tuple[float, float, float] = (0.0, 0.0, 0.0)
-    
-    # Basic state
-    battery: float = 100.0
-    armed: bool = False
-    mode: str = "STABILIZE"
-    
-    # A.E.G.I.S Doctrine state
-    gps_jam: float = 0.0                # 0-100, GPS jamming level (operator-simulated)
-    nav_confidence: float = 100.0       # 0-100, auto-affected by GPS jam
-    retrograde_active: bool = False     # Auto-return mode
-    status: str = "NOMINAL"             # NOMINAL, WARNING, SAFETY_OVERRIDE, COMMANDER_RTB
+# ==================== METRICS ====================
 
+metrics = MetricsRegistry()
+TICK_SECONDS = metrics.histogram('tick_phase_seconds', 'Simulation tick time by phase', ['phase'])
+PHYSICS_TIME = TICK_SECONDS.labels('physics')
+PROXIMITY_TIME = TICK_SECONDS.labels('proximity')
+RECORD_TIME = TICK_SECONDS.labels('record')
+SNAPSHOT_TIME = TICK_SECONDS.labels('snapshot')
+CHECKPOINT_TIME = TICK_SECONDS.labels('checkpoint')
+SERIALIZE_TIME = TICK_SECONDS.labels('serialization')
+EMIT_TIME = TICK_SECONDS.labels('emit')
+LOCK_WAIT = metrics.histogram('sim_lock_wait_seconds', 'Time spent waiting for SimulationManager.lock').labels()
+CONTROL_LATENCY = metrics.histogram('control_latency_seconds',
+                                    'Control input receipt to the tick that applies it').labels()
+# Yield to the event loop (socket handlers, pending writes) every N rooms while emitting
+EMIT_YIELD_EVERY = 64
 
-@dataclass
-class DoctrineData:
-    """A.E.G.I.S doctrine data - breadcrumbs and anchors"""
-    breadcrumbs: List[Tuple[float, float, float]] = field(default_factory=list)
-    anchors: List[Tuple[float, float, float]] = field(default_factory=list)
-    return_queue: List[Tuple[float, float, float]] = field(default_factory=list)
-    target_point: Optional[Tuple[float, float, float]] = None
-    last_breadcrumb_time: float = 0.0
+OUTBOUND_BYTES = metrics.counter('outbound_bytes_total', 'Payload bytes sent to clients', ['event'])
+TELEMETRY_BYTES = OUTBOUND_BYTES.labels('drone_update')
 
+# Samples the simulation thread when switched on via /api/profiler
+profiler = SamplingProfiler()
 
-# ==================== PHYSICS ENGINE ====================
+# Flight recordings (see recorder.py), off unless set; relative paths are under backend/
+RECORD_DIR = os.environ.get('RECORD_DIR', '')
+if RECORD_DIR:
+    RECORD_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), RECORD_DIR)
+
+# Heightfield tiles (see terrain.py), written procedurally if missing; '' = flat ground
+TERRAIN_DIR = os.environ.get('TERRAIN_DIR', 'terrain')
+if TERRAIN_DIR:
+    TERRAIN_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), TERRAIN_DIR)
+
+# Fleet checkpoints (see checkpoint.py), restored at startup; relative paths are under backend/, '' disables
+CHECKPOINT_FILE = os.environ.get('CHECKPOINT_FILE', 'checkpoints/fleet.ckpt')
+if CHECKPOINT_FILE:
+    CHECKPOINT_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), CHECKPOINT_FILE)
+CHECKPOINT_SECONDS = float(os.environ.get('CHECKPOINT_SECONDS', 5))
+RECLAIM_SECONDS = float(os.environ.get('RECLAIM_SECONDS', 60))  # Restored drones wait this long for their client
+# `python app.py` runs the debug reloader, which imports this module in a watcher
+# process that never serves. Only the serving process restores and checkpoints.
+SERVING = __name__ != '__main__' or os.environ.get('WERKZEUG_RUN_MAIN') == 'true'
+
+# ==================== TELEMETRY ROUTING ====================
+
+# A client whose Engine.IO queue backs up is moved to the next slower stream
+RATE_DIVISORS = (1, 2, 4, 8)                                   # Broadcasts per frame sent
+BACKLOG_HIGH = int(os.environ.get('BACKLOG_HIGH', 8))          # Queued packets that trigger a slowdown
+BACKLOG_LOW = int(os.environ.get('BACKLOG_LOW', 1))            # ...and that count as drained
+RATE_CHECK_EVERY = 5                                           # Broadcasts between backlog checks
+RATE_RECOVER_CHECKS = 10                                       # Drained checks before speeding back up
+
+# Fields that move less than this since the client's copy are not resent
+TELEMETRY_DEADBANDS = {
+    'position': float(os.environ.get('DEADBAND_POSITION', 0.02)),              # metres
+    'rotation': float(os.environ.get('DEADBAND_ROTATION', 0.005)),             # radians
+    'battery': float(os.environ.get('DEADBAND_BATTERY', 0.1)),                 # percent
+    'nav_confidence': float(os.environ.get('DEADBAND_NAV_CONFIDENCE', 0.1)),   # percent
+}
+HEARTBEAT_SECONDS = float(os.environ.get('HEARTBEAT_SECONDS', 1.0))  # Idle drones still send this often
+
+
+def drone_room(drone_id: str, divisor: int = 1) -> str:
+    """Socket.IO room that receives a drone's telemetry at 1/divisor of the broadcast rate"""
+    return f'drone:{drone_id}' if divisor == 1 else f'drone:{drone_id}/{divisor}'
+
+
+def pending_packets(sid: str) -> int:
+    """Packets queued in a socket's Engine.IO transport, not yet written to the wire"""
+    server = socketio.server
+    eio_sid = server.manager.eio_sid_from_sid(sid, '/')
+    socket = server.eio.sockets.get(eio_sid) if eio_sid else None
+    return socket.queue.qsize() if socket is not None else 0
+
+
+class SubscriptionRegistry:
+    """Tracks which drones each socket receives telemetry for, and how often.
+
+    Every drone has its own room; a socket joins the rooms of the drones it
+    watches (its own drone by default, or an explicit set such as a commander
+    view). The broadcaster only serializes drones that have a watcher.
+
+    Each socket also has a rate divisor (RATE_DIVISORS). Divisor ``d`` joins
+    ``drone_room(drone_id, d)``, which carries its own frame stream, encoded
+    every ``d``-th broadcast. ``adapt`` moves sockets between divisors as
+    their transport backlog grows or drains.
+
+    Observer views can instead take one columnar ``fleet_update`` per tick for
+    a set of drones, or for the whole fleet. Those go to the socket directly and
+    follow the same rate divisor.
+    """
 
-class PhysicsEngine:
-    """A.E.G.I.S Drone physics simulation with doctrine support"""
-    
-    # Physical constants
-    GRAVITY = 9.81
-    MASS = 1.5
-    MAX_SPEED = 8.0
-    MAX_REVERSE_SPEED = 4.0
-    ACCELERATION = 12.0
-    DECELERATION = 10.0
-    DRAG = 0.96
-    BASE_YAW_RATE = 2.5
-    
     def __init__(self):
-        self.state = DroneState()
-        self.doctrine = DoctrineData()
-        self.control_inputs = {
-            'forward': 0.0,     # -1 (back) to 1 (forward)
-            'yaw': 0.0,         # -1 (left) to 1 (right)
-            'throttle': 0.0,    # 0 to 1
-            'pitch': 0.0,
-            'roll': 0.0,
-            'yaw_rate': 0.0
-        }
-        self.speed = 0.0
-        self.yaw_rate = 0.0
-        
-    def update(self, dt: float):
-        """Update physics with A.E.G.I.S doctrine"""
-        if not self.state.armed:
-            return
-        
-        # Update doctrine health
-        self._update_doctrine(dt)
-        
-        # Check for retrograde triggers (confidence OR battery)
-        if not self.state.retrograde_active:
-            if self.state.nav_confidence < THRESH_ABORT:
-                self._start_retrograde()
-            elif self.state.battery < BATTERY_RTB_THRESHOLD:
-                self._start_retrograde()
-        
-        # Update physics based on mode
-        if self.state.retrograde_active:
-            self._update_retrograde(dt)
-        else:
-            self._update_normal_flight(dt)
-        
-        # Update status string (preserve commander override mode)
-        if self.state.mode == "COMMANDER_RTB":
-            self.state.status = "COMMANDER_RTB"
-        elif self.state.retrograde_active:
-            self.state.status = "SAFETY_OVERRIDE"
-        elif self.state.nav_confidence > THRESH_WARN:
-            self.state.status = "NOMINAL"
-        elif self.state.nav_confidence > THRESH_REJECT:
-            self.state.status = "WARNING"
-        else:
-            self.state.status = "SAFETY_OVERRIDE"
-        
-        # Drop breadcrumbs
-        current_time = time.time()
-        if current_time - self.doctrine.last_breadcrumb_time > 0.2:
-            self.doctrine.breadcrumbs.append(self.state.position)
-            self.doctrine.last_breadcrumb_time = current_time
-            # Limit breadcrumb count
-            if len(self.doctrine.breadcrumbs) > 500:
-                self.doctrine.breadcrumbs.pop(0)
-        
-        # Battery drain
-        if self.speed > 0.1:
-            self.state.battery = max(0, self.state.battery - 0.5 * dt)
-        
-        if self.state.battery <= 0:
-            if self.state.armed:
-                print("DEBUG: Auto-disarm due to LOW BATTERY")
-            self.state.armed = False
-    
-    def _update_doctrine(self, dt: float):
-        """Update A.E.G.I.S doctrine - GPS jam directly affects nav confidence"""
-        if self.state.retrograde_active:
-            # Freeze confidence during retrograde
-            return
-        
-        gps_jam = self.state.gps_jam
-        
-        # Linear Mapping: 80% Jam -> 10% Confidence (Trigger)
-        target_confidence = 100.0 - (gps_jam * 1.125)
-        target_confidence = max(0.0, min(100.0, target_confidence))
-        
-        # Fast response (smoothing factor 3.0)
-        current = self.state.nav_confidence
-        diff = target_confidence - current
-        self.state.nav_confidence = current + diff * 3.0 * dt
-        self.state.nav_confidence = max(0.0, min(100.0, self.state.nav_confidence))
-    
-    def _start_retrograde(self, commander_override=False):
-        """Start automatic retrograde return - visits ALL checkpoints chronologically"""
-        self.state.retrograde_active = True
-        self.state.mode = "COMMANDER_RTB" if commander_override else "RETROGRADE"
-        
-        # BUILD RETURN PATH: All checkpoints in REVERSE chronological order, then origin
-        # Doctrine: Return through verified safe waypoints (same way out as came in)
-        
-        self.doctrine.return_queue = []
-        
-        if self.doctrine.anchors:
-            # Visit ALL checkpoints in reverse order (chronological return)
-            # This ensures we pass through all verified safe zones
-            self.doctrine.return_queue = list(reversed(self.doctrine.anchors.copy()))
-        
-        # Always end at origin (base)
-        self.doctrine.return_queue.append((0.0, 2.0, 0.0))
-        
-        if self.doctrine.return_queue:
-            self.doctrine.target_point = self.doctrine.return_queue.pop(0)
-    
-    def _update_retrograde(self, dt: float):
-        """Update retrograde (auto-return) flight"""
-        if self.doctrine.target_point is None:
-            self.state.retrograde_active = False
-            self.state.mode = "STABILIZE"
-            return
-        
-        target = self.doctrine.target_point
-        pos = list(self.state.position)
-        
-        # Calculate distance to target
-        dx = target[0] - pos[0]
-        dz = target[2] - pos[2]
-        dist = math.sqrt(dx * dx + dz * dz)
-        
-        if dist < 1.0:
-            # Reached target, get next
-            if self.doctrine.return_queue:
-                self.doctrine.target_point = self.doctrine.return_queue.pop(0)
-            else:
-                # Arrived at origin - AUTO-DISARM and stop
-                self.doctrine.target_point = None
-                self.state.retrograde_active = False
-                self.state.mode = "LANDED"
-                self.state.nav_confidence = 50.0  # Partial recovery
-                self.state.armed = False  # Auto-disarm after retrograde
-                self.speed = 0.0
-                self.yaw_rate = 0.0
-                # Reset to origin position
-                self.state.position = (0.0, 2.0, 0.0)
-                self.state.velocity = (0.0, 0.0, 0.0)
-            return
-        
-        # Navigate toward target
-        target_yaw = math.atan2(dx, dz)
-        current_yaw = self.state.rotation[1]
-        
-        # Calculate angle error
-        angle_error = target_yaw - current_yaw
-        while angle_error > math.pi:
-            angle_error -= 2 * math.pi
-        while angle_error < -math.pi:
-            angle_error += 2 * math.pi
-        
-        # Rotate toward target
-        new_yaw = current_yaw + angle_error * 4.0 * dt
-        
-        # Move forward at constant speed
-        speed = 6.0
-        pos[0] += math.sin(new_yaw) * speed * dt
-        pos[2] += math.cos(new_yaw) * speed * dt
-        
-        # Update state
-        self.state.position = tuple(pos)
-        self.state.rotation = (self.state.rotation[0], new_yaw, self.state.rotation[2])
-        self.state.velocity = (math.sin(new_yaw) * speed, 0, math.cos(new_yaw) * speed)
-    
-    def _update_normal_flight(self, dt: float):
-        """Update normal flight physics (arrow key controlled)"""
-        pos = list(self.state.position)
-        rot = list(self.state.rotation)
-        
-        # Get control inputs
-        forward = self.control_inputs.get('forward', 0.0)
-        yaw_input = self.control_inputs.get('yaw', 0.0)
-        throttle = self.control_inputs.get('throttle', 0.0)
-        
-        # Forward/backward speed
-        if forward > 0:
-            self.speed = min(self.MAX_SPEED, self.speed + self.ACCELERATION * dt * forward)
-        elif forward < 0:
-            self.speed = max(-self.MAX_REVERSE_SPEED, self.speed + self.DECELERATION * dt * forward)
-        else:
-            # Apply drag and clamp to zero when very slow
-            self.speed *= self.DRAG
-            if abs(self.speed) < 0.05:
-                self.speed = 0.0
-        
-        # Speed-aware yaw (from reference)
-        speed_factor = min(abs(self.speed) / 6.0, 1.0)
-        if yaw_input != 0:
-            self.yaw_rate = yaw_input * self.BASE_YAW_RATE * (0.5 + speed_factor)
-        else:
-            self.yaw_rate *= 0.85
-            if abs(self.yaw_rate) < 0.05:
-                self.yaw_rate = 0.0
-        
-        # Integrate rotation
-        rot[1] += self.yaw_rate * dt
-        
-        # Integrate position (2D ground plane movement)
-        pos[0] += math.sin(rot[1]) * self.speed * dt
-        pos[2] += math.cos(rot[1]) * self.speed * dt
-        
-        # Throttle controls altitude
-        if throttle > 0.1:
-            pos[1] += (throttle - 0.5) * 5.0 * dt
-            pos[1] = max(0, min(100, pos[1]))  # Clamp altitude
-        
-        # Ground collision
-        if pos[1] < 0:
-            pos[1] = 0
-        
-        # Update state
-        self.state.position = tuple(pos)
-        self.state.rotation = tuple(rot)
-        self.state.velocity = (math.sin(rot[1]) * self.speed, 0, math.cos(rot[1]) * self.speed)
-    
-    def log_anchor(self):
-        """Drop a verified anchor at current position"""
-        if self.state.nav_confidence >= THRESH_REJECT:
-            self.doctrine.anchors.append(self.state.position)
-            return True
-        return False
-    
-    def adjust_stress(self, delta: float):
-        """Adjust integrity stress level"""
-        self.state.integrity_stress = max(0, min(100, self.state.integrity_stress + delta))
-    
-    def set_controls(self, **kwargs):
-        """Set control inputs"""
-        for key, value in kwargs.items():
-            if key in self.control_inputs:
-                self.control_inputs[key] = np.clip(value, -1, 1)
-    
-    def arm(self):
-        """Arm the drone"""
-        # Force battery reset ensures we can always arm
-        if self.state.battery <= 10:
-             self.state.battery = 100.0
-        
-        self.state.armed = True
-        self.doctrine.breadcrumbs = []  # Clear breadcrumbs on arm
-        self.doctrine.last_breadcrumb_time = time.time()
-    
-    def disarm(self):
-        """Disarm the drone"""
-        self.state.armed = False
-    
-    def reset(self):
-        """Reset drone to initial state"""
-        self.state = DroneState()
-        self.doctrine = DoctrineData()
-        self.speed = 0.0
-        self.yaw_rate = 0.0
-        self.control_inputs = {
-            'forward': 0.0,
-            'yaw': 0.0,
-            'throttle': 0.0,
-            'pitch': 0.0,
-            'roll': 0.0,
-            'yaw_rate': 0.0
-        }
+        self.by_sid: Dict[str, Set[str]] = {}      # sid -> drone_ids
+        self.watchers: Dict[str, Set[str]] = {}    # drone_id -> sids
+        self.divisor: Dict[str, int] = {}          # sid -> rate divisor (absent = full rate)
+        self._drained: Dict[str, int] = {}         # sid -> consecutive drained backlog checks
+        self.fleet_views: Dict[str, Optional[FrozenSet[str]]] = {}  # sid -> fleet_update drones (None = all)
+        self.lock = threading.Lock()
+
+    def subscribe(self, sid: str, drone_ids: Iterable[str]):
+        """Add drones to a socket's subscription set"""
+        with self.lock:
+            current = self.by_sid.setdefault(sid, set())
+            for drone_id in drone_ids:
+                if drone_id in current:
+                    continue
+                current.add(drone_id)
+                self.watchers.setdefault(drone_id, set()).add(sid)
+                join_room(drone_room(drone_id, self.divisor.get(sid, 1)), sid=sid, namespace='/')
+
+    def unsubscribe(self, sid: str, drone_ids: Iterable[str]):
+        """Remove drones from a socket's subscription set"""
+        with self.lock:
+            current = self.by_sid.get(sid, set())
+            for drone_id in drone_ids:
+                if drone_id not in current:
+                    continue
+                current.discard(drone_id)
+                sids = self.watchers.get(drone_id)
+                if sids is not None:
+                    sids.discard(sid)
+                    if not sids:
+                        del self.watchers[drone_id]
+                leave_room(drone_room(drone_id, self.divisor.get(sid, 1)), sid=sid, namespace='/')
+
+    def drop(self, sid: str):
+        """Forget a disconnected socket (Socket.IO already removed it from its rooms)"""
+        with self.lock:
+            self.divisor.pop(sid, None)
+            self._drained.pop(sid, None)
+            self.fleet_views.pop(sid, None)
+            for drone_id in self.by_sid.pop(sid, set()):
+                sids = self.watchers.get(drone_id)
+                if sids is not None:
+                    sids.discard(sid)
+                    if not sids:
+                        del self.watchers[drone_id]
+
+    def subscriptions(self, sid: str) -> List[str]:
+        with self.lock:
+            return sorted(self.by_sid.get(sid, ()))
+
+    def watch_fleet(self, sid: str, drone_ids: Optional[Iterable[str]] = None):
+        """Send this socket fleet_update frames for ``drone_ids`` (None = every drone)"""
+        with self.lock:
+            self.fleet_views[sid] = None if drone_ids is None else frozenset(drone_ids)
+
+    def unwatch_fleet(self, sid: str):
+        with self.lock:
+            self.fleet_views.pop(sid, None)
+
+    def fleet_viewers(self) -> List[Tuple[str, Optional[FrozenSet[str]], int]]:
+        """(sid, watched drone IDs or None for all, rate divisor) per fleet viewer"""
+        with self.lock:
+            return [(sid, drone_ids, self.divisor.get(sid, 1)) for sid, drone_ids in self.fleet_views.items()]
+
+    def fanout(self) -> Dict[Tuple[str, int], int]:
+        """(watched drone ID, rate divisor) -> number of subscribed sockets"""
+        with self.lock:
+            counts: Dict[Tuple[str, int], int] = {}
+            for drone_id, sids in self.watchers.items():
+                for sid in sids:
+                    key = (drone_id, self.divisor.get(sid, 1))
+                    counts[key] = counts.get(key, 0) + 1
+            return counts
+
+    def adapt(self, backlog: Callable[[str], int]) -> List[Tuple[str, int]]:
+        """Re-rate every socket from its transport backlog.
+
+        Returns the (drone_id, divisor) streams that gained a socket and need a keyframe.
+        """
+        with self.lock:
+            moves = []
+            for sid in self.by_sid:
+                divisor = self.divisor.get(sid, 1)
+                level = RATE_DIVISORS.index(divisor)
+                queued = backlog(sid)
+                if queued > BACKLOG_HIGH and level + 1 < len(RATE_DIVISORS):
+                    moves.append((sid, divisor, RATE_DIVISORS[level + 1]))
+                    self._drained[sid] = 0
+                elif queued <= BACKLOG_LOW and level > 0:
+                    self._drained[sid] = self._drained.get(sid, 0) + 1
+                    if self._drained[sid] >= RATE_RECOVER_CHECKS:
+                        moves.append((sid, divisor, RATE_DIVISORS[level - 1]))
+                        self._drained[sid] = 0
+                else:
+                    self._drained[sid] = 0
+            streams = []
+            for sid, old, new in moves:
+                if new == 1:
+                    self.divisor.pop(sid, None)
+                else:
+                    self.divisor[sid] = new
+                for drone_id in self.by_sid[sid]:
+                    leave_room(drone_room(drone_id, old), sid=sid, namespace='/')
+                    join_room(drone_room(drone_id, new), sid=sid, namespace='/')
+                    streams.append((drone_id, new))
+            return streams
+
+    def rate(self, sid: str) -> int:
+        return self.divisor.get(sid, 1)
+
+    def rates(self) -> Dict[int, int]:
+        """Rate divisor -> number of sockets"""
+        with self.lock:
+            counts = dict.fromkeys(RATE_DIVISORS, 0)
+            for sid in self.by_sid:
+                counts[self.divisor.get(sid, 1)] += 1
+            return counts
+
+    def watched(self) -> List[str]:
+        """Drone IDs with at least one subscriber"""
+        with self.lock:
+            return list(self.watchers)
 
 
 # ==================== SIMULATION MANAGER ====================
@@ -360,18 +277,141 @@ class SimulationManager:
     """Manages multiple drone simulations"""
     
     def __init__(self):
+        # SIM_SHARDS > 0 steps the fleet in that many worker processes over shared
+        # memory. Shard workers re-import this module when spawned, so only the
+        # top-level server process builds a pool.
+        shards = int(os.environ.get('SIM_SHARDS', 0))
+        # Ground collision, height above ground and RTB clearance; tiles are memory-mapped
+        # and cached up to TERRAIN_BUDGET_MB (per process when sharded)
+        self.terrain: Optional[Heightfield] = None
+        if TERRAIN_DIR:
+            self.terrain = Heightfield.open(TERRAIN_DIR, int(os.environ.get('TERRAIN_BUDGET_MB', 64)) << 20)
+        self.shards: Optional[ShardPool] = None
+        if shards > 0 and multiprocessing.parent_process() is None:
+            self.shards = ShardPool(shards, capacity=int(os.environ.get('SIM_CAPACITY', 1024)), terrain=self.terrain)
+            atexit.register(self.shards.close)
+            self.fleet = self.shards.fleet
+        else:
+            self.fleet = FleetEngine()
+            self.fleet.terrain = self.terrain
+        # One frame stream per rate divisor; idle drones drop to a heartbeat
+        broadcast_hz = float(os.environ.get('BROADCAST_RATE', 10))
+        self.streams = {divisor: TelemetryEncoder(
+            self.fleet, keyframe_interval=max(1, round(broadcast_hz)), deadbands=TELEMETRY_DEADBANDS,
+            heartbeat=max(1, round(HEARTBEAT_SECONDS * broadcast_hz / divisor)))
+            for divisor in RATE_DIVISORS}
+        self.telemetry = self.streams[1]
+        self.fleet_frames = FleetFrameEncoder()
+        self.broadcasts = 0
+        # Every tick of every session goes to RECORD_DIR ('' disables recording)
+        self.recorder: Optional[FlightRecorder] = None
+        if RECORD_DIR and multiprocessing.parent_process() is None:
+            self.recorder = FlightRecorder(RECORD_DIR, buffer_bytes=int(os.environ.get('RECORD_BUFFER_MB', 64)) << 20)
+            atexit.register(self.recorder.close)
         self.drones: Dict[str, PhysicsEngine] = {}
+        # drone ID -> fleet row, rebuilt only when drones come and go; snapshots share it
+        self.rows: Mapping[str, int] = MappingProxyType({})
+        # Jamming emitters (JAM_EMITTERS, /api/jam) sampled into every drone's gps_jam each tick
+        self.jam_field: JamField = field_from_spec(os.environ.get('JAM_EMITTERS')) or JamField()
+        self.fleet.jam_field = self.jam_field
+        # Rebuilt and swapped in at the end of every step; readers never take the lock
+        self.snapshot: FleetSnapshot = self.fleet.snapshot()
+        # set_controls events land here and take effect at the next tick boundary
+        self.controls = ControlMailbox()
         self.simulation_running = False
         self.simulation_thread = None
-        self.lock = threading.Lock()
+        self.lock = TimedLock(LOCK_WAIT)
+        # Physics at SIMULATION_RATE, telemetry at BROADCAST_RATE. Frames carry the sim
+        # clock and clients interpolate between them, so 10 Hz renders smoothly.
+        self.scheduler = FixedStepScheduler(
+            self._step,
+            self._broadcast,
+            physics_hz=float(os.environ.get('SIMULATION_RATE', 60)),
+            broadcast_hz=broadcast_hz,
+            max_substeps=int(os.environ.get('MAX_CATCHUP_STEPS', 5)),
+            sleep=socketio.sleep
+        )
+        # Restored drones fly on unclaimed until their client reconnects with the
+        # drone's ID, or RECLAIM_SECONDS pass and they are removed
+        self.unclaimed: Set[str] = set()
+        self.reclaim_deadline = 0.0
+        # The whole fleet goes to CHECKPOINT_FILE every CHECKPOINT_SECONDS and once more at exit
+        self.checkpointer: Optional[Checkpointer] = None
+        if CHECKPOINT_FILE and SERVING and multiprocessing.parent_process() is None:
+            if os.path.exists(CHECKPOINT_FILE):
+                self.restore(CHECKPOINT_FILE)
+            self.checkpointer = Checkpointer(CHECKPOINT_FILE, CHECKPOINT_SECONDS)
+            atexit.register(self.close_checkpoints)
     
     def add_drone(self, drone_id: str) -> PhysicsEngine:
         """Create a new drone"""
         with self.lock:
-            engine = PhysicsEngine()
+            engine = self.shards.add_drone() if self.shards else PhysicsEngine(self.fleet)
             self.drones[drone_id] = engine
+            self._drones_changed()
+            if self.recorder:
+                self.recorder.open_session(drone_id, engine.row, int(self.fleet.anchor_seq[engine.row]))
             return engine
     
+    def claim(self, drone_id: str) -> Optional[PhysicsEngine]:
+        """Hand a restored, still unclaimed drone to a reconnecting client"""
+        with self.lock:
+            if drone_id not in self.unclaimed:
+                return None
+            self.unclaimed.discard(drone_id)
+            return self.drones.get(drone_id)
+    
+    def restore(self, path: str) -> int:
+        """Recreate every drone in a checkpoint file; returns how many"""
+        started = time.perf_counter()
+        try:
+            checkpoint = Checkpoint.load(path)
+        except (OSError, ValueError) as e:
+            print(f'Checkpoint {path} not restored: {e}')
+            return 0
+        with self.lock:
+            rows = []
+            for index, drone_id in enumerate(checkpoint.drone_ids):
+                saved = partial(checkpoint.doctrine, index)
+                if self.shards:
+                    engine = self.shards.add_drone(saved)
+                else:
+                    engine = PhysicsEngine(self.fleet)
+                    self.fleet.doctrine[engine.row] = saved(BreadcrumbRing(self.fleet, engine.row))
+                self.drones[drone_id] = engine
+                rows.append(engine.row)
+            self._drones_changed()
+            checkpoint.apply(self.fleet, rows)
+            if self.recorder:
+                for drone_id, row in zip(checkpoint.drone_ids, rows):
+                    self.recorder.open_session(drone_id, row, int(self.fleet.anchor_seq[row]))
+            self.unclaimed = set(checkpoint.drone_ids)
+            self.reclaim_deadline = time.monotonic() + RECLAIM_SECONDS
+            self.snapshot = self.fleet.snapshot(self.rows)
+        print(f'Restored {len(checkpoint)} drones from {path} (tick {checkpoint.tick}) '
+              f'in {(time.perf_counter() - started) * 1000:.0f} ms')
+        return len(checkpoint)
+    
+    def _return_queues(self) -> Dict[int, List[Tuple[float, float, float]]]:
+        """Remaining retrograde waypoints of every drone that has some (lock held)"""
+        rows = np.flatnonzero(self.fleet.active & (self.fleet.return_queue_len > 0))
+        if rows.size == 0:
+            return {}
+        if self.shards:
+            return self.shards.return_queues()
+        return {row: list(self.fleet.doctrine[row].return_queue) for row in rows.tolist()}
+    
+    def close_checkpoints(self):
+        """Write a final checkpoint of the current fleet and stop the writer"""
+        with self.lock:
+            snapshot = self.fleet.snapshot(self.rows)
+            queues = self._return_queues()
+        self.checkpointer.close((snapshot, queues))
+    
+    def _drones_changed(self):
+        """Refresh ``rows`` after adding or removing drones (lock held)"""
+        self.rows = MappingProxyType({drone_id: drone.row for drone_id, drone in self.drones.items()})
+    
     def get_drone(self, drone_id: str) -> Optional[PhysicsEngine]:
         """Get a drone by ID"""
         return self.drones.get(drone_id)
@@ -380,14 +420,31 @@ class SimulationManager:
         """Remove a drone"""
         with self.lock:
             if drone_id in self.drones:
-                del self.drones[drone_id]
+                row = self.drones.pop(drone_id).row
+                self._drones_changed()
+                self.controls.forget(row)
+                if self.recorder:
+                    self.recorder.close_session(drone_id)
+                if self.shards:
+                    # Frees the row and rebalances shards if they drift apart
+                    self.shards.remove_drone(row)
+                else:
+                    self.fleet.release(row)
+    
+    def request_keyframe(self, drone_id: str, divisor: Optional[int] = None):
+        """Make the next telemetry frame for this drone a full keyframe (on one or every stream)"""
+        drone = self.drones.get(drone_id)
+        if drone is not None:
+            for stream_divisor, encoder in self.streams.items():
+                if divisor in (None, stream_divisor):
+                    encoder.force_keyframe(drone.row)
     
     def start_simulation(self):
         """Start the main simulation loop"""
         if not self.simulation_running:
             self.simulation_running = True
-            self.simulation_thread = threading.Thread(target=self._simulation_loop, daemon=True)
-            self.simulation_thread.start()
+            # A daemon thread in threading mode, a green thread under eventlet
+            self.simulation_thread = socketio.start_background_task(self._simulation_loop)
     
     def stop_simulation(self):
         """Stop the simulation loop"""
@@ -395,43 +452,208 @@ class SimulationManager:
     
     def _simulation_loop(self):
         """Main simulation loop"""
-        dt = 1.0 / 60.0  # 60 Hz
-        tick = 0
-        
-        while self.simulation_running:
-            with self.lock:
-                for drone in self.drones.values():
-                    drone.update(dt)
-            
-            # Broadcast updates at 30Hz (every 2 ticks) - Smoother than 10Hz
-            tick += 1
-            if tick % 2 == 0:
-                with app.app_context():
-                    for drone_id, drone in self.drones.items():
-                        state_dict = asdict(drone.state)
-                        state_dict['speed'] = drone.speed
-                        
-                        # Add doctrine data
-                        doctrine_dict = {
-                            'breadcrumbs': drone.doctrine.breadcrumbs[-50:],  # Last 50 for perf
-                            'anchors': drone.doctrine.anchors,
-                            'target_point': drone.doctrine.target_point,
-                            'return_queue_length': len(drone.doctrine.return_queue)
-                        }
-                        
-                        socketio.emit('drone_update', to_native({
-                            'drone_id': drone_id,
-                            'state': state_dict,
-                            'doctrine': doctrine_dict,
-                            'controls': drone.control_inputs
-                        }))
-            
-            time.sleep(dt)
+        self.scheduler.run(lambda: self.simulation_running)
+    
+    def _step(self, dt: float):
+        """Advance the whole fleet by one fixed timestep"""
+        with self.lock:
+            # Latest input per drone, all at once (shared memory reaches the shards too)
+            for latency in self.controls.apply(self.fleet.controls).tolist():
+                CONTROL_LATENCY.observe(latency)
+            with PHYSICS_TIME.time():
+                if self.shards:
+                    self.shards.step(dt)
+                else:
+                    self.fleet.step(dt)
+            # Whole fleet at once, in this process, even when shards step the rows
+            with PROXIMITY_TIME.time():
+                self.fleet.update_proximity()
+            with SNAPSHOT_TIME.time():
+                snapshot = self.fleet.snapshot(self.rows)
+            # Sessions open and close under the lock, so capture stays inside it
+            if self.recorder:
+                with RECORD_TIME.time():
+                    self.recorder.capture(snapshot)
+            # Return queues are the only doctrine state the snapshot does not copy
+            queues = None
+            if self.checkpointer and self.checkpointer.due():
+                with CHECKPOINT_TIME.time():
+                    queues = self._return_queues()
+        self.snapshot = snapshot
+        if queues is not None:
+            self.checkpointer.submit(snapshot, queues)
+        if self.unclaimed and time.monotonic() >= self.reclaim_deadline:
+            self._expire_unclaimed()
+    
+    def _expire_unclaimed(self):
+        """Remove restored drones nobody reclaimed in time"""
+        with self.lock:
+            expired, self.unclaimed = self.unclaimed, set()
+        for drone_id in expired:
+            self.remove_drone(drone_id)
+        print(f'Removed {len(expired)} unclaimed restored drones')
+    
+    def _broadcast(self):
+        """Send one telemetry frame per watched, changed drone to its room"""
+        # Only drones someone watches are encoded, and each goes to its own
+        # room, so cost scales with subscriptions. Slowed sockets watch
+        # per-divisor rooms that are only encoded on their turn.
+        self.broadcasts += 1
+        if self.broadcasts % RATE_CHECK_EVERY == 0:
+            with app.app_context():
+                moved = subscriptions.adapt(pending_packets)
+            for drone_id, divisor in moved:
+                self.request_keyframe(drone_id, divisor)
+        fanout = subscriptions.fanout()
+        snapshot = self.snapshot
+        sent = 0
+        for divisor, encoder in self.streams.items():
+            if self.broadcasts % divisor:
+                continue
+            watched = [(drone_id, snapshot.drones[drone_id]) for drone_id, d in fanout
+                       if d == divisor and drone_id in snapshot.drones]
+            if not watched:
+                continue
+            with SERIALIZE_TIME.time():
+                frames = encoder.encode([row for _, row in watched],
+                                        [drone_id for drone_id, _ in watched], snapshot)
+            nbytes = 0
+            with EMIT_TIME.time(), app.app_context():
+                for (drone_id, _), frame in zip(watched, frames):
+                    if frame is None:
+                        continue
+                    socketio.emit('drone_update', frame, to=drone_room(drone_id, divisor))
+                    nbytes += len(frame) * fanout[drone_id, divisor]
+                    sent += 1
+                    if sent % EMIT_YIELD_EVERY == 0:
+                        socketio.sleep(0)
+            TELEMETRY_BYTES.inc(nbytes)
+
+        viewers = subscriptions.fleet_viewers()
+        if viewers:
+            self._broadcast_fleet(viewers, snapshot)
+
+    def _broadcast_fleet(self, viewers: List[Tuple[str, Optional[FrozenSet[str]], int]],
+                         snapshot: FleetSnapshot):
+        """One columnar fleet_update per observer; viewers of the same drone set share the encode"""
+        groups: Dict[Optional[FrozenSet[str]], List[str]] = {}
+        for sid, drone_ids, divisor in viewers:
+            if self.broadcasts % divisor == 0:
+                groups.setdefault(drone_ids, []).append(sid)
+        for drone_ids, sids in groups.items():
+            if drone_ids is None:
+                watched = sorted(snapshot.drones.items(), key=lambda item: item[1])
+            else:
+                watched = [(d, snapshot.drones[d]) for d in sorted(drone_ids) if d in snapshot.drones]
+            with SERIALIZE_TIME.time():
+                frame = self.fleet_frames.encode(snapshot, [row for _, row in watched],
+                                                 [drone_id for drone_id, _ in watched])
+            with EMIT_TIME.time(), app.app_context():
+                socketio.emit('fleet_update', frame, to=sids)
+            TELEMETRY_BYTES.inc(len(frame) * len(sids))
 
 
 # Global simulation manager
 sim_manager = SimulationManager()
 
+# Global telemetry subscriptions
+subscriptions = SubscriptionRegistry()
+
+# Restored drones (retrogrades included) carry on before anyone reconnects
+if sim_manager.drones:
+    sim_manager.start_simulation()
+
+
+def _emit_replay_frame(frame: bytes, room: str):
+    with app.app_context():
+        socketio.emit('drone_update', frame, to=room)
+
+
+def _emit_replay_state(status: Dict, room: str):
+    with app.app_context():
+        socketio.emit('replay_state', status, to=room)
+
+
+# Recorded sessions played back as drone_update frames (needs recordings)
+replay: Optional[ReplayService] = None
+if RECORD_DIR:
+    replay = ReplayService(RECORD_DIR, _emit_replay_frame, _emit_replay_state,
+                           spawn=socketio.start_background_task, sleep=socketio.sleep,
+                           rate=float(os.environ.get('BROADCAST_RATE', 10)))
+
+# Gauges read the latest fleet snapshot at scrape time
+metrics.gauge('connected_clients', 'Connected Socket.IO clients', lambda: len(clients))
+metrics.gauge('drones', 'Drones by state', lambda: {
+    ('active',): int(sim_manager.snapshot.active.sum()),
+    ('armed',): int((sim_manager.snapshot.active & sim_manager.snapshot.armed).sum()),
+    ('retrograde',): int((sim_manager.snapshot.active & sim_manager.snapshot.retrograde).sum()),
+}, ['state'])
+metrics.gauge('sim_time_seconds', 'Simulation clock', lambda: sim_manager.snapshot.sim_time)
+metrics.gauge('snapshot_version', 'Tick of the latest published fleet snapshot',
+              lambda: sim_manager.snapshot.version)
+metrics.counter_func('retrograde_triggers_total', 'Retrograde starts by cause', lambda: {
+    (cause,): sim_manager.snapshot.retrograde_triggers[cause] for cause in RETROGRADE_CAUSES
+}, ['cause'])
+metrics.counter_func('proximity_events_total', 'Drones entering a proximity state', lambda: {
+    (kind,): count for kind, count in sim_manager.snapshot.proximity_events.items()
+}, ['kind'])
+metrics.counter_func('recorder_records_total', 'Flight recorder records by outcome', lambda: {
+    ('written',): sim_manager.recorder.written_records,
+    ('dropped',): sim_manager.recorder.dropped_records,
+} if sim_manager.recorder else {}, ['outcome'])
+metrics.counter_func('recorder_failed_writes_total', 'Flight recorder disk writes that failed (each closes its session)',
+                     lambda: sim_manager.recorder.failed_writes if sim_manager.recorder else 0)
+metrics.counter_func('checkpoints_total', 'Fleet checkpoints by outcome', lambda: {
+    ('written',): sim_manager.checkpointer.written,
+    ('skipped',): sim_manager.checkpointer.skipped,
+    ('failed',): sim_manager.checkpointer.failed,
+} if sim_manager.checkpointer else {}, ['outcome'])
+metrics.gauge('checkpoint_bytes', 'Size of the latest fleet checkpoint',
+              lambda: sim_manager.checkpointer.last_bytes if sim_manager.checkpointer else 0)
+metrics.gauge('checkpoint_write_seconds', 'Time the checkpoint writer took for the latest checkpoint',
+              lambda: sim_manager.checkpointer.last_seconds if sim_manager.checkpointer else 0)
+metrics.gauge('unclaimed_drones', 'Restored drones waiting for their client to reconnect',
+              lambda: len(sim_manager.unclaimed))
+metrics.gauge('recorder_pending_bytes', 'Captured records waiting for the recorder writer',
+              lambda: sim_manager.recorder.pending_bytes if sim_manager.recorder else 0)
+metrics.gauge('clients_by_rate', 'Sockets by telemetry rate divisor (1 = every broadcast)', lambda: {
+    (str(divisor),): count for divisor, count in subscriptions.rates().items()
+}, ['divisor'])
+metrics.counter_func('telemetry_frames_total', 'Per-drone telemetry frames by outcome', lambda: {
+    ('sent',): sum(encoder.frames_sent for encoder in sim_manager.streams.values()),
+    ('heartbeat',): sum(encoder.heartbeats for encoder in sim_manager.streams.values()),
+    ('suppressed',): sum(encoder.suppressed for encoder in sim_manager.streams.values()),
+}, ['outcome'])
+metrics.gauge('jam_emitters', 'GPS jamming emitters in the jam field', lambda: len(sim_manager.jam_field))
+metrics.counter_func('jam_tiles_rebuilt_total', 'Jam raster tiles recomputed after emitter changes',
+                     lambda: sim_manager.jam_field.tiles_rebuilt)
+metrics.gauge('terrain_cache_bytes', 'Heightfield tile bytes mapped by the tile cache',
+              lambda: sim_manager.terrain.cached_bytes if sim_manager.terrain else 0)
+metrics.counter_func('terrain_tile_lookups_total', 'Heightfield tile cache lookups by outcome', lambda: {
+    ('hit',): sim_manager.terrain.hits,
+    ('miss',): sim_manager.terrain.misses,
+    ('evicted',): sim_manager.terrain.evictions,
+} if sim_manager.terrain else {}, ['outcome'])
+metrics.gauge('fleet_viewers', 'Sockets receiving fleet_update frames', lambda: len(subscriptions.fleet_views))
+metrics.counter_func('fleet_frames_total', 'Columnar fleet_update frames encoded',
+                     lambda: sim_manager.fleet_frames.frames_sent)
+metrics.gauge('replay_streams', 'Active replay streams', lambda: len(replay.streams) if replay else 0)
+metrics.counter_func('control_inputs_total', 'set_controls inputs by outcome', lambda: {
+    ('accepted',): sim_manager.controls.accepted,
+    ('coalesced',): sim_manager.controls.coalesced,
+    ('stale',): sim_manager.controls.stale,
+    ('applied',): sim_manager.controls.applied,
+}, ['outcome'])
+metrics.counter_func('scheduler_steps_total', 'Physics steps by outcome', lambda: {
+    ('executed',): sim_manager.scheduler.steps,
+    ('catchup',): sim_manager.scheduler.catchup_steps,
+    ('dropped',): sim_manager.scheduler.dropped_steps,
+}, ['outcome'])
+metrics.counter_func('scheduler_overruns_total', 'Ticks that took longer than one timestep',
+                     lambda: sim_manager.scheduler.overruns)
+metrics.counter_func('process_cpu_seconds_total', 'CPU time used by the server process (excludes shard workers)',
+                     time.process_time)
+
 
 # ==================== FLASK ROUTES ====================
 
@@ -444,16 +666,107 @@ def index():
 @app.route('/api/health', methods=['GET'])
 def health():
     """Health check endpoint"""
-    return jsonify({'status': 'healthy', 'timestamp': time.time()})
+    return jsonify({
+        'status': 'healthy',
+        'timestamp': time.time(),
+        'sim_time': sim_manager.fleet.sim_time,
+        'scheduler': sim_manager.scheduler.stats()
+    })
+
+
+@app.route('/api/metrics', methods=['GET'])
+def get_metrics():
+    """Prometheus metrics"""
+    return Response(metrics.render(), mimetype='text/plain; version=0.0.4')
+
+
+@app.route('/api/profiler', methods=['GET', 'POST'])
+def sim_profiler():
+    """Sampling profiler for the simulation thread.
+
+    POST {"enabled": true, "interval_ms": 5} to start (or false to stop);
+    GET returns the folded stacks collected so far.
+    """
+    from flask import request
+    if request.method == 'POST':
+        data = request.get_json(silent=True) or {}
+        if data.get('enabled'):
+            thread = sim_manager.simulation_thread
+            if not isinstance(thread, threading.Thread):
+                return jsonify({'error': 'Profiler needs ASYNC_MODE=threading'}), 409
+            if not thread.is_alive():
+                return jsonify({'error': 'Simulation is not running'}), 409
+            interval = float(data.get('interval_ms', 5)) / 1000.0
+            profiler.start(thread.ident, max(0.001, interval))
+        else:
+            profiler.stop()
+        return jsonify({'running': profiler.running, 'samples': profiler.sample_count})
+    return Response(profiler.folded(), mimetype='text/plain')
+
+
+@app.route('/api/recordings', methods=['GET'])
+def get_recordings():
+    """Recorded sessions, newest first, plus recorder health"""
+    return jsonify({
+        'sessions': list_recordings(RECORD_DIR) if RECORD_DIR else [],
+        'recorder': sim_manager.recorder.stats() if sim_manager.recorder else None
+    })
+
+
+@app.route('/api/jam', methods=['GET'])
+def get_jam_field():
+    """Jam raster geometry and emitters"""
+    return jsonify(sim_manager.jam_field.describe())
+
+
+@app.route('/api/jam/emitters', methods=['POST'])
+def set_jam_emitter():
+    """Add or move an emitter: {"id", "x", "z", "power", "range", "falloff"} (id optional)"""
+    from flask import request
+    data = request.get_json(silent=True) or {}
+    try:
+        emitter = sim_manager.jam_field.set_emitter(
+            str(data.get('id') or uuid.uuid4().hex[:8]), float(data['x']), float(data['z']),
+            float(data['power']), float(data['range']), float(data.get('falloff', 1.0)))
+    except (KeyError, TypeError, ValueError) as error:
+        return jsonify({'error': f'Invalid emitter: {error}'}), 400
+    return jsonify(emitter.to_dict())
+
+
+@app.route('/api/jam/emitters/<emitter_id>', methods=['DELETE'])
+def remove_jam_emitter(emitter_id: str):
+    """Remove an emitter; only the tiles it covered are recomputed"""
+    if not sim_manager.jam_field.remove_emitter(emitter_id):
+        return jsonify({'error': f'No such emitter: {emitter_id}'}), 404
+    return jsonify({'removed': emitter_id})
+
+
+@app.route('/api/terrain', methods=['GET'])
+def get_terrain():
+    """Heightfield geometry and tile cache state"""
+    if sim_manager.terrain is None:
+        return jsonify({'error': 'Terrain is disabled (TERRAIN_DIR is empty)'}), 404
+    return jsonify(sim_manager.terrain.describe())
+
+
+@app.route('/api/terrain/tiles/<int:tz>/<int:tx>', methods=['GET'])
+def get_terrain_tile(tz: int, tx: int):
+    """One tile: (tile + 1)^2 little-endian float32 heights, rows along z (the simulation's own data)"""
+    data = sim_manager.terrain.tile_data(tz, tx) if sim_manager.terrain is not None else None
+    if data is None:
+        return jsonify({'error': f'No terrain tile {tz}/{tx}'}), 404
+    response = Response(data, mimetype='application/octet-stream')
+    response.headers['Cache-Control'] = 'public, max-age=3600'
+    return response
 
 
 @app.route('/api/drones', methods=['GET'])
 def get_drones():
-    """Get all active drones"""
-    drones = {}
-    for drone_id, engine in sim_manager.drones.items():
-        drones[drone_id] = asdict(engine.state)
-    return jsonify(drones)
+    """Get all active drones (as of the latest tick)"""
+    snapshot = sim_manager.snapshot
+    response = jsonify({drone_id: snapshot.state(row).to_dict() for drone_id, row in snapshot.drones.items()})
+    response.headers['X-Snapshot-Version'] = str(snapshot.version)
+    return response
 
 
 # ==================== SOCKET EVENTS ====================
@@ -466,15 +779,26 @@ clients = {} # sid -> drone_id
 def handle_connect(auth):
     """Handle client connection"""
     from flask import request
-    client_id = str(uuid.uuid4())
+    # A client that flew before a restart passes its drone ID to take that drone back
+    requested = auth.get('drone_id') if isinstance(auth, dict) else None
+    drone = sim_manager.claim(requested) if isinstance(requested, str) else None
+    if drone is not None:
+        client_id = requested
+        print(f'Client reclaimed: {client_id} (SID: {request.sid})')
+    else:
+        client_id = str(uuid.uuid4())
+        print(f'Client connected: {client_id} (SID: {request.sid})')
+        drone = sim_manager.add_drone(client_id)
     clients[request.sid] = client_id
-    print(f'Client connected: {client_id} (SID: {request.sid})')
     
-    drone = sim_manager.add_drone(client_id)
+    # Each socket watches its own drone by default
+    subscriptions.subscribe(request.sid, [client_id])
+    sim_manager.request_keyframe(client_id, subscriptions.rate(request.sid))
     
     emit('drone_created', {
         'drone_id': client_id,
-        'initial_state': asdict(drone.state),
+        'reclaimed': client_id == requested,
+        'initial_state': drone.state.to_dict(),
         'thresholds': {
             'warn': THRESH_WARN,
             'reject': THRESH_REJECT,
@@ -501,97 +825,242 @@ def handle_disconnect():
         del clients[sid]
     else:
         print('Client disconnected (Unknown SID)')
+    subscriptions.drop(sid)
+    if replay:
+        replay.drop(sid)
+
+
+def _drone_ids(data) -> Optional[List[str]]:
+    """The string IDs in a payload's ``drone_ids`` list; None when it is missing or not a list"""
+    drone_ids = data.get('drone_ids') if isinstance(data, dict) else None
+    if not isinstance(drone_ids, list):
+        return None
+    return [d for d in drone_ids if isinstance(d, str)]
+
+
+@socketio.on('subscribe')
+def handle_subscribe(data=None):
+    """Watch additional drones (e.g. a commander view over a group)"""
+    from flask import request
+    drone_ids = _drone_ids(data) or []
+    if isinstance(data, dict) and data.get('replace'):
+        # Replace the whole set; the socket always keeps its own drone
+        stale = set(subscriptions.subscriptions(request.sid)) - set(drone_ids)
+        stale.discard(clients.get(request.sid))
+        subscriptions.unsubscribe(request.sid, stale)
+    added = [d for d in drone_ids if sim_manager.get_drone(d)]
+    subscriptions.subscribe(request.sid, added)
+    # New viewers need a full keyframe before deltas make sense
+    for drone_id in added:
+        sim_manager.request_keyframe(drone_id, subscriptions.rate(request.sid))
+    emit('subscriptions', {'drone_ids': subscriptions.subscriptions(request.sid)})
+
+
+@socketio.on('unsubscribe')
+def handle_unsubscribe(data=None):
+    """Stop watching drones"""
+    from flask import request
+    drone_ids = _drone_ids(data) or []
+    subscriptions.unsubscribe(request.sid, drone_ids)
+    emit('subscriptions', {'drone_ids': subscriptions.subscriptions(request.sid)})
+
+@socketio.on('watch_fleet')
+def handle_watch_fleet(data=None):
+    """Receive one columnar fleet_update per tick (no drone_ids = the whole fleet)"""
+    from flask import request
+    drone_ids = _drone_ids(data)
+    if drone_ids is None and isinstance(data, dict) and data.get('drone_ids') is not None:
+        return
+    subscriptions.watch_fleet(request.sid, drone_ids)
+    emit('fleet_view', {'drone_ids': None if drone_ids is None else sorted(set(drone_ids))})
+
+
+@socketio.on('unwatch_fleet')
+def handle_unwatch_fleet(data=None):
+    """Stop fleet_update frames"""
+    from flask import request
+    subscriptions.unwatch_fleet(request.sid)
+    emit('fleet_view', {'drone_ids': [], 'stopped': True})
+
+@socketio.on('request_keyframe')
+def handle_request_keyframe(data=None):
+    """Client lost telemetry sync (sequence gap) and needs a full frame"""
+    from flask import request
+    drone_id = data.get('drone_id') if isinstance(data, dict) else None
+    if not isinstance(drone_id, str) or not drone_id:
+        return
+    if drone_id.startswith(REPLAY_PREFIX):
+        if replay:
+            replay.request_keyframe(drone_id)
+    else:
+        sim_manager.request_keyframe(drone_id, subscriptions.rate(request.sid))
+
+
+@socketio.on('doctrine_sync')
+def handle_doctrine_sync(data):
+    """Resend only the anchors/breadcrumbs a client has not acknowledged yet"""
+    drone_id = data.get('drone_id') if isinstance(data, dict) else None
+    if not isinstance(drone_id, str):
+        return
+    try:
+        anchor_seq = int(data.get('anchor_seq', 0))
+        breadcrumb_seq = int(data.get('breadcrumb_seq', 0))
+    except (TypeError, ValueError, OverflowError):
+        return
+    if drone_id.startswith(REPLAY_PREFIX):
+        frame = replay.encode_sync(drone_id, anchor_seq, breadcrumb_seq) if replay else None
+        if frame:
+            emit('drone_update', frame)
+            TELEMETRY_BYTES.inc(len(frame))
+    elif drone_id:
+        snapshot = sim_manager.snapshot
+        if drone_id in snapshot.drones:
+            frame = sim_manager.telemetry.encode_sync(
+                snapshot.drones[drone_id], drone_id, anchor_seq, breadcrumb_seq, snapshot
+            )
+            emit('drone_update', frame)
+            TELEMETRY_BYTES.inc(len(frame))
+
+
+@socketio.on('replay_open')
+def handle_replay_open(data):
+    """Watch a recorded session; viewers of the same recording share one stream unless shared=false"""
+    from flask import request
+    if not isinstance(data, dict):
+        return
+    if not replay:
+        emit('replay_state', {'error': 'Recording is disabled (RECORD_DIR is empty)'})
+        return
+    name = data.get('name')
+    try:
+        stream = replay.open(name if isinstance(name, str) else None, request.sid,
+                             shared=bool(data.get('shared', True)))
+    except ValueError as error:
+        emit('replay_state', {'error': str(error)})
+        return
+    join_room(ReplayService.room(stream))
+    emit('replay_state', stream.status())
+
+
+@socketio.on('replay_control')
+def handle_replay_control(data):
+    """play / pause / seek (value = sim time) / speed (value = 0.25-16)"""
+    if not replay or not isinstance(data, dict):
+        return
+    try:
+        value = float(data['value']) if data.get('value') is not None else None
+    except (TypeError, ValueError):
+        return
+    if value is not None and not math.isfinite(value):
+        return
+    status = replay.control(str(data.get('stream_id', '')), data.get('action', ''), value)
+    if status is None:
+        emit('replay_state', {'error': 'Unknown replay stream'})
+
+
+@socketio.on('replay_close')
+def handle_replay_close(data):
+    """Stop watching a replay; the stream ends when its last viewer leaves"""
+    from flask import request
+    stream_id = data.get('stream_id') if isinstance(data, dict) else None
+    if replay and stream_id:
+        leave_room(f'drone:{REPLAY_PREFIX}{stream_id}')
+        replay.leave(stream_id, request.sid)
+
+
+def _drone_command(data, command: Callable[[PhysicsEngine], object]):
+    """Run ``command(drone)`` for the payload's drone between two steps.
+
+    Unsharded drones are rows of the fleet the simulation thread steps in
+    bulk, so commands take the sim lock instead of writing mid-step (shards
+    already queue them for the tick boundary). Returns (drone_id, result),
+    or None when the payload names no live drone.
+    """
+    drone_id = data.get('drone_id') if isinstance(data, dict) else None
+    if not drone_id:
+        return None
+    with sim_manager.lock:
+        drone = sim_manager.drones.get(drone_id)
+        if drone is None:
+            return None
+        return drone_id, command(drone)
+
 
 @socketio.on('arm')
 def handle_arm(data):
     """Arm the drone"""
-    drone_id = data.get('drone_id') if isinstance(data, dict) else None
-    if drone_id:
-        drone = sim_manager.get_drone(drone_id)
-        if drone:
-            drone.arm()
-            emit('status', {'message': 'Drone armed', 'drone_id': drone_id})
+    done = _drone_command(data, lambda drone: drone.arm())
+    if done:
+        emit('status', {'message': 'Drone armed', 'drone_id': done[0]})
 
 
 @socketio.on('disarm')
 def handle_disarm(data):
     """Disarm the drone"""
-    drone_id = data.get('drone_id') if isinstance(data, dict) else None
-    if drone_id:
-        drone = sim_manager.get_drone(drone_id)
-        if drone:
-            drone.disarm()
-            emit('status', {'message': 'Drone disarmed', 'drone_id': drone_id})
+    done = _drone_command(data, lambda drone: drone.disarm())
+    if done:
+        emit('status', {'message': 'Drone disarmed', 'drone_id': done[0]})
 
 
 @socketio.on('reset')
 def handle_reset(data):
     """Reset the drone"""
-    drone_id = data.get('drone_id') if isinstance(data, dict) else None
-    if drone_id:
-        drone = sim_manager.get_drone(drone_id)
-        if drone:
-            drone.reset()
-            emit('status', {'message': 'Drone reset', 'drone_id': drone_id})
+    done = _drone_command(data, lambda drone: drone.reset())
+    if done:
+        emit('status', {'message': 'Drone reset', 'drone_id': done[0]})
 
 
 @socketio.on('set_controls')
 def handle_set_controls(data):
-    """Update drone control inputs"""
+    """Queue drone control inputs for the next tick (newest seq wins, older ones are dropped)"""
     drone_id = data.get('drone_id') if isinstance(data, dict) else None
-    if drone_id:
-        drone = sim_manager.get_drone(drone_id)
-        if drone:
-            drone.set_controls(
-                forward=data.get('forward', 0),
-                yaw=data.get('yaw', 0),
-                throttle=data.get('throttle', 0),
-                pitch=data.get('pitch', 0),
-                roll=data.get('roll', 0),
-                yaw_rate=data.get('yaw_rate', 0)
-            )
+    drone = sim_manager.get_drone(drone_id) if isinstance(drone_id, str) else None
+    if drone:
+        try:
+            seq = int(data['seq']) if data.get('seq') is not None else None
+            sim_manager.controls.post(drone.row, data, seq)
+        except (TypeError, ValueError, OverflowError):
+            # Malformed seq or axis values: drop the whole input
+            return
 
 
 @socketio.on('adjust_jam')
 def handle_adjust_jam(data):
     """Adjust GPS jamming level (simulated)"""
-    drone_id = data.get('drone_id') if isinstance(data, dict) else None
-    delta = data.get('delta', 0)
-    if drone_id:
-        drone = sim_manager.get_drone(drone_id)
-        if drone:
-            # Update GPS jam level (clamped 0-100)
-            drone.state.gps_jam = max(0.0, min(100.0, drone.state.gps_jam + delta))
-            emit('jam_changed', {
-                'drone_id': drone_id,
-                'level': drone.state.gps_jam
-            })
+    try:
+        delta = float(data.get('delta', 0)) if isinstance(data, dict) else 0.0
+    except (TypeError, ValueError):
+        return
+    # Update GPS jam level (clamped 0-100)
+    done = _drone_command(data, lambda drone: drone.adjust_jam(delta))
+    if done:
+        emit('jam_changed', {
+            'drone_id': done[0],
+            'level': done[1]
+        })
 
 
 @socketio.on('commander_override')
 def handle_commander_override(data):
     """Commander forces immediate RTB"""
-    drone_id = data.get('drone_id') if isinstance(data, dict) else None
-    if drone_id:
-        drone = sim_manager.get_drone(drone_id)
-        if drone:
-            drone._start_retrograde(commander_override=True)
-            emit('status', {'message': 'COMMANDER OVERRIDE: Forced RTB', 'drone_id': drone_id})
+    done = _drone_command(data, lambda drone: drone._start_retrograde(commander_override=True))
+    if done:
+        emit('status', {'message': 'COMMANDER OVERRIDE: Forced RTB', 'drone_id': done[0]})
 
 
 @socketio.on('log_anchor')
 def handle_log_anchor(data):
     """Log an anchor at current position"""
-    drone_id = data.get('drone_id') if isinstance(data, dict) else None
-    if drone_id:
-        drone = sim_manager.get_drone(drone_id)
-        if drone:
-            success = drone.log_anchor()
-            emit('anchor_logged', {
-                'drone_id': drone_id,
-                'success': success,
-                'position': drone.state.position if success else None
-            })
+    def log(drone):
+        return drone.state.position if drone.log_anchor() else None
+
+    done = _drone_command(data, log)
+    if done:
+        emit('anchor_logged', {
+            'drone_id': done[0],
+            'success': done[1] is not None,
+            'position': done[1]
+        })
 
 
 # ==================== ERROR HANDLERS ====================
@@ -613,4 +1082,8 @@ if __name__ == '__main__':
     print(f"  WARN: {THRESH_WARN}%")
     print(f"  REJECT: {THRESH_REJECT}%")
     print(f"  ABORT: {THRESH_ABORT}%")
-    socketio.run(app, debug=True, host='0.0.0.0', port=5000, allow_unsafe_werkzeug=True)
+    print(f"Async mode: {ASYNC_MODE}")
+    if ASYNC_MODE == 'threading':
+        socketio.run(app, debug=True, host='0.0.0.0', port=5000, allow_unsafe_werkzeug=True)
+    else:
+        socketio.run(app, debug=True, host='0.0.0.0', port=5000)
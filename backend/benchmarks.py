@@ -0,0 +1,485 @@
+"""
+A.E.G.I.S Benchmarks
+Offline benchmarks for the simulation and broadcast hot paths
+
+    python benchmarks.py                  # run, compare against the saved baseline
+    python benchmarks.py --save           # record a new baseline
+    python benchmarks.py --filter tick    # only cases whose name contains 'tick'
+
+Exits non-zero when any case's p50 is slower than baseline by more than --threshold.
+"""
+
+from typing import Callable, Dict, List, Tuple
+import argparse
+import atexit
+import json
+import os
+import platform
+import shutil
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+from physics import FleetEngine, PhysicsEngine
+
+DT = 1.0 / 60.0
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'benchmark_baseline.json')
+FLEET_SIZES = (1, 10, 100, 1000)
+PROXIMITY_SIZES = (1000, 5000, 10000)
+
+# name -> (setup, iterations); setup returns (fn, teardown) or (fn, teardown, between),
+# where the optional ``between`` runs untimed before every call
+CASES: Dict[str, Tuple[Callable[[], tuple], int]] = {}
+
+
+def case(name: str, iterations: int):
+    """Register a benchmark case"""
+    def register(setup):
+        CASES[name] = (setup, iterations)
+        return setup
+    return register
+
+
+def _noop():
+    pass
+
+
+def _scratch_dir() -> str:
+    """Temporary directory for recordings written during a run, removed at exit"""
+    path = tempfile.mkdtemp(prefix='aegis-bench-')
+    atexit.register(shutil.rmtree, path, True)
+    return path
+
+
+def _flying_drone(fleet: FleetEngine = None) -> PhysicsEngine:
+    engine = PhysicsEngine(fleet)
+    engine.arm()
+    engine.set_controls(forward=1.0, yaw=0.3)
+    return engine
+
+
+# ==================== PHYSICS ====================
+
+@case('physics.update.normal', 3000)
+def _physics_normal():
+    engine = _flying_drone()
+    return (lambda: engine.update(DT)), _noop
+
+
+@case('physics.update.retrograde', 3000)
+def _physics_retrograde():
+    engine = _flying_drone()
+    # Far enough out that the return never arrives during the run
+    engine.state.position = (5000.0, 50.0, 5000.0)
+    engine._start_retrograde(commander_override=True)
+    return (lambda: engine.update(DT)), _noop
+
+
+@case('physics.update.disarmed', 3000)
+def _physics_disarmed():
+    engine = PhysicsEngine()
+    return (lambda: engine.update(DT)), _noop
+
+
+# ==================== SIMULATION TICK ====================
+
+def _watched_fleet(n: int):
+    """Global SimulationManager with ``n`` flying drones, all watched by one test client"""
+    # Ticks include flight recording, written somewhere disposable
+    os.environ.setdefault('RECORD_DIR', _scratch_dir())
+    # ...neither restores nor writes the server's fleet checkpoint, and flies over flat ground
+    # instead of building the terrain tiles on import
+    os.environ.setdefault('CHECKPOINT_FILE', '')
+    os.environ.setdefault('TERRAIN_DIR', '')
+    import app as server
+    manager = server.sim_manager
+    existing = set(manager.drones)
+    client = server.socketio.test_client(server.app, auth={})
+    manager.stop_simulation()
+    if manager.simulation_thread is not None:
+        manager.simulation_thread.join()
+    own = (set(manager.drones) - existing).pop()
+    ids = [own] + [f'bench-{i}' for i in range(n - 1)]
+    for drone_id in ids[1:]:
+        manager.add_drone(drone_id)
+    for drone_id in ids:
+        manager.drones[drone_id].arm()
+        manager.drones[drone_id].set_controls(forward=1.0, yaw=0.3)
+    client.emit('subscribe', {'drone_ids': ids})
+    client.get_received()
+
+    def teardown():
+        client.disconnect()
+        for drone_id in ids[1:]:
+            manager.remove_drone(drone_id)
+
+    return server, client, teardown
+
+
+def _tick_case(n: int):
+    def setup():
+        server, client, teardown = _watched_fleet(n)
+
+        def tick():
+            server.sim_manager._step(DT)
+            server.sim_manager._broadcast()
+            client.get_received()
+
+        return tick, teardown
+    return setup
+
+
+for _n in FLEET_SIZES:
+    case(f'tick.step+broadcast.{_n}', max(100, 3000 // _n))(_tick_case(_n))
+
+
+# ==================== PROXIMITY ====================
+
+def _airborne_fleet(n: int) -> FleetEngine:
+    """``n`` armed drones scattered so a few percent sit within separation range"""
+    rng = np.random.default_rng(n)
+    fleet = FleetEngine(n)
+    rows = np.array([fleet.allocate() for _ in range(n)])
+    side = 4.0 * (200.0 * n) ** (1.0 / 3.0)
+    fleet.position[rows] = rng.uniform(0.0, side, (n, 3)) + (10.0, 10.0, 10.0)
+    fleet.rotation[rows, 1] = rng.uniform(-np.pi, np.pi, n)
+    fleet.armed[rows] = True
+    fleet.controls[rows, 0] = 1.0
+    return fleet
+
+
+def _proximity_case(n: int):
+    def setup():
+        fleet = _airborne_fleet(n)
+        return fleet.update_proximity, _noop, lambda: fleet.step(DT)
+    return setup
+
+
+for _n in PROXIMITY_SIZES:
+    case(f'proximity.update.{_n}', max(50, 200000 // _n))(_proximity_case(_n))
+
+
+@case('proximity.query.10000', 3000)
+def _proximity_query():
+    fleet = _airborne_fleet(10000)
+    fleet.update_proximity()
+    rows = iter(np.random.default_rng(0).integers(0, 10000, 1 << 20).tolist())
+    return (lambda: fleet.neighbors(next(rows), 20.0)), _noop
+
+
+# ==================== JAM FIELD ====================
+
+def _jam_field():
+    from jamming import JamField
+    field = JamField()
+    rng = np.random.default_rng(7)
+    for i in range(20):
+        x, z = rng.uniform(-1000.0, 1000.0, 2)
+        field.set_emitter(f'bench-{i}', x, z, rng.uniform(20.0, 90.0), rng.uniform(50.0, 300.0))
+    field.refresh()
+    return field
+
+
+@case('jam.sample.1000', 3000)
+def _jam_sample():
+    fleet = _airborne_fleet(1000)
+    fleet.jam_field = _jam_field()
+    rows = np.arange(1000)
+    return (lambda: fleet.sample_jam(rows)), _noop, lambda: fleet.step(DT)
+
+
+@case('jam.move_emitter', 1000)
+def _jam_move_emitter():
+    field = _jam_field()
+    offsets = iter(np.random.default_rng(8).uniform(-1000.0, 1000.0, (1 << 16, 2)).tolist())
+
+    def move():
+        x, z = next(offsets)
+        field.set_emitter('bench-0', x, z, 80.0, 200.0)
+        field.refresh()
+
+    return move, _noop
+
+
+# ==================== TERRAIN ====================
+
+def _terrain(budget: int = None):
+    from terrain import TERRAIN_BUDGET, Heightfield, build_terrain
+    path = os.path.join(_scratch_dir(), 'terrain')
+    build_terrain(path)
+    return Heightfield(path, TERRAIN_BUDGET if budget is None else budget)
+
+
+@case('terrain.height.1000', 3000)
+def _terrain_height():
+    fleet = _airborne_fleet(1000)
+    terrain = _terrain()
+    position = fleet.position
+    return (lambda: terrain.height(position[:1000, 0], position[:1000, 2])), _noop, lambda: fleet.step(DT)
+
+
+@case('terrain.tile_miss', 1000)
+def _terrain_tile_miss():
+    # A one-tile budget, so every lookup alternates tiles and maps a file
+    terrain = _terrain(budget=1)
+    points = iter([(-200.0, -200.0), (200.0, 200.0)] * (1 << 16))
+
+    def lookup():
+        x, z = next(points)
+        terrain.height(x, z)
+
+    return lookup, _noop
+
+
+# ==================== FLIGHT RECORDER ====================
+
+@case('record.capture.1000', 1000)
+def _record_capture():
+    from recorder import FlightRecorder
+    fleet = FleetEngine(1000)
+    recorder = FlightRecorder(_scratch_dir())
+    for i in range(1000):
+        recorder.open_session(f'bench-{i}', _flying_drone(fleet).row)
+
+    def teardown():
+        recorder.close()
+
+    return (lambda: recorder.capture(fleet)), teardown, lambda: fleet.step(DT)
+
+
+# ==================== SNAPSHOTS ====================
+
+@case('snapshot.build.1000', 3000)
+def _snapshot_build():
+    fleet = _airborne_fleet(1000)
+    drones = {f'bench-{row}': row for row in range(1000)}
+    return (lambda: fleet.snapshot(drones)), _noop, lambda: fleet.step(DT)
+
+
+# ==================== CHECKPOINTS ====================
+
+def _checkpointed_fleet():
+    """1000 drones with breadcrumbs and anchors, every tenth mid-retrograde: (snapshot, return queues)"""
+    fleet = _airborne_fleet(1000)
+    for step in range(300):
+        fleet.step(DT)
+        if step % 60 == 0:
+            for row in range(1000):
+                fleet.add_anchor(row, tuple(fleet.position[row].tolist()))
+    for row in range(0, 1000, 10):
+        fleet.start_retrograde(row, commander_override=True)
+    queues = {row: list(fleet.doctrine[row].return_queue) for row in range(1000) if fleet.doctrine[row].return_queue}
+    return fleet.snapshot({f'bench-{row}': row for row in range(1000)}), queues
+
+
+@case('checkpoint.encode.1000', 300)
+def _checkpoint_encode():
+    from checkpoint import encode
+    snapshot, queues = _checkpointed_fleet()
+    return (lambda: encode(snapshot, queues)), _noop
+
+
+@case('checkpoint.restore.1000', 100)
+def _checkpoint_restore():
+    from checkpoint import Checkpoint, encode
+    from physics import BreadcrumbRing
+    data = encode(*_checkpointed_fleet())
+
+    def restore():
+        checkpoint = Checkpoint(data)
+        fleet = FleetEngine(len(checkpoint))
+        rows = [fleet.allocate() for _ in range(len(checkpoint))]
+        for index, row in enumerate(rows):
+            fleet.doctrine[row] = checkpoint.doctrine(index, BreadcrumbRing(fleet, row))
+        checkpoint.apply(fleet, rows)
+
+    return restore, _noop
+
+
+# ==================== CONTROL INPUTS ====================
+
+@case('controls.apply.1000', 3000)
+def _controls_apply():
+    from controls import ControlMailbox
+    fleet = _airborne_fleet(1000)
+    mailbox = ControlMailbox()
+    inputs = {'forward': 1.0, 'yaw': -0.5, 'throttle': 0.7}
+
+    def post_all():
+        for row in range(1000):
+            mailbox.post(row, inputs)
+
+    return (lambda: mailbox.apply(fleet.controls)), _noop, post_all
+
+
+# ==================== SERIALIZATION ====================
+
+@case('serialize.state_json', 3000)
+def _serialize_state_json():
+    engine = _flying_drone()
+    for _ in range(120):
+        engine.update(DT)
+
+    latest = []
+
+    def serialize():
+        # One drone of GET /api/drones: the published snapshot's state view to JSON
+        snapshot = latest[0]
+        json.dumps({drone_id: snapshot.state(row).to_dict() for drone_id, row in snapshot.drones.items()})
+
+    def advance():
+        engine.update(DT)
+        latest[:] = [engine.fleet.snapshot({'bench': engine.row})]
+
+    return serialize, _noop, advance
+
+
+@case('serialize.legacy_json', 3000)
+def _serialize_legacy_json():
+    engine = _flying_drone()
+    for _ in range(120):
+        engine.update(DT)
+    engine.log_anchor()
+
+    def serialize():
+        # The JSON drone_update payload the binary frames replaced
+        doctrine = engine.doctrine
+        json.dumps({
+            'drone_id': 'bench',
+            'state': engine.state.to_dict(),
+            'doctrine': {
+                'breadcrumbs': doctrine.breadcrumbs[-50:],
+                'anchors': doctrine.anchors,
+                'target_point': doctrine.target_point,
+                'return_queue_length': len(doctrine.return_queue)
+            },
+            'controls': engine.control_inputs
+        })
+
+    return serialize, _noop, lambda: engine.update(DT)
+
+
+@case('serialize.frame', 3000)
+def _serialize_frame():
+    from telemetry import TelemetryEncoder
+    engine = _flying_drone()
+    encoder = TelemetryEncoder(engine.fleet)
+    rows, ids = [engine.row], ['bench']
+
+    def serialize():
+        encoder.encode(rows, ids)
+
+    return serialize, _noop, lambda: engine.update(DT)
+
+
+@case('serialize.fleet_frame.1000', 3000)
+def _serialize_fleet_frame():
+    import uuid
+    from telemetry import FleetFrameEncoder
+    fleet = _airborne_fleet(1000)
+    encoder = FleetFrameEncoder()
+    rows, ids = list(range(1000)), [str(uuid.uuid4()) for _ in range(1000)]
+    return (lambda: encoder.encode(fleet, rows, ids)), _noop, lambda: fleet.step(DT)
+
+
+# ==================== SOCKET.IO EMIT ====================
+
+@case('emit.test_client.100', 500)
+def _emit_test_client():
+    server, client, teardown = _watched_fleet(100)
+
+    def emit():
+        server.sim_manager._broadcast()
+        client.get_received()
+
+    return emit, teardown
+
+
+# ==================== RUNNER ====================
+
+def measure(name: str, scale: float = 1.0, warmup: int = 50) -> Dict[str, float]:
+    """Time each call of a case and summarise it"""
+    setup, iterations = CASES[name]
+    fn, teardown, *rest = setup()
+    between = rest[0] if rest else _noop
+    try:
+        for _ in range(warmup):
+            between()
+            fn()
+        samples = np.empty(max(10, int(iterations * scale)), dtype=np.int64)
+        clock = time.perf_counter_ns
+        for i in range(samples.size):
+            between()
+            start = clock()
+            fn()
+            samples[i] = clock() - start
+    finally:
+        teardown()
+    micros = samples / 1000.0
+    return {
+        'iterations': int(samples.size),
+        'ops_per_sec': float(1e6 / micros.mean()),
+        'mean_us': float(micros.mean()),
+        'p50_us': float(np.percentile(micros, 50)),
+        'p99_us': float(np.percentile(micros, 99)),
+    }
+
+
+def compare(results: Dict[str, Dict], baseline: Dict[str, Dict], threshold: float) -> List[str]:
+    """Names of cases whose p50 regressed beyond ``threshold`` (a fraction)"""
+    regressions = []
+    for name, result in results.items():
+        base = baseline.get(name)
+        if base and result['p50_us'] > base['p50_us'] * (1.0 + threshold):
+            regressions.append(name)
+    return regressions
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description='A.E.G.I.S hot-path benchmarks')
+    parser.add_argument('--filter', default='', help='Only run cases containing this substring')
+    parser.add_argument('--scale', type=float, default=1.0, help='Iteration multiplier')
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE, help='Baseline JSON path')
+    parser.add_argument('--save', action='store_true', help='Write results as the new baseline')
+    parser.add_argument('--threshold', type=float, default=0.25, help='Allowed p50 slowdown (0.25 = 25%%)')
+    args = parser.parse_args(argv)
+
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baseline = json.load(f).get('cases', {})
+
+    results = {}
+    print(f"{'case':<30} {'ops/s':>12} {'p50 us':>10} {'p99 us':>10} {'vs base':>9}")
+    for name in CASES:
+        if args.filter not in name:
+            continue
+        result = results[name] = measure(name, args.scale)
+        base = baseline.get(name)
+        delta = f"{100.0 * (result['p50_us'] / base['p50_us'] - 1.0):+8.1f}%" if base else '        -'
+        print(f"{name:<30} {result['ops_per_sec']:>12.0f} {result['p50_us']:>10.1f} "
+              f"{result['p99_us']:>10.1f} {delta}")
+
+    if args.save:
+        with open(args.baseline, 'w') as f:
+            json.dump({
+                'python': platform.python_version(),
+                'numpy': np.__version__,
+                'machine': platform.machine(),
+                'created': time.time(),
+                'cases': {**baseline, **results},
+            }, f, indent=2)
+        print(f'Baseline saved -> {args.baseline}')
+        return 0
+
+    regressions = compare(results, baseline, args.threshold)
+    if regressions:
+        print(f"REGRESSION (> {args.threshold:.0%} slower p50): {', '.join(regressions)}")
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
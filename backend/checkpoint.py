@@ -0,0 +1,290 @@
+"""
+A.E.G.I.S Fleet Checkpoints
+Periodic whole-fleet snapshots on disk, restored when the server starts.
+
+A checkpoint is one file:
+
+    header      MAGIC, version, length of the JSON block that follows
+    JSON        tick, sim time, fleet counters and the record layout
+    records     one record per drone: its ID and every FleetEngine array row
+    anchors     each drone's verified anchors, in record order       (float64 x 3)
+    queues      each drone's remaining retrograde waypoints           (float64 x 3)
+    breadcrumbs each drone's retained breadcrumbs, oldest first       (float32 x 3)
+
+Records carry the count of each drone's anchors, waypoints and breadcrumbs, so
+the ragged sections are read with a cumulative sum. The record layout is
+derived from the FleetEngine field lists and written into the file. Restore
+copies the fields both layouts share, so adding a fleet array never
+invalidates older checkpoints.
+
+The simulation thread never serializes. FleetSnapshot already copies the
+fleet every tick. A checkpoint hands that snapshot and the few live return
+queues to a background writer, which encodes it and swaps it into place with
+``os.replace``. A crash mid-write leaves the previous checkpoint intact. If
+the writer is still busy when the next checkpoint is due, that one is
+skipped and counted.
+"""
+
+from collections import deque
+from typing import Dict, List, Optional, Sequence, Tuple
+import json
+import os
+import struct
+import threading
+import time
+
+import numpy as np
+
+from physics import BREADCRUMB_CAPACITY, BreadcrumbRing, DoctrineData, FleetEngine, FleetSnapshot
+from recorder import offload
+
+CHECKPOINT_VERSION = 1
+CHECKPOINT_INTERVAL = 5.0    # Seconds between checkpoints
+DRONE_ID_BYTES = 64
+
+MAGIC = b'AEGISCKP'
+HEADER = struct.Struct('<8sHI')   # magic, version, JSON length
+
+Point = Tuple[float, float, float]
+
+# Fleet arrays saved per drone; 'active' is implied by being in the file
+_FIELDS = (FleetEngine._VEC3_FIELDS + FleetEngine._SCALAR_FIELDS
+           + tuple(name for name in FleetEngine._FLAG_FIELDS if name != 'active')
+           + FleetEngine._CODE_FIELDS + FleetEngine._SEQ_FIELDS + ('controls',))
+
+
+def record_dtype(fleet: FleetEngine) -> np.dtype:
+    """Checkpoint record layout for ``fleet``: drone ID, ragged counts and every saved array"""
+    fields = [('drone_id', f'S{DRONE_ID_BYTES}'),
+              ('anchor_count', '<i8'), ('queue_count', '<i8'), ('breadcrumb_count', '<i8')]
+    for name in _FIELDS:
+        arr = getattr(fleet, name)
+        fields.append((name, arr.dtype.newbyteorder('<').str, arr.shape[1:]))
+    return np.dtype(fields)
+
+
+def _layout(dtype: np.dtype) -> List:
+    """JSON-safe description of a record dtype"""
+    return [[name, dtype[name].base.str, list(dtype[name].shape)] for name in dtype.names]
+
+
+def _dtype(layout: List) -> np.dtype:
+    return np.dtype([(name, base, tuple(shape)) for name, base, shape in layout])
+
+
+def _breadcrumb_range(snapshot: FleetSnapshot, rows: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """First retained sequence number and count of retained breadcrumbs, per row"""
+    seq = snapshot.breadcrumb_seq[rows]
+    first = np.maximum(snapshot.breadcrumb_start[rows], seq - BREADCRUMB_CAPACITY)
+    return first, seq - first
+
+
+def encode(snapshot: FleetSnapshot, return_queues: Dict[int, Sequence[Point]]) -> bytes:
+    """Serialize every drone in ``snapshot``; ``return_queues`` maps row -> remaining waypoints"""
+    ids = list(snapshot.drones)
+    rows = np.array([snapshot.drones[drone_id] for drone_id in ids], dtype=np.int64)
+    dtype = record_dtype(snapshot)
+    records = np.zeros(len(ids), dtype=dtype)
+    records['drone_id'] = [drone_id.encode()[:DRONE_ID_BYTES] for drone_id in ids]
+    for name in _FIELDS:
+        records[name] = getattr(snapshot, name)[rows]
+
+    anchors = [snapshot.doctrine[row].anchors_since(0) for row in rows.tolist()]
+    queues = [list(return_queues.get(row, ())) for row in rows.tolist()]
+    records['anchor_count'] = [len(points) for points in anchors]
+    records['queue_count'] = [len(points) for points in queues]
+
+    # Breadcrumbs come from the snapshot's copy of the ring, oldest first
+    first, count = _breadcrumb_range(snapshot, rows)
+    records['breadcrumb_count'] = count
+    seqs = np.repeat(first - np.cumsum(count) + count, count) + np.arange(int(count.sum()))
+    breadcrumbs = snapshot.breadcrumbs[np.repeat(rows, count), seqs % BREADCRUMB_CAPACITY]
+
+    meta = json.dumps({
+        'tick': snapshot.tick,
+        'sim_time': snapshot.sim_time,
+        'written_at': time.time(),
+        'count': len(ids),
+        'retrograde_triggers': dict(snapshot.retrograde_triggers),
+        'proximity_events': dict(snapshot.proximity_events),
+        'layout': _layout(dtype),
+    }).encode()
+    flat_anchors = [p for points in anchors for p in points]
+    flat_queues = [p for points in queues for p in points]
+    return b''.join((
+        HEADER.pack(MAGIC, CHECKPOINT_VERSION, len(meta)),
+        meta,
+        records.tobytes(),
+        np.asarray(flat_anchors, dtype='<f8').reshape(-1, 3).tobytes(),
+        np.asarray(flat_queues, dtype='<f8').reshape(-1, 3).tobytes(),
+        np.ascontiguousarray(breadcrumbs, dtype='<f4').tobytes(),
+    ))
+
+
+def write_checkpoint(path: str, snapshot: FleetSnapshot, return_queues: Dict[int, Sequence[Point]]) -> int:
+    """Write a checkpoint atomically (temp file + rename); returns its size in bytes"""
+    data = encode(snapshot, return_queues)
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    partial = f'{path}.tmp'
+    with open(partial, 'wb') as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(partial, path)
+    return len(data)
+
+
+class Checkpoint:
+    """A checkpoint file read back into arrays"""
+
+    def __init__(self, data: bytes):
+        magic, version, meta_len = HEADER.unpack_from(data)
+        if magic != MAGIC:
+            raise ValueError('Not an A.E.G.I.S checkpoint')
+        if version != CHECKPOINT_VERSION:
+            raise ValueError(f'Unsupported checkpoint version {version}')
+        offset = HEADER.size
+        meta = json.loads(data[offset:offset + meta_len])
+        offset += meta_len
+        self.tick: int = meta['tick']
+        self.sim_time: float = meta['sim_time']
+        self.written_at: float = meta['written_at']
+        self.retrograde_triggers: Dict[str, int] = meta['retrograde_triggers']
+        self.proximity_events: Dict[str, int] = meta['proximity_events']
+
+        dtype = _dtype(meta['layout'])
+        self.records = np.frombuffer(data, dtype=dtype, count=meta['count'], offset=offset)
+        offset += self.records.nbytes
+        sections = []
+        for name, item in (('anchor_count', '<f8'), ('queue_count', '<f8'), ('breadcrumb_count', '<f4')):
+            total = int(self.records[name].sum())
+            sections.append(np.frombuffer(data, dtype=item, count=total * 3, offset=offset).reshape(total, 3))
+            offset += sections[-1].nbytes
+        self.anchors, self.queues, self.breadcrumbs = sections
+        self._anchor_start = np.cumsum(self.records['anchor_count']) - self.records['anchor_count']
+        self._queue_start = np.cumsum(self.records['queue_count']) - self.records['queue_count']
+        self.drone_ids: List[str] = [raw.decode() for raw in self.records['drone_id'].tolist()]
+
+    @classmethod
+    def load(cls, path: str) -> 'Checkpoint':
+        with open(path, 'rb') as f:
+            return cls(f.read())
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+    def doctrine(self, index: int, breadcrumbs: Optional[BreadcrumbRing]) -> DoctrineData:
+        """Fresh DoctrineData for the ``index``-th drone; its anchor graph is rebuilt on first use"""
+        record = self.records[index]
+        start = int(self._anchor_start[index])
+        anchors = [tuple(point) for point in self.anchors[start:start + int(record['anchor_count'])].tolist()]
+        start = int(self._queue_start[index])
+        queue = self.queues[start:start + int(record['queue_count'])].tolist()
+        doctrine = DoctrineData(breadcrumbs, anchors=anchors, anchor_base=int(record['anchor_base']))
+        doctrine.graph.defer(anchors)
+        if queue:
+            doctrine.return_queue = deque(tuple(point) for point in queue)
+        if record['has_target']:
+            doctrine.target_point = tuple(record['target'].tolist())
+        return doctrine
+
+    def apply(self, fleet: FleetEngine, rows: Sequence[int]):
+        """Copy every drone's arrays and breadcrumbs into already allocated ``rows``, in record order"""
+        rows = np.asarray(rows, dtype=np.int64)
+        for name in _FIELDS:
+            if name in self.records.dtype.names:
+                getattr(fleet, name)[rows] = self.records[name]
+        fleet.anchor_seq[rows] = self.records['anchor_base'] + self.records['anchor_count']
+        count = self.records['breadcrumb_count']
+        first = self.records['breadcrumb_seq'] - count
+        seqs = np.repeat(first - np.cumsum(count) + count, count) + np.arange(int(count.sum()))
+        fleet.breadcrumbs[np.repeat(rows, count), seqs % BREADCRUMB_CAPACITY] = self.breadcrumbs
+        fleet.sim_time = max(fleet.sim_time, self.sim_time)
+        fleet.tick = max(fleet.tick, self.tick)
+        # Saved totals already count every drone, including ones restored and later reclaimed
+        for cause, total in self.retrograde_triggers.items():
+            if cause in fleet.retrograde_triggers:
+                fleet.retrograde_triggers[cause] = total
+        for kind, total in self.proximity_events.items():
+            if kind in fleet.proximity_events:
+                fleet.proximity_events[kind] = total
+
+
+class Checkpointer:
+    """Writes the snapshots handed to ``submit`` to ``path`` on a background thread"""
+
+    def __init__(self, path: str, interval: float = CHECKPOINT_INTERVAL):
+        self.path = path
+        self.interval = interval
+        self._next = time.monotonic() + interval
+        self._pending: Optional[Tuple[FleetSnapshot, Dict[int, Sequence[Point]]]] = None
+        self._wake = threading.Condition()
+        self._closed = False
+        # Accounting
+        self.written = 0
+        self.skipped = 0
+        self.failed = 0
+        self.last_bytes = 0
+        self.last_seconds = 0.0
+        self.last_written_at = 0.0
+        self._thread = threading.Thread(target=self._run, name='aegis-checkpoint', daemon=True)
+        self._thread.start()
+
+    def due(self) -> bool:
+        """True once per interval; the caller then captures and submits"""
+        now = time.monotonic()
+        if now < self._next:
+            return False
+        self._next = now + self.interval
+        return True
+
+    def submit(self, snapshot: FleetSnapshot, return_queues: Dict[int, Sequence[Point]]):
+        """Queue a snapshot for writing; skipped if the previous one is still being written"""
+        with self._wake:
+            if self._pending is not None:
+                self.skipped += 1
+                return
+            self._pending = (snapshot, return_queues)
+            self._wake.notify_all()
+
+    def write(self, snapshot: FleetSnapshot, return_queues: Dict[int, Sequence[Point]]):
+        """Write one checkpoint on the calling thread"""
+        started = time.perf_counter()
+        try:
+            self.last_bytes = offload(write_checkpoint, self.path, snapshot, return_queues)
+        except Exception as e:
+            # Any failure only costs this checkpoint; the writer thread and close() must survive it
+            self.failed += 1
+            print(f'Checkpoint to {self.path} failed: {e!r}')
+            return
+        self.last_seconds = time.perf_counter() - started
+        self.last_written_at = time.time()
+        self.written += 1
+
+    def _run(self):
+        while True:
+            with self._wake:
+                while self._pending is None and not self._closed:
+                    self._wake.wait()
+                if self._pending is None:
+                    return
+                snapshot, return_queues = self._pending
+            try:
+                self.write(snapshot, return_queues)
+            finally:
+                with self._wake:
+                    self._pending = None
+                    self._wake.notify_all()
+
+    def close(self, final: Optional[Tuple[FleetSnapshot, Dict[int, Sequence[Point]]]] = None):
+        """Finish any queued write, then write ``final`` (snapshot, return queues) if given"""
+        with self._wake:
+            while self._pending is not None:
+                self._wake.wait()
+            self._closed = True
+            self._wake.notify_all()
+        self._thread.join()
+        if final is not None:
+            self.write(*final)
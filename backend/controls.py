@@ -0,0 +1,90 @@
+"""
+A.E.G.I.S Control Mailbox
+Latest-value control inputs, applied to the whole fleet at the tick boundary
+
+Socket handlers never touch ``FleetEngine.controls`` directly. Each
+``set_controls`` event is posted to a per-row slot that keeps only the
+newest input, so a burst of keyboard events between two ticks costs one
+write. The simulation thread swaps out every pending slot once per step
+and applies them as a single clipped array assignment under the sim lock.
+Inputs carry a client sequence number. Anything older than the last
+accepted input for that row is dropped, whatever order the transport
+delivers it in.
+"""
+
+from typing import Dict, List, Mapping, Optional, Tuple
+import math
+import threading
+import time
+
+import numpy as np
+
+from physics import CONTROL_KEYS
+
+
+class ControlMailbox:
+    """One latest-value slot per fleet row.
+
+    ``post`` runs on socket handler threads and only takes the mailbox's
+    own short lock. ``apply`` runs on the simulation thread at the start of
+    each step and returns how long each applied input waited after it was
+    received.
+    """
+
+    def __init__(self, clock=time.perf_counter):
+        self.clock = clock
+        self._lock = threading.Lock()
+        self._pending: Dict[int, Tuple[List[float], float]] = {}  # row -> (controls, received at)
+        self._last_seq: Dict[int, int] = {}                        # row -> newest accepted sequence
+
+        # Accounting
+        self.accepted = 0    # Inputs that became the newest for their row
+        self.coalesced = 0   # Accepted inputs replaced by a newer one before any tick applied them
+        self.stale = 0       # Inputs dropped for an old sequence number
+        self.applied = 0     # Inputs written into the fleet
+
+    def __len__(self) -> int:
+        return len(self._pending)
+
+    def post(self, row: int, controls: Mapping[str, float], seq: Optional[int] = None) -> bool:
+        """Queue ``controls`` for ``row``; missing axes are zero. Returns False if stale.
+
+        Without ``seq`` inputs are taken in arrival order. Raises ValueError (or
+        TypeError) for an axis that is not a finite number; nothing is queued then.
+        """
+        values = [float(controls.get(key, 0.0)) for key in CONTROL_KEYS]
+        if not all(map(math.isfinite, values)):
+            raise ValueError(f'Control inputs must be finite: {values}')
+        received = self.clock()
+        with self._lock:
+            last = self._last_seq.get(row, -1)
+            if seq is None:
+                seq = last + 1
+            elif seq <= last:
+                self.stale += 1
+                return False
+            self._last_seq[row] = seq
+            if row in self._pending:
+                self.coalesced += 1
+            self._pending[row] = (values, received)
+            self.accepted += 1
+        return True
+
+    def forget(self, row: int):
+        """Drop a released row's pending input and sequence (the row will be reused)"""
+        with self._lock:
+            self._pending.pop(row, None)
+            self._last_seq.pop(row, None)
+
+    def apply(self, controls: np.ndarray) -> np.ndarray:
+        """Write every pending input into ``controls``; returns input-to-effect seconds"""
+        with self._lock:
+            if not self._pending:
+                return np.zeros(0)
+            pending, self._pending = self._pending, {}
+        rows = np.fromiter(pending.keys(), dtype=np.int64, count=len(pending))
+        values, received = zip(*pending.values())
+        received = np.array(received)
+        controls[rows] = np.clip(np.array(values), -1.0, 1.0)
+        self.applied += len(rows)
+        return self.clock() - received
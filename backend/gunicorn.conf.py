@@ -0,0 +1,33 @@
+"""
+A.E.G.I.S Production Launcher
+Gunicorn config for the cooperative (eventlet) server mode
+
+    cd backend
+    gunicorn -c gunicorn.conf.py app:app
+
+Each socket is a green thread rather than an OS thread, so one process holds
+thousands of operator connections. The simulation loop runs as a background
+task in the same event loop.
+"""
+
+import os
+
+# app.py selects its async mode from this before importing Flask
+os.environ.setdefault('ASYNC_MODE', 'eventlet')
+
+bind = os.environ.get('BIND', f"0.0.0.0:{os.environ.get('PORT', 5000)}")
+worker_class = 'eventlet'
+
+# The fleet lives in process memory, so exactly one worker owns it. Scale
+# connections with worker_connections, not workers.
+workers = 1
+worker_connections = int(os.environ.get('WORKER_CONNECTIONS', 10000))
+
+# WebSockets are long-lived; the heartbeat is Socket.IO's ping, not gunicorn's
+timeout = int(os.environ.get('WORKER_TIMEOUT', 120))
+graceful_timeout = 10
+keepalive = 5
+
+accesslog = os.environ.get('ACCESS_LOG')  # e.g. '-' for stdout; off by default
+errorlog = '-'
+loglevel = os.environ.get('LOG_LEVEL', 'info')
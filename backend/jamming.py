@@ -0,0 +1,188 @@
+"""
+A.E.G.I.S GPS-Jam Field
+Jamming emitters on the ground plane, rasterized once and sampled per tick.
+
+Each emitter jams at ``power`` (0-100) at its centre, fading to nothing at
+``range`` metres: ``power * (1 - d / range) ** falloff``. Overlapping
+emitters add up, saturating at 100. Their sum is kept as a float32 raster of
+ground nodes every ``cell`` metres, split into square tiles. Adding, moving
+or removing an emitter only marks the tiles its footprint touches, and those
+tiles are recomputed on the next sample. Drones read the field with one
+vectorized bilinear lookup over the whole fleet, so geography reaches the
+doctrine thresholds without per-drone Python.
+"""
+
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Set, Tuple
+import threading
+
+import numpy as np
+
+JAM_EXTENT = 2560.0     # Metres covered along x and z, centred on the origin
+JAM_CELL = 5.0          # Metres between raster nodes
+JAM_TILE = 32           # Nodes per tile side
+JAM_MAX = 100.0
+
+
+@dataclass(frozen=True)
+class JamEmitter:
+    """One jamming source on the ground plane"""
+    emitter_id: str
+    x: float
+    z: float
+    power: float             # Jam level (0-100) at the emitter
+    range: float             # Metres at which the level reaches zero
+    falloff: float = 1.0     # 1 = linear fade; higher concentrates the jam near the centre
+
+    def to_dict(self) -> Dict:
+        return {'id': self.emitter_id, 'x': self.x, 'z': self.z, 'power': self.power,
+                'range': self.range, 'falloff': self.falloff}
+
+
+class JamField:
+    """Tiled raster of summed emitter jam levels.
+
+    Edits come from request threads and sampling from the simulation thread,
+    so both take the field's own lock; a sample never sees a half-built tile.
+    Outside the raster the field is zero.
+    """
+
+    def __init__(self, extent: float = JAM_EXTENT, cell: float = JAM_CELL, tile: int = JAM_TILE):
+        self.cell = float(cell)
+        self.tile = int(tile)
+        self.cells = int(np.ceil(extent / self.cell))          # Cells per side
+        self.origin = -self.cells * self.cell / 2.0             # World x / z of node 0
+        self.levels = np.zeros((self.cells + 1, self.cells + 1), dtype=np.float32)  # [z node, x node]
+        self.tiles = -(-(self.cells + 1) // self.tile)          # Tiles per side
+        self.emitters: Dict[str, JamEmitter] = {}
+        self.version = 0                                        # Bumped on every emitter change
+        self._dirty: Set[Tuple[int, int]] = set()               # (tile z, tile x) awaiting rebuild
+        self._lock = threading.Lock()
+        # Accounting
+        self.tiles_rebuilt = 0
+
+    def __len__(self) -> int:
+        return len(self.emitters)
+
+    # ---------- emitters ----------
+
+    def set_emitter(self, emitter_id: str, x: float, z: float, power: float, range: float,
+                    falloff: float = 1.0) -> JamEmitter:
+        """Add or replace an emitter; both its old and new footprints are invalidated"""
+        if range <= 0 or falloff <= 0:
+            raise ValueError('Emitter range and falloff must be positive')
+        emitter = JamEmitter(emitter_id, float(x), float(z), min(JAM_MAX, max(0.0, float(power))),
+                             float(range), float(falloff))
+        with self._lock:
+            previous = self.emitters.get(emitter_id)
+            if previous is not None:
+                self._invalidate(previous)
+            self.emitters[emitter_id] = emitter
+            self._invalidate(emitter)
+            self.version += 1
+        return emitter
+
+    def remove_emitter(self, emitter_id: str) -> bool:
+        with self._lock:
+            emitter = self.emitters.pop(emitter_id, None)
+            if emitter is None:
+                return False
+            self._invalidate(emitter)
+            self.version += 1
+        return True
+
+    def clear(self):
+        with self._lock:
+            for emitter in self.emitters.values():
+                self._invalidate(emitter)
+            self.emitters.clear()
+            self.version += 1
+
+    def _tile_span(self, low: float, high: float) -> range:
+        """Tiles along one axis holding nodes between world coordinates ``low`` and ``high``"""
+        first = int(np.floor((low - self.origin) / self.cell))
+        last = int(np.ceil((high - self.origin) / self.cell))
+        first, last = max(first, 0), min(last, self.cells)
+        if first > last:
+            return range(0)
+        return range(first // self.tile, last // self.tile + 1)
+
+    def _invalidate(self, emitter: JamEmitter):
+        for tz in self._tile_span(emitter.z - emitter.range, emitter.z + emitter.range):
+            for tx in self._tile_span(emitter.x - emitter.range, emitter.x + emitter.range):
+                self._dirty.add((tz, tx))
+
+    # ---------- raster ----------
+
+    def _rebuild(self):
+        """Recompute every dirty tile from the emitters whose footprint reaches it"""
+        emitters = list(self.emitters.values())
+        for tz, tx in self._dirty:
+            z0, x0 = tz * self.tile, tx * self.tile
+            z1, x1 = min(z0 + self.tile, self.cells + 1), min(x0 + self.tile, self.cells + 1)
+            zs = self.origin + np.arange(z0, z1) * self.cell
+            xs = self.origin + np.arange(x0, x1) * self.cell
+            block = np.zeros((z1 - z0, x1 - x0), dtype=np.float64)
+            for e in emitters:
+                if (e.x + e.range < xs[0] or e.x - e.range > xs[-1]
+                        or e.z + e.range < zs[0] or e.z - e.range > zs[-1]):
+                    continue
+                distance = np.hypot(xs[None, :] - e.x, zs[:, None] - e.z)
+                block += e.power * np.clip(1.0 - distance / e.range, 0.0, 1.0) ** e.falloff
+            self.levels[z0:z1, x0:x1] = np.minimum(block, JAM_MAX)
+        self.tiles_rebuilt += len(self._dirty)
+        self._dirty.clear()
+
+    def refresh(self):
+        """Rebuild invalidated tiles now (sampling does this on its own)"""
+        with self._lock:
+            if self._dirty:
+                self._rebuild()
+
+    def sample(self, x: np.ndarray, z: np.ndarray) -> np.ndarray:
+        """Bilinear jam level at each (x, z) ground point"""
+        x = np.asarray(x, dtype=np.float64)
+        z = np.asarray(z, dtype=np.float64)
+        gx = (x - self.origin) / self.cell
+        gz = (z - self.origin) / self.cell
+        inside = (gx >= 0) & (gx <= self.cells) & (gz >= 0) & (gz <= self.cells)
+        # Nodes i and i + 1 must both exist, so the far edge uses the last cell with fraction 1
+        ix = np.clip(np.floor(gx), 0, self.cells - 1).astype(np.int64)
+        iz = np.clip(np.floor(gz), 0, self.cells - 1).astype(np.int64)
+        fx = np.clip(gx - ix, 0.0, 1.0)
+        fz = np.clip(gz - iz, 0.0, 1.0)
+        with self._lock:
+            if self._dirty:
+                self._rebuild()
+            levels = self.levels
+            top = levels[iz, ix] * (1.0 - fx) + levels[iz, ix + 1] * fx
+            bottom = levels[iz + 1, ix] * (1.0 - fx) + levels[iz + 1, ix + 1] * fx
+        return np.where(inside, top * (1.0 - fz) + bottom * fz, 0.0)
+
+    def describe(self) -> Dict:
+        """Raster geometry and emitters, for the API"""
+        with self._lock:
+            emitters: List[Dict] = [e.to_dict() for e in self.emitters.values()]
+            dirty = len(self._dirty)
+        return {
+            'origin': self.origin,
+            'cell': self.cell,
+            'cells': self.cells,
+            'tile': self.tile,
+            'version': self.version,
+            'dirty_tiles': dirty,
+            'emitters': emitters,
+        }
+
+
+def field_from_spec(spec: Optional[str]) -> Optional[JamField]:
+    """Build a field from ``x,z,power,range[,falloff]`` emitters separated by ';' (JAM_EMITTERS)"""
+    if not spec:
+        return None
+    field = JamField()
+    for index, entry in enumerate(part for part in spec.split(';') if part.strip()):
+        values = [float(v) for v in entry.split(',')]
+        if len(values) not in (4, 5):
+            raise ValueError(f'JAM_EMITTERS entry needs x,z,power,range[,falloff]: {entry!r}')
+        field.set_emitter(f'emitter-{index}', *values)
+    return field
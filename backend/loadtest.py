@@ -0,0 +1,506 @@
+"""
+A.E.G.I.S Load Test
+Simulates N operator clients against a running server and measures end-to-end latency
+
+    python loadtest.py --clients 50 --duration 30                # against http://localhost:5000
+    python loadtest.py --clients 200 --out run.json              # keep the report
+    python loadtest.py --clients 200 --baseline run.json         # compare with an earlier run
+
+Every client is a real Socket.IO connection: it goes through ``handle_connect``,
+waits for ``drone_created``, arms its drone and then replays operator traffic
+(``set_controls`` at joystick rate, occasional ``adjust_jam``, ``log_anchor`` and
+``commander_override``) from a seeded script, so runs with the same arguments
+send the same inputs. Binary ``drone_update`` frames are decoded with
+``TelemetryDecoder``, answering keyframe and doctrine resync requests like the
+browser does.
+
+Measured:
+  input-to-telemetry  set_controls sent -> first decoded frame echoing those controls
+  ack round trip      emit -> Socket.IO acknowledgement, per event
+  frames              rate, bytes, sequence gaps (dropped) and late frames; a frame is
+                      late when it arrives more than --late-ms behind the earliest
+                      transit seen on that socket, judged by the sim clock it carries
+  server              CPU, ticks, scheduler overruns and frame counters from /api/metrics
+
+Needs the Socket.IO client transport: pip install "python-socketio[client]".
+Exits non-zero when the input-to-telemetry p50/p99 or server CPU per client is worse
+than the baseline by more than --threshold.
+"""
+
+from collections import Counter, deque
+from typing import Deque, Dict, List, Optional, Tuple
+import argparse
+import json
+import platform
+import random
+import re
+import sys
+import threading
+import time
+import urllib.request
+
+import numpy as np
+import socketio
+
+from physics import CONTROL_KEYS
+from telemetry import CONTROL_SCALE, TelemetryDecoder
+
+try:
+    import websocket  # websocket-client, the transport socketio.Client uses
+except ImportError:
+    websocket = None
+
+ACK_EVENTS = ('set_controls', 'adjust_jam', 'log_anchor', 'commander_override', 'arm')
+PENDING_TIMEOUT = 5.0       # Seconds before an unechoed control input counts as lost
+RESYNC_INTERVAL = 0.5       # Minimum seconds between keyframe requests from one client
+REARM_INTERVAL = 2.0        # Minimum seconds between re-arm attempts after a landing
+
+_SAMPLE = re.compile(r'^([a-zA-Z_:][a-zA-Z0-9_:]*(?:\{[^}]*\})?)\s+(\S+)$')
+
+
+def _percentiles(values: List[float]) -> Dict[str, float]:
+    """Count and p50/p90/p99/max of samples given in seconds, reported in milliseconds"""
+    if not values:
+        return {'count': 0}
+    ms = np.asarray(values) * 1000.0
+    return {
+        'count': int(ms.size),
+        'p50_ms': float(np.percentile(ms, 50)),
+        'p90_ms': float(np.percentile(ms, 90)),
+        'p99_ms': float(np.percentile(ms, 99)),
+        'max_ms': float(ms.max()),
+    }
+
+
+def scrape(url: str, prefix: str = 'aegis_') -> Optional[Dict[str, float]]:
+    """Samples from /api/metrics keyed by ``name{labels}`` without ``prefix``; None if unreachable"""
+    try:
+        with urllib.request.urlopen(url.rstrip('/') + '/api/metrics', timeout=5) as response:
+            text = response.read().decode('utf-8')
+    except OSError:
+        return None
+    samples = {}
+    for line in text.splitlines():
+        match = _SAMPLE.match(line)
+        if match and not line.startswith('#'):
+            name = match.group(1)
+            samples[name[len(prefix):] if name.startswith(prefix) else name] = float(match.group(2).replace('+Inf', 'inf'))
+    return samples
+
+
+class Operator:
+    """One simulated operator: a socket, its drone and the inputs awaiting an echo.
+
+    The driver thread sends and the socket's reader thread receives, so everything
+    recorded here goes through ``lock``.
+    """
+
+    def __init__(self, index: int, url: str, rng: random.Random, args):
+        self.index = index
+        self.url = url
+        self.rng = rng
+        self.args = args
+        self.sio = socketio.Client(reconnection=False)
+        self.decoder = TelemetryDecoder()
+        self.lock = threading.Lock()
+        self.created = threading.Event()
+        self.drone_id: Optional[str] = None
+        self.connect_time: Optional[float] = None
+        self.error: Optional[str] = None
+        self.recording = False
+        # Control script: integer levels in 1/127 so the echo compares exactly
+        self.levels = [0] * len(CONTROL_KEYS)
+        self.seq = 0
+        self.pending: Deque[Tuple[Tuple[int, ...], float]] = deque()  # (levels, sent at)
+        self.due = {'adjust_jam': 0.0, 'log_anchor': 0.0, 'commander_override': 0.0}
+        # Telemetry bookkeeping
+        self.armed = False
+        self.in_sync = False
+        self.last_resync = 0.0
+        self.last_rearm = 0.0
+        self.min_transit: Optional[float] = None
+        self.last_arrival: Optional[float] = None
+        # Results (only while recording)
+        self.input_latency: List[float] = []
+        self.ack_latency: Dict[str, List[float]] = {event: [] for event in ACK_EVENTS}
+        self.sent: Counter = Counter()
+        self.lost_inputs = 0
+        self.frames = 0
+        self.frame_bytes = 0
+        self.gaps = 0
+        self.syncs = 0
+        self.late = 0
+        self.lateness: List[float] = []
+        self.interarrival: List[float] = []
+
+        self.sio.on('drone_created', self._on_created)
+        self.sio.on('drone_update', self._on_update)
+
+    # ---------- connection ----------
+
+    def connect(self, timeout: float) -> bool:
+        """Open the socket and wait for ``drone_created``"""
+        start = time.perf_counter()
+        try:
+            self.sio.connect(self.url, transports=['websocket'], wait_timeout=timeout)
+        except (socketio.exceptions.ConnectionError, ValueError) as error:
+            self.error = str(error) or type(error).__name__
+            return False
+        if not self.created.wait(timeout):
+            self.error = 'No drone_created'
+            return False
+        self.connect_time = time.perf_counter() - start
+        self.emit('arm', {'drone_id': self.drone_id})
+        return True
+
+    def close(self):
+        try:
+            self.sio.disconnect()
+        except Exception:
+            pass
+
+    def _on_created(self, data):
+        self.drone_id = data.get('drone_id')
+        self.created.set()
+
+    # ---------- inputs ----------
+
+    def emit(self, event: str, data: Dict):
+        """Send one event and time its acknowledgement"""
+        sent = time.perf_counter()
+        recording = self.recording
+
+        def acked(*_):
+            if recording:
+                with self.lock:
+                    self.ack_latency[event].append(time.perf_counter() - sent)
+
+        if recording:
+            with self.lock:
+                self.sent[event] += 1
+        self.sio.emit(event, data, callback=acked)
+
+    def schedule(self, now: float):
+        """Stagger the occasional events so clients do not fire them together"""
+        for event in self.due:
+            self.due[event] = now + self._interval(event)
+
+    def _interval(self, event: str) -> float:
+        mean = {'adjust_jam': self.args.jam_every, 'log_anchor': self.args.anchor_every,
+                'commander_override': self.args.override_every}[event]
+        return self.rng.expovariate(1.0 / mean) if mean > 0 else float('inf')
+
+    def step(self, now: float):
+        """Move the stick, plus any occasional event that has come due"""
+        # Random walk on forward / yaw / throttle; every input differs from the last
+        previous = list(self.levels)
+        while self.levels == previous:
+            for axis in (0, 1, 2):
+                step = self.rng.randint(-20, 20)
+                self.levels[axis] = max(-127, min(127, self.levels[axis] + step))
+        self.seq += 1
+        levels = tuple(self.levels)
+        controls = {key: level / CONTROL_SCALE for key, level in zip(CONTROL_KEYS, levels)}
+        with self.lock:
+            self.pending.append((levels, time.perf_counter()))
+        self.emit('set_controls', {'drone_id': self.drone_id, 'seq': self.seq, **controls})
+
+        for event, due in self.due.items():
+            if now < due:
+                continue
+            self.due[event] = now + self._interval(event)
+            payload = {'drone_id': self.drone_id}
+            if event == 'adjust_jam':
+                payload['delta'] = self.rng.choice((-10, -5, 5, 10))
+            self.emit(event, payload)
+
+        if not self.armed and now - self.last_rearm > REARM_INTERVAL:
+            # The operator re-arms after an override or a landing
+            self.last_rearm = now
+            self.emit('arm', {'drone_id': self.drone_id})
+
+    # ---------- telemetry ----------
+
+    def _on_update(self, frame):
+        arrival = time.perf_counter()
+        if not isinstance(frame, (bytes, bytearray)):
+            return  # JSON fallback carries no sequence or clock
+        result = self.decoder.decode(frame)
+        if result.get('needs_keyframe'):
+            with self.lock:
+                if self.in_sync and self.recording:
+                    self.gaps += 1
+                self.in_sync = False
+            if arrival - self.last_resync > RESYNC_INTERVAL:
+                self.last_resync = arrival
+                self.sio.emit('request_keyframe', {'drone_id': result['drone_id']})
+            return
+        if result['needs_sync']:
+            if self.recording:
+                with self.lock:
+                    self.syncs += 1
+            self.sio.emit('doctrine_sync', self.decoder.cursors(result['drone_id']))
+
+        echoed = tuple(int(round(result['controls'].get(key, 0.0) * CONTROL_SCALE))
+                       for key in CONTROL_KEYS)
+        with self.lock:
+            self.in_sync = True
+            self.armed = result['state'].get('armed', self.armed)
+            self._match_input(echoed, arrival)
+            if result['sim_time'] is not None:
+                self._clock(arrival - result['sim_time'])
+            if self.recording:
+                self.frames += 1
+                self.frame_bytes += len(frame)
+                if self.last_arrival is not None:
+                    self.interarrival.append(arrival - self.last_arrival)
+            self.last_arrival = arrival
+
+    def _match_input(self, echoed: Tuple[int, ...], arrival: float):
+        """Latency of the input the frame echoes; older inputs were coalesced on the server"""
+        for index, (levels, sent) in enumerate(self.pending):
+            if levels == echoed:
+                if self.recording:
+                    self.input_latency.append(arrival - sent)
+                for _ in range(index + 1):
+                    self.pending.popleft()
+                return
+        while self.pending and arrival - self.pending[0][1] > PENDING_TIMEOUT:
+            self.pending.popleft()
+            if self.recording:
+                self.lost_inputs += 1
+
+    def _clock(self, transit: float):
+        """Lateness against the fastest transit (wall arrival - sim time) seen so far"""
+        if self.min_transit is None or transit < self.min_transit:
+            self.min_transit = transit
+        lateness = transit - self.min_transit
+        if self.recording:
+            self.lateness.append(lateness)
+            if lateness > self.args.late_ms / 1000.0:
+                self.late += 1
+
+
+def _server_report(before: Optional[Dict], after: Optional[Dict], elapsed: float,
+                   clients: int) -> Optional[Dict]:
+    """Deltas of the server's own counters over the measured window"""
+    if before is None or after is None:
+        return None
+
+    def delta(name: str) -> Optional[float]:
+        if name in before and name in after:
+            return after[name] - before[name]
+        return None
+
+    def family(prefix: str) -> Dict[str, float]:
+        return {re.search(r'"([^"]*)"', name).group(1): after[name] - before.get(name, 0.0)
+                for name in after if name.startswith(prefix + '{')}
+
+    cpu = delta('process_cpu_seconds_total')
+    ticks = delta('snapshot_version')
+    return {
+        'cpu_percent': 100.0 * cpu / elapsed if cpu is not None else None,
+        'cpu_ms_per_client_second': 1000.0 * cpu / elapsed / clients if cpu is not None and clients else None,
+        'ticks_per_sec': ticks / elapsed if ticks is not None else None,
+        'scheduler_overruns': delta('scheduler_overruns_total'),
+        'scheduler_steps': family('scheduler_steps_total'),
+        'telemetry_frames': family('telemetry_frames_total'),
+        'control_inputs': family('control_inputs_total'),
+        'outbound_bytes': family('outbound_bytes_total'),
+        'connected_clients': after.get('connected_clients'),
+    }
+
+
+def run(args) -> Dict:
+    """Connect, warm up, measure and disconnect; returns the report"""
+    rng = random.Random(args.seed)
+    operators = [Operator(i, args.url, random.Random(rng.random()), args) for i in range(args.clients)]
+
+    connected: List[Operator] = []
+    ramp = args.ramp / max(1, args.clients)
+    for operator in operators:
+        if operator.connect(args.connect_timeout):
+            connected.append(operator)
+        else:
+            print(f'client {operator.index}: {operator.error}', file=sys.stderr)
+        time.sleep(ramp)
+    print(f'{len(connected)}/{args.clients} clients connected')
+
+    period = 1.0 / args.control_hz
+    start = time.perf_counter()
+    for operator in connected:
+        operator.schedule(start)
+    measure_from = start + args.warmup
+    end = measure_from + args.duration
+    before = cpu_before = None
+    step = 0
+    try:
+        while True:
+            tick_start = start + step * period
+            if tick_start >= end:
+                break
+            if before is None and tick_start >= measure_from:
+                before = scrape(args.url)
+                cpu_before = time.process_time()
+                measure_from = time.perf_counter()
+                for operator in connected:
+                    with operator.lock:
+                        operator.recording = True
+            # Spread the clients' inputs across the period instead of sending one burst
+            for k, operator in enumerate(connected):
+                slot = tick_start + period * k / len(connected)
+                delay = slot - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+                if operator.sio.connected:
+                    operator.step(slot)
+            step += 1
+        remaining = end - time.perf_counter()
+        if remaining > 0:
+            time.sleep(remaining)
+    finally:
+        elapsed = time.perf_counter() - measure_from
+        cpu_elapsed = time.process_time() - cpu_before if cpu_before is not None else None
+        for operator in connected:
+            with operator.lock:
+                operator.recording = False
+        after = scrape(args.url)
+        for operator in connected:
+            operator.close()
+
+    return _report(args, operators, connected, before, after, elapsed, cpu_elapsed)
+
+
+def _report(args, operators: List[Operator], connected: List[Operator], before, after,
+            elapsed: float, cpu_elapsed: Optional[float]) -> Dict:
+    input_latency = [v for o in connected for v in o.input_latency]
+    lateness = [v for o in connected for v in o.lateness]
+    interarrival = [v for o in connected for v in o.interarrival]
+    sent = sum((o.sent for o in connected), Counter())
+    frames = sum(o.frames for o in connected)
+    late = sum(o.late for o in connected)
+    return {
+        'created': time.time(),
+        'python': platform.python_version(),
+        'machine': platform.machine(),
+        'config': {key: getattr(args, key) for key in (
+            'url', 'clients', 'duration', 'warmup', 'control_hz', 'jam_every', 'anchor_every',
+            'override_every', 'late_ms', 'seed')},
+        'clients': {
+            'connected': len(connected),
+            'failed': len(operators) - len(connected),
+            'connect': _percentiles([o.connect_time for o in connected]),
+        },
+        'elapsed_seconds': elapsed,
+        'input_to_telemetry': {
+            **_percentiles(input_latency),
+            'lost_inputs': sum(o.lost_inputs for o in connected),
+        },
+        'ack': {event: _percentiles([v for o in connected for v in o.ack_latency[event]])
+                for event in ACK_EVENTS},
+        'inputs': {
+            'sent': dict(sent),
+            'per_sec': sum(sent.values()) / elapsed if elapsed else 0.0,
+        },
+        'frames': {
+            'received': frames,
+            'per_client_per_sec': frames / elapsed / len(connected) if elapsed and connected else 0.0,
+            'bytes_per_sec': sum(o.frame_bytes for o in connected) / elapsed if elapsed else 0.0,
+            'dropped': sum(o.gaps for o in connected),
+            'doctrine_syncs': sum(o.syncs for o in connected),
+            'late': late,
+            'late_fraction': late / frames if frames else 0.0,
+            'lateness': _percentiles(lateness),
+            'interarrival': _percentiles(interarrival),
+        },
+        'server': _server_report(before, after, elapsed, len(connected)),
+        'loadgen_cpu_percent': 100.0 * cpu_elapsed / elapsed if cpu_elapsed is not None and elapsed else None,
+    }
+
+
+# Headline figures: (label, path into the report, lower is better and gated by --threshold)
+HEADLINES = (
+    ('input->telemetry p50 ms', ('input_to_telemetry', 'p50_ms'), True),
+    ('input->telemetry p99 ms', ('input_to_telemetry', 'p99_ms'), True),
+    ('set_controls ack p50 ms', ('ack', 'set_controls', 'p50_ms'), False),
+    ('set_controls ack p99 ms', ('ack', 'set_controls', 'p99_ms'), False),
+    ('frames/client/s', ('frames', 'per_client_per_sec'), False),
+    ('dropped frames', ('frames', 'dropped'), False),
+    ('late fraction', ('frames', 'late_fraction'), False),
+    ('lost inputs', ('input_to_telemetry', 'lost_inputs'), False),
+    ('server cpu %', ('server', 'cpu_percent'), False),
+    ('server cpu ms/client/s', ('server', 'cpu_ms_per_client_second'), True),
+    ('server ticks/s', ('server', 'ticks_per_sec'), False),
+    ('loadgen cpu %', ('loadgen_cpu_percent',), False),
+)
+
+
+def _lookup(report: Dict, path: Tuple[str, ...]) -> Optional[float]:
+    value = report
+    for key in path:
+        if not isinstance(value, dict) or value.get(key) is None:
+            return None
+        value = value[key]
+    return value
+
+
+def compare(report: Dict, baseline: Dict, threshold: float) -> List[str]:
+    """Print the headline figures against ``baseline``; returns the gated ones that regressed"""
+    regressions = []
+    print(f"{'metric':<26} {'this run':>12} {'baseline':>12} {'change':>9}")
+    for label, path, gated in HEADLINES:
+        value, base = _lookup(report, path), _lookup(baseline, path)
+        shown = f'{value:>12.3f}' if value is not None else f"{'-':>12}"
+        based = f'{base:>12.3f}' if base is not None else f"{'-':>12}"
+        change = f'{100.0 * (value / base - 1.0):+8.1f}%' if value is not None and base else '        -'
+        print(f'{label:<26} {shown} {based} {change}')
+        if gated and value is not None and base and value > base * (1.0 + threshold):
+            regressions.append(label)
+    return regressions
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description='A.E.G.I.S operator load test')
+    parser.add_argument('--url', default='http://localhost:5000', help='Server to load')
+    parser.add_argument('--clients', type=int, default=20, help='Simulated operators')
+    parser.add_argument('--duration', type=float, default=30.0, help='Measured seconds')
+    parser.add_argument('--warmup', type=float, default=3.0, help='Unmeasured seconds after connecting')
+    parser.add_argument('--ramp', type=float, default=2.0, help='Seconds over which clients connect')
+    parser.add_argument('--connect-timeout', type=float, default=10.0, help='Seconds to wait for drone_created')
+    parser.add_argument('--control-hz', type=float, default=10.0, help='set_controls per client per second')
+    parser.add_argument('--jam-every', type=float, default=3.0, help='Mean seconds between adjust_jam (0 = never)')
+    parser.add_argument('--anchor-every', type=float, default=5.0, help='Mean seconds between log_anchor (0 = never)')
+    parser.add_argument('--override-every', type=float, default=60.0,
+                        help='Mean seconds between commander_override (0 = never)')
+    parser.add_argument('--late-ms', type=float, default=100.0, help='Lateness that makes a frame late')
+    parser.add_argument('--seed', type=int, default=1, help='Traffic script seed')
+    parser.add_argument('--out', help='Write the report JSON here')
+    parser.add_argument('--baseline', help='Earlier report to compare against')
+    parser.add_argument('--threshold', type=float, default=0.25, help='Allowed slowdown (0.25 = 25%%)')
+    args = parser.parse_args(argv)
+
+    if websocket is None:
+        print('socketio.Client needs websocket-client: pip install "python-socketio[client]"', file=sys.stderr)
+        return 2
+
+    report = run(args)
+    if args.out:
+        with open(args.out, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f'Report saved -> {args.out}')
+
+    baseline = {}
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+    regressions = compare(report, baseline, args.threshold)
+    if not report['clients']['connected']:
+        return 1
+    if regressions:
+        print(f"REGRESSION (> {args.threshold:.0%} worse): {', '.join(regressions)}")
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,917 @@
+"""
+A.E.G.I.S Physics Core
+Struct-of-arrays fleet engine with per-drone PhysicsEngine views and the A.E.G.I.S doctrine
+"""
+
+from dataclasses import dataclass, asdict, field
+from typing import Deque, Dict, List, Mapping, Tuple, Optional, Union
+from types import MappingProxyType
+import logging
+import math
+import weakref
+
+import numpy as np
+
+from planner import AnchorGraph
+from proximity import ProximityIndex
+
+logger = logging.getLogger(__name__)
+
+# ==================== A.E.G.I.S DOCTRINE CONSTANTS ====================
+THRESH_WARN = 70.0          # Warning threshold for confidence
+THRESH_REJECT = 40.0        # Reject threshold (can't drop anchors below this)
+THRESH_ABORT = 10.0         # Abort threshold - triggers automatic retrograde
+JAM_SAFE_THRESHOLD = 30.0   # Below this GPS jam level, confidence can heal
+BATTERY_RTB_THRESHOLD = 15.0  # Battery % that triggers automatic RTB
+
+ORIGIN = (0.0, 2.0, 0.0)    # Launch / landing point
+SAFE_HOP_RADIUS = 40.0      # Max distance (m) between anchors the RTB route may hop
+RTB_CLEARANCE = 5.0         # Metres above the highest ground on a retrograde leg
+
+# Fleet separation (metres between airborne drones)
+SEPARATION_RADIUS = 5.0     # Closer than this: proximity warning
+COLLISION_RADIUS = 1.0      # Closer than this: collision
+LAUNCH_PAD_RADIUS = 3.0     # Every drone launches from the origin; the pad is not checked
+
+# Enumerated string fields are stored as small integer codes in the fleet arrays
+MODES = ("STABILIZE", "RETROGRADE", "COMMANDER_RTB", "LANDED")
+STATUSES = ("NOMINAL", "WARNING", "SAFETY_OVERRIDE", "COMMANDER_RTB")
+MODE_STABILIZE, MODE_RETROGRADE, MODE_COMMANDER_RTB, MODE_LANDED = range(len(MODES))
+STATUS_NOMINAL, STATUS_WARNING, STATUS_SAFETY_OVERRIDE, STATUS_COMMANDER_RTB = range(len(STATUSES))
+PROXIMITY_STATES = ("CLEAR", "WARNING", "COLLISION")
+PROXIMITY_CLEAR, PROXIMITY_WARNING, PROXIMITY_COLLISION = range(len(PROXIMITY_STATES))
+
+# Why a retrograde started (FleetEngine.retrograde_triggers keys)
+RETROGRADE_CAUSES = ("confidence", "battery", "commander")
+
+BREADCRUMB_CAPACITY = 500   # Breadcrumbs retained per drone (ring buffer)
+BREADCRUMB_INTERVAL = 0.2   # Seconds between breadcrumb drops
+RING_COPIES = 4             # Breadcrumb ring copies FleetEngine recycles for snapshots
+
+# Column order of the per-drone control block
+CONTROL_KEYS = ('forward', 'yaw', 'throttle', 'pitch', 'roll', 'yaw_rate')
+CTRL_FORWARD, CTRL_YAW, CTRL_THROTTLE = 0, 1, 2
+
+# ==================== DATA CLASSES ====================
+
+@dataclass
+class DroneState:
+    """Represents the complete state of a drone with A.E.G.I.S doctrine"""
+    # Position and motion
+    position: Tuple[float, float, float] = (0.0, 2.0, 0.0)  # x, y, z
+    velocity: Tuple[float, float, float] = (0.0, 0.0, 0.0)
+    rotation: Tuple[float, float, float] = (0.0, 0.0, 0.0)  # pitch, yaw, roll (radians)
+    angular_velocity: Tuple[float, float, float] = (0.0, 0.0, 0.0)
+
+    # Basic state
+    battery: float = 100.0
+    armed: bool = False
+    mode: str = "STABILIZE"
+
+    # A.E.G.I.S Doctrine state
+    gps_jam: float = 0.0                # 0-100, GPS jamming level (operator level + jam field)
+    nav_confidence: float = 100.0       # 0-100, auto-affected by GPS jam
+    retrograde_active: bool = False     # Auto-return mode
+    status: str = "NOMINAL"             # NOMINAL, WARNING, SAFETY_OVERRIDE, COMMANDER_RTB
+
+    # Fleet separation
+    proximity: str = "CLEAR"            # CLEAR, WARNING, COLLISION
+    separation: float = -1.0            # Distance (m) to the nearest drone within SEPARATION_RADIUS, -1 if none
+
+
+class BreadcrumbRing:
+    """Chronological view over one drone's row of the fleet breadcrumb ring buffer.
+
+    Every breadcrumb gets a monotonically increasing sequence number; the ring
+    retains the last BREADCRUMB_CAPACITY of them. Appends are O(1) and clearing
+    just moves the start sequence, so sequence numbers never repeat for a row.
+    """
+
+    __slots__ = ('_fleet', '_row')
+
+    def __init__(self, fleet: 'FleetEngine', row: int):
+        self._fleet = fleet
+        self._row = row
+
+    @property
+    def next_seq(self) -> int:
+        """Sequence number the next breadcrumb will get"""
+        return int(self._fleet.breadcrumb_seq[self._row])
+
+    @property
+    def first_seq(self) -> int:
+        """Sequence number of the oldest retained breadcrumb"""
+        return max(int(self._fleet.breadcrumb_start[self._row]), self.next_seq - BREADCRUMB_CAPACITY)
+
+    def __len__(self) -> int:
+        return self.next_seq - self.first_seq
+
+    def since(self, seq: int) -> np.ndarray:
+        """Breadcrumbs with sequence >= seq, oldest first, as an (n, 3) float32 array"""
+        seqs = np.arange(max(seq, self.first_seq), self.next_seq)
+        return self._fleet.breadcrumbs[self._row, seqs % BREADCRUMB_CAPACITY]
+
+    def append(self, point: Tuple[float, float, float]):
+        seq = self.next_seq
+        self._fleet.breadcrumbs[self._row, seq % BREADCRUMB_CAPACITY] = point
+        self._fleet.breadcrumb_seq[self._row] = seq + 1
+
+    def extend(self, points: np.ndarray):
+        """Append an (n, 3) run of breadcrumbs, oldest first; only the ones the ring keeps are written"""
+        seq = self.next_seq
+        kept = points[-BREADCRUMB_CAPACITY:]
+        seqs = np.arange(seq + len(points) - len(kept), seq + len(points))
+        self._fleet.breadcrumbs[self._row, seqs % BREADCRUMB_CAPACITY] = kept
+        self._fleet.breadcrumb_seq[self._row] = seq + len(points)
+
+    def clear(self):
+        self._fleet.breadcrumb_start[self._row] = self.next_seq
+
+    def __iter__(self):
+        return iter(self[:])
+
+    def __getitem__(self, index):
+        points = [tuple(p) for p in self.since(0).tolist()]
+        return points[index]
+
+
+@dataclass
+class DoctrineData:
+    """A.E.G.I.S doctrine data - breadcrumbs and anchors"""
+    breadcrumbs: BreadcrumbRing
+    anchors: List[Tuple[float, float, float]] = field(default_factory=list)
+    # A deque once a retrograde plans a route; an idle deque would cost ~600 bytes per drone
+    return_queue: Union[Deque[Tuple[float, float, float]], Tuple[()]] = ()
+    target_point: Optional[Tuple[float, float, float]] = None
+    anchor_base: int = 0    # Sequence number of anchors[0]
+    graph: AnchorGraph = field(default_factory=lambda: AnchorGraph(ORIGIN, SAFE_HOP_RADIUS))
+
+    def add_anchor(self, point: Tuple[float, float, float]):
+        """Log a verified anchor and link it into the return graph.
+
+        Doctrine owned by a fleet row is appended through ``FleetEngine.add_anchor``,
+        which also advances the row's ``anchor_seq``.
+        """
+        self.anchors.append(point)
+        self.graph.add(point)
+
+    @property
+    def anchor_seq(self) -> int:
+        """Sequence number the next anchor will get"""
+        return self.anchor_base + len(self.anchors)
+
+    def anchors_since(self, seq: int) -> List[Tuple[float, float, float]]:
+        """Anchors with sequence >= seq, oldest first"""
+        return self.anchors[max(0, seq - self.anchor_base):]
+
+
+# ==================== FLEET ENGINE ====================
+
+class FleetEngine:
+    """Struct-of-arrays physics for a whole fleet, advanced with one batched step.
+
+    Every drone owns one row of the arrays below. The math mirrors the original
+    scalar per-drone update exactly; only discrete doctrine events (retrograde
+    start, waypoint arrival, breadcrumb drops) fall back to per-row Python.
+    """
+
+    # Physical constants
+    GRAVITY = 9.81
+    MASS = 1.5
+    MAX_SPEED = 8.0
+    MAX_REVERSE_SPEED = 4.0
+    ACCELERATION = 12.0
+    DECELERATION = 10.0
+    DRAG = 0.96
+    BASE_YAW_RATE = 2.5
+    RETROGRADE_SPEED = 6.0
+    RETROGRADE_CLIMB_RATE = 3.0
+
+    _VEC3_FIELDS = ('position', 'velocity', 'rotation', 'angular_velocity', 'target')
+    _SCALAR_FIELDS = ('speed', 'yaw_rate', 'battery', 'nav_confidence', 'gps_jam', 'last_breadcrumb_time',
+                      'separation', 'jam_operator', 'ground', 'leg_clearance')
+    _FLAG_FIELDS = ('active', 'armed', 'retrograde', 'has_target')
+    _CODE_FIELDS = ('mode', 'status', 'proximity')
+    _SEQ_FIELDS = ('breadcrumb_seq', 'breadcrumb_start', 'return_queue_len', 'anchor_base', 'anchor_seq')
+
+    def __init__(self, capacity: int = 64):
+        self.capacity = 0
+        self.count = 0
+        self.sim_time = 0.0     # Simulation clock (seconds), advanced by step()
+        self.tick = 0           # Number of step() calls
+        self.retrograde_triggers = dict.fromkeys(RETROGRADE_CAUSES, 0)
+        # Drones entering each proximity state (FleetEngine.update_proximity)
+        self.proximity_events = {name.lower(): 0 for name in PROXIMITY_STATES[1:]}
+        self.spatial = ProximityIndex(SEPARATION_RADIUS)
+        # Spatial jamming (jamming.JamField). When set, each step makes gps_jam the
+        # operator level (jam_operator) plus the field sampled at the drone.
+        self.jam_field = None
+        # Heightfield terrain (terrain.Heightfield). When set, ``ground`` holds the
+        # terrain height under each drone as of its last step, normal flight holds
+        # height above it, and retrograde legs climb to ``leg_clearance`` first.
+        self.terrain = None
+        self.doctrine: List[Optional[DoctrineData]] = []
+        self._free: List[int] = []
+        # Breadcrumb ring copies for snapshots: [buffer, breadcrumb_seq, breadcrumb_start] as of
+        # the last time each buffer was brought up to date, then a weakref to the snapshot leasing it
+        self._ring_copies: List[list] = []
+
+        for name in self._VEC3_FIELDS:
+            setattr(self, name, np.zeros((0, 3), dtype=np.float64))
+        for name in self._SCALAR_FIELDS:
+            setattr(self, name, np.zeros(0, dtype=np.float64))
+        for name in self._FLAG_FIELDS:
+            setattr(self, name, np.zeros(0, dtype=bool))
+        for name in self._CODE_FIELDS:
+            setattr(self, name, np.zeros(0, dtype=np.int8))
+        for name in self._SEQ_FIELDS:
+            setattr(self, name, np.zeros(0, dtype=np.int64))
+        self.breadcrumbs = np.zeros((0, BREADCRUMB_CAPACITY, 3), dtype=np.float32)
+        self.controls = np.zeros((0, len(CONTROL_KEYS)), dtype=np.float64)
+
+        self._grow(max(1, capacity))
+
+    # ---------- row management ----------
+
+    def _grow(self, new_capacity: int):
+        """Reallocate every array to a larger capacity, preserving rows"""
+        extra = new_capacity - self.capacity
+        for name in self._VEC3_FIELDS:
+            arr = getattr(self, name)
+            setattr(self, name, np.concatenate([arr, np.zeros((extra, 3), dtype=arr.dtype)]))
+        for name in self._SCALAR_FIELDS + self._FLAG_FIELDS + self._CODE_FIELDS + self._SEQ_FIELDS:
+            arr = getattr(self, name)
+            setattr(self, name, np.concatenate([arr, np.zeros(extra, dtype=arr.dtype)]))
+        self.breadcrumbs = np.concatenate(
+            [self.breadcrumbs, np.zeros((extra, BREADCRUMB_CAPACITY, 3), dtype=np.float32)])
+        self.controls = np.concatenate([self.controls, np.zeros((extra, len(CONTROL_KEYS)))])
+        self.doctrine.extend([None] * extra)
+        # Hand out low rows first
+        self._free.extend(range(new_capacity - 1, self.capacity - 1, -1))
+        self.capacity = new_capacity
+
+    def allocate(self) -> int:
+        """Claim a row for a new drone and initialise it to the default state"""
+        if not self._free:
+            self._grow(self.capacity * 2)
+        row = self._free.pop()
+        self.reset_row(row)
+        self.active[row] = True
+        self.count += 1
+        return row
+
+    def release(self, row: int):
+        """Return a row to the free list"""
+        if not self.active[row]:
+            return
+        self.active[row] = False
+        self.armed[row] = False
+        self.doctrine[row] = None
+        self._free.append(row)
+        self.count -= 1
+
+    def reset_row(self, row: int):
+        """Reset one row to a fresh DroneState / DoctrineData"""
+        self.position[row] = ORIGIN
+        self.velocity[row] = 0.0
+        self.rotation[row] = 0.0
+        self.angular_velocity[row] = 0.0
+        self.target[row] = 0.0
+        self.speed[row] = 0.0
+        self.yaw_rate[row] = 0.0
+        self.battery[row] = 100.0
+        self.nav_confidence[row] = 100.0
+        self.gps_jam[row] = 0.0
+        self.jam_operator[row] = 0.0
+        self.ground[row] = self.ground_at(ORIGIN)
+        self.leg_clearance[row] = 0.0
+        self.last_breadcrumb_time[row] = 0.0
+        self.armed[row] = False
+        self.retrograde[row] = False
+        self.has_target[row] = False
+        self.mode[row] = MODE_STABILIZE
+        self.status[row] = STATUS_NOMINAL
+        self.proximity[row] = PROXIMITY_CLEAR
+        self.separation[row] = -1.0
+        self.controls[row] = 0.0
+        # Sequence numbers keep counting across resets so clients never confuse rows
+        self.breadcrumb_start[row] = self.breadcrumb_seq[row]
+        previous = self.doctrine[row]
+        anchor_base = previous.anchor_seq if previous is not None else 0
+        self.doctrine[row] = DoctrineData(BreadcrumbRing(self, row), anchor_base=anchor_base)
+        self.anchor_base[row] = anchor_base
+        self.anchor_seq[row] = anchor_base
+        self.return_queue_len[row] = 0
+
+    def add_anchor(self, row: int, point: Tuple[float, float, float]):
+        """Log a verified anchor for ``row``, keeping its ``anchor_seq`` column in step"""
+        self.doctrine[row].add_anchor(point)
+        self.anchor_seq[row] += 1
+
+    # ---------- doctrine events (per row) ----------
+
+    def start_retrograde(self, row: int, commander_override: bool = False):
+        """Start automatic retrograde return along the shortest verified-anchor route"""
+        doctrine = self.doctrine[row]
+        if commander_override:
+            cause = 'commander'
+        elif self.nav_confidence[row] < THRESH_ABORT:
+            cause = 'confidence'
+        else:
+            cause = 'battery'
+        self.retrograde_triggers[cause] += 1
+        self.retrograde[row] = True
+        self.mode[row] = MODE_COMMANDER_RTB if commander_override else MODE_RETROGRADE
+
+        # BUILD RETURN PATH: Shortest route home that only hops between verified
+        # anchors (never worse than retracing every anchor); always ends at origin
+        doctrine.return_queue = doctrine.graph.route(tuple(self.position[row].tolist()))
+        self._set_target(row, doctrine.return_queue.popleft())
+        self.return_queue_len[row] = len(doctrine.return_queue)
+
+    def _set_target(self, row: int, point: Optional[Tuple[float, float, float]]):
+        self.doctrine[row].target_point = point
+        if point is None:
+            self.has_target[row] = False
+        else:
+            self.has_target[row] = True
+            self.target[row] = point
+            if self.terrain is not None:
+                start = (self.position[row, 0], self.position[row, 2])
+                self.leg_clearance[row] = self.terrain.highest(start, (point[0], point[2])) + RTB_CLEARANCE
+
+    def _arrive(self, row: int):
+        """Reached the current retrograde waypoint: advance or land"""
+        doctrine = self.doctrine[row]
+        if doctrine.return_queue:
+            self._set_target(row, doctrine.return_queue.popleft())
+            self.return_queue_len[row] = len(doctrine.return_queue)
+            return
+        # Arrived at origin - AUTO-DISARM and stop
+        self._set_target(row, None)
+        self.retrograde[row] = False
+        self.mode[row] = MODE_LANDED
+        self.nav_confidence[row] = 50.0  # Partial recovery
+        self.armed[row] = False  # Auto-disarm after retrograde
+        self.speed[row] = 0.0
+        self.yaw_rate[row] = 0.0
+        # Reset to origin position
+        self.position[row] = ORIGIN
+        self.ground[row] = self.ground_at(ORIGIN)
+        self.velocity[row] = 0.0
+
+    # ---------- terrain ----------
+
+    def ground_at(self, point: Tuple[float, float, float]) -> float:
+        """Terrain height under one point (0 without terrain)"""
+        if self.terrain is None:
+            return 0.0
+        return float(self.terrain.height(point[0], point[2]))
+
+    def _follow_terrain(self, moved: np.ndarray, retro: np.ndarray):
+        """One batched ground lookup for every drone that moved this tick.
+
+        Normal flight holds height above ground, so those rows move with the
+        terrain; retrograde rows keep their altitude. Nobody goes below ground.
+        """
+        rows = np.flatnonzero(moved)
+        if rows.size == 0:
+            return
+        ground = self.terrain.height(self.position[rows, 0], self.position[rows, 2])
+        following = ~retro[rows]
+        self.position[rows[following], 1] += ground[following] - self.ground[rows[following]]
+        self.position[rows, 1] = np.maximum(self.position[rows, 1], ground)
+        self.ground[rows] = ground
+
+    # ---------- fleet separation ----------
+
+    def update_proximity(self):
+        """Rebuild the spatial index and refresh every drone's proximity state.
+
+        Only airborne drones (armed, off the launch pad) are indexed. Run once
+        per tick after stepping; unlike ``step`` it always covers the whole
+        fleet, since neighbours can belong to any row.
+        """
+        offset = self.position - ORIGIN
+        airborne = self.active & self.armed & ((offset * offset).sum(axis=1) > LAUNCH_PAD_RADIUS ** 2)
+        rows = np.flatnonzero(airborne)
+        self.spatial.build(self.position[rows], rows)
+        close, distances = self.spatial.nearest(SEPARATION_RADIUS)
+
+        nearest = np.full(self.capacity, np.inf)
+        nearest[close] = distances
+        codes = np.full(self.capacity, PROXIMITY_CLEAR, dtype=np.int8)
+        codes[nearest <= SEPARATION_RADIUS] = PROXIMITY_WARNING
+        codes[nearest <= COLLISION_RADIUS] = PROXIMITY_COLLISION
+
+        entered = self.active & (codes > self.proximity)
+        for code in (PROXIMITY_WARNING, PROXIMITY_COLLISION):
+            self.proximity_events[PROXIMITY_STATES[code].lower()] += int(np.count_nonzero(entered & (codes == code)))
+        # In place: shared-memory fleets hand these arrays to other processes
+        self.proximity[:] = codes
+        self.separation[:] = np.where(np.isfinite(nearest), nearest, -1.0)
+
+    def neighbors(self, row: int, radius: float = SEPARATION_RADIUS) -> Tuple[np.ndarray, np.ndarray]:
+        """Airborne drones within ``radius`` of ``row``: (rows, distances), nearest first.
+
+        Answers from the index built by the last ``update_proximity``.
+        """
+        rows, distances = self.spatial.query(self.position[row], radius)
+        others = rows != row
+        return rows[others], distances[others]
+
+    def snapshot(self, drones: Optional[Mapping[str, int]] = None) -> 'FleetSnapshot':
+        """Immutable copy of the fleet as of now; ``drones`` maps drone IDs to rows"""
+        return FleetSnapshot(self, drones or {})
+
+    def ring_copy(self, owner: object) -> np.ndarray:
+        """Read-only copy of the breadcrumb ring, up to the highest active row.
+
+        The copy is leased to ``owner`` (the snapshot it belongs to) and is only
+        valid while the owner is alive: once the owner is collected its buffer
+        is recycled, so readers keep the owner, not the returned array. Every
+        ring write advances a row's ``breadcrumb_seq`` and clearing moves its
+        ``breadcrumb_start``, so a recycled copy only re-copies the rows where
+        either changed since it was last brought up to date.
+        """
+        in_use = np.flatnonzero(self.active)
+        limit = int(in_use[-1]) + 1 if in_use.size else 0
+        self._ring_copies = [entry for entry in self._ring_copies if len(entry[0]) == self.capacity]
+        entry = next((entry for entry in self._ring_copies if entry[3]() is None), None)
+        if entry is None:
+            entry = [np.empty_like(self.breadcrumbs), np.full(self.capacity, -1), np.full(self.capacity, -1), None]
+            if len(self._ring_copies) < RING_COPIES:
+                self._ring_copies.append(entry)
+        entry[3] = weakref.ref(owner)
+        buffer, seq, start = entry[:3]
+        stale = np.flatnonzero((seq[:limit] != self.breadcrumb_seq[:limit])
+                               | (start[:limit] != self.breadcrumb_start[:limit]))
+        if stale.size == limit:
+            buffer[:limit] = self.breadcrumbs[:limit]
+        elif stale.size:
+            buffer[stale] = self.breadcrumbs[stale]
+        seq[stale] = self.breadcrumb_seq[stale]
+        start[stale] = self.breadcrumb_start[stale]
+        copy = buffer[:limit]
+        copy.flags.writeable = False
+        return copy
+
+    # ---------- batched step ----------
+
+    def step(self, dt: float, rows: Optional[np.ndarray] = None):
+        """Advance every armed drone (or only ``rows``) by ``dt`` seconds.
+
+        Each call also advances the fleet's simulation clock, which drives
+        breadcrumb timing independently of wall time.
+        """
+        self.sim_time += dt
+        self.tick += 1
+        live = self.active
+        if rows is not None:
+            selected = np.zeros(self.capacity, dtype=bool)
+            selected[rows] = True
+            live = live & selected
+        if self.jam_field is not None:
+            # Grounded drones too, so their reported jam follows the field
+            self.sample_jam(np.flatnonzero(live))
+        mask = live & self.armed
+        if not mask.any():
+            return
+
+        # Update doctrine health
+        self._update_doctrine(mask & ~self.retrograde, dt)
+
+        # Check for retrograde triggers (confidence OR battery)
+        trigger = mask & ~self.retrograde & (
+            (self.nav_confidence < THRESH_ABORT) | (self.battery < BATTERY_RTB_THRESHOLD)
+        )
+        for row in np.flatnonzero(trigger):
+            self.start_retrograde(row)
+
+        # Update physics based on mode
+        retro = mask & self.retrograde
+        self._update_retrograde(retro, dt)
+        self._update_normal_flight(mask & ~retro, dt)
+        if self.terrain is not None:
+            self._follow_terrain(mask, retro)
+
+        # Update status string (preserve commander override mode)
+        conf = self.nav_confidence
+        status = np.select(
+            [self.mode == MODE_COMMANDER_RTB, self.retrograde, conf > THRESH_WARN, conf > THRESH_REJECT],
+            [STATUS_COMMANDER_RTB, STATUS_SAFETY_OVERRIDE, STATUS_NOMINAL, STATUS_WARNING],
+            default=STATUS_SAFETY_OVERRIDE
+        )
+        self.status[mask] = status[mask]
+
+        # Drop breadcrumbs
+        current_time = self.sim_time
+        due = np.flatnonzero(mask & (current_time - self.last_breadcrumb_time > BREADCRUMB_INTERVAL))
+        if due.size:
+            # Ring buffer keeps the last BREADCRUMB_CAPACITY per drone
+            seq = self.breadcrumb_seq[due]
+            self.breadcrumbs[due, seq % BREADCRUMB_CAPACITY] = self.position[due]
+            self.breadcrumb_seq[due] = seq + 1
+            self.last_breadcrumb_time[due] = current_time
+
+        # Battery drain
+        drain = mask & (self.speed > 0.1)
+        self.battery[drain] = np.maximum(0.0, self.battery[drain] - 0.5 * dt)
+
+        depleted = mask & self.armed & (self.battery <= 0)
+        for row in np.flatnonzero(depleted).tolist():
+            logger.info('Row %d auto-disarmed: battery depleted', row)
+        self.armed[depleted] = False
+
+    def sample_jam(self, rows: np.ndarray):
+        """gps_jam = operator level + jam field at each drone's ground position (one batched lookup)"""
+        level = self.jam_operator[rows]
+        if len(self.jam_field):
+            position = self.position[rows]
+            level = level + self.jam_field.sample(position[:, 0], position[:, 2])
+        self.gps_jam[rows] = np.clip(level, 0.0, 100.0)
+
+    def set_jam(self, row: int, level: float) -> float:
+        """Set a drone's operator jam level; the field's share is kept until the next sample"""
+        level = max(0.0, min(100.0, level))
+        field_share = self.gps_jam[row] - self.jam_operator[row]
+        self.jam_operator[row] = level
+        self.gps_jam[row] = max(0.0, min(100.0, level + field_share))
+        return float(self.gps_jam[row])
+
+    def _update_doctrine(self, mask: np.ndarray, dt: float):
+        """Update A.E.G.I.S doctrine - GPS jam directly affects nav confidence.
+
+        Confidence is frozen during retrograde, so ``mask`` excludes those rows.
+        """
+        # Linear Mapping: 80% Jam -> 10% Confidence (Trigger)
+        target_confidence = np.clip(100.0 - self.gps_jam[mask] * 1.125, 0.0, 100.0)
+
+        # Fast response (smoothing factor 3.0)
+        current = self.nav_confidence[mask]
+        updated = current + (target_confidence - current) * 3.0 * dt
+        self.nav_confidence[mask] = np.clip(updated, 0.0, 100.0)
+
+    def _update_retrograde(self, mask: np.ndarray, dt: float):
+        """Update retrograde (auto-return) flight"""
+        if not mask.any():
+            return
+
+        lost = mask & ~self.has_target
+        self.retrograde[lost] = False
+        self.mode[lost] = MODE_STABILIZE
+        mask = mask & self.has_target
+
+        # Calculate distance to target
+        dx = self.target[:, 0] - self.position[:, 0]
+        dz = self.target[:, 2] - self.position[:, 2]
+        dist = np.sqrt(dx * dx + dz * dz)
+
+        arrived = mask & (dist < 1.0)
+        for row in np.flatnonzero(arrived):
+            self._arrive(row)
+
+        nav = np.flatnonzero(mask & ~arrived)
+        if nav.size and self.terrain is not None:
+            # Climb in place until the leg clears the terrain, then fly it
+            shortfall = self.leg_clearance[nav] - self.position[nav, 1]
+            climbing = nav[shortfall > 0]
+            if climbing.size:
+                rate = self.RETROGRADE_CLIMB_RATE
+                self.position[climbing, 1] += np.minimum(shortfall[shortfall > 0], rate * dt)
+                self.velocity[climbing] = (0.0, rate, 0.0)
+                nav = nav[shortfall <= 0]
+        if nav.size == 0:
+            return
+
+        # Navigate toward target
+        target_yaw = np.arctan2(dx[nav], dz[nav])
+        current_yaw = self.rotation[nav, 1]
+
+        # Calculate angle error, wrapped into [-pi, pi]
+        angle_error = target_yaw - current_yaw
+        two_pi = 2 * math.pi
+        angle_error -= two_pi * np.maximum(np.ceil((angle_error - math.pi) / two_pi), 0.0)
+        angle_error += two_pi * np.maximum(np.ceil((-math.pi - angle_error) / two_pi), 0.0)
+
+        # Rotate toward target
+        new_yaw = current_yaw + angle_error * 4.0 * dt
+
+        # Move forward at constant speed
+        speed = self.RETROGRADE_SPEED
+        sin_yaw = np.sin(new_yaw)
+        cos_yaw = np.cos(new_yaw)
+        self.position[nav, 0] += sin_yaw * speed * dt
+        self.position[nav, 2] += cos_yaw * speed * dt
+        self.rotation[nav, 1] = new_yaw
+        self.velocity[nav, 0] = sin_yaw * speed
+        self.velocity[nav, 1] = 0.0
+        self.velocity[nav, 2] = cos_yaw * speed
+
+    def _update_normal_flight(self, mask: np.ndarray, dt: float):
+        """Update normal flight physics (arrow key controlled)"""
+        idx = np.flatnonzero(mask)
+        if idx.size == 0:
+            return
+
+        # Get control inputs
+        forward = self.controls[idx, CTRL_FORWARD]
+        yaw_input = self.controls[idx, CTRL_YAW]
+        throttle = self.controls[idx, CTRL_THROTTLE]
+
+        # Forward/backward speed
+        speed = self.speed[idx]
+        speed = np.where(
+            forward > 0,
+            np.minimum(self.MAX_SPEED, speed + self.ACCELERATION * dt * forward),
+            np.where(
+                forward < 0,
+                np.maximum(-self.MAX_REVERSE_SPEED, speed + self.DECELERATION * dt * forward),
+                # Apply drag and clamp to zero when very slow
+                speed * self.DRAG
+            )
+        )
+        speed[(forward == 0) & (np.abs(speed) < 0.05)] = 0.0
+
+        # Speed-aware yaw (from reference)
+        speed_factor = np.minimum(np.abs(speed) / 6.0, 1.0)
+        yaw_rate = np.where(
+            yaw_input != 0,
+            yaw_input * self.BASE_YAW_RATE * (0.5 + speed_factor),
+            self.yaw_rate[idx] * 0.85
+        )
+        yaw_rate[(yaw_input == 0) & (np.abs(yaw_rate) < 0.05)] = 0.0
+
+        # Integrate rotation
+        yaw = self.rotation[idx, 1] + yaw_rate * dt
+
+        # Integrate position (2D ground plane movement)
+        sin_yaw = np.sin(yaw)
+        cos_yaw = np.cos(yaw)
+        pos = self.position[idx]
+        pos[:, 0] += sin_yaw * speed * dt
+        pos[:, 2] += cos_yaw * speed * dt
+
+        # Throttle controls height above ground (clamped), ground collision; the
+        # terrain follow in step() carries that height over the new ground
+        ground = self.ground[idx]
+        height = pos[:, 1] - ground
+        climbing = throttle > 0.1
+        height[climbing] = np.clip(height[climbing] + (throttle[climbing] - 0.5) * 5.0 * dt, 0, 100)
+        pos[:, 1] = ground + np.maximum(height, 0)
+
+        # Update state
+        self.speed[idx] = speed
+        self.yaw_rate[idx] = yaw_rate
+        self.rotation[idx, 1] = yaw
+        self.position[idx] = pos
+        self.velocity[idx, 0] = sin_yaw * speed
+        self.velocity[idx, 1] = 0.0
+        self.velocity[idx, 2] = cos_yaw * speed
+
+
+# ==================== PER-DRONE VIEWS ====================
+
+def _vec3_property(name: str):
+    def getter(self):
+        return tuple(getattr(self._fleet, name)[self._row].tolist())
+
+    def setter(self, value):
+        getattr(self._fleet, name)[self._row] = value
+    return property(getter, setter)
+
+
+def _scalar_property(name: str, cast=float):
+    def getter(self):
+        return cast(getattr(self._fleet, name)[self._row])
+
+    def setter(self, value):
+        getattr(self._fleet, name)[self._row] = value
+    return property(getter, setter)
+
+
+def _code_property(name: str, names: Tuple[str, ...]):
+    def getter(self):
+        return names[getattr(self._fleet, name)[self._row]]
+
+    def setter(self, value):
+        getattr(self._fleet, name)[self._row] = names.index(value)
+    return property(getter, setter)
+
+
+class DroneStateView:
+    """Live DroneState-shaped view over one row of a FleetEngine"""
+
+    __slots__ = ('_fleet', '_row')
+
+    def __init__(self, fleet: FleetEngine, row: int):
+        self._fleet = fleet
+        self._row = row
+
+    position = _vec3_property('position')
+    velocity = _vec3_property('velocity')
+    rotation = _vec3_property('rotation')
+    angular_velocity = _vec3_property('angular_velocity')
+    battery = _scalar_property('battery')
+    armed = _scalar_property('armed', bool)
+    mode = _code_property('mode', MODES)
+    gps_jam = _scalar_property('gps_jam')
+    nav_confidence = _scalar_property('nav_confidence')
+    retrograde_active = _scalar_property('retrograde', bool)
+    status = _code_property('status', STATUSES)
+    proximity = _code_property('proximity', PROXIMITY_STATES)
+    separation = _scalar_property('separation')
+
+    def to_dict(self) -> Dict:
+        """Serialize like ``asdict(DroneState)``"""
+        return {name: getattr(self, name) for name in DroneState.__dataclass_fields__}
+
+    def load(self, state: DroneState):
+        """Overwrite the row from a DroneState"""
+        for name, value in asdict(state).items():
+            setattr(self, name, value)
+
+
+class DoctrineSnapshot:
+    """One row's doctrine lists as of a FleetSnapshot.
+
+    Anchor lists are append-only (resets swap in a new DoctrineData), so a
+    slice bounded by the snapshot's ``anchor_seq`` column never sees later anchors.
+    """
+
+    __slots__ = ('breadcrumbs', 'anchor_base', 'anchor_seq', '_anchors')
+
+    def __init__(self, snapshot: 'FleetSnapshot', row: int):
+        doctrine = snapshot._doctrine[row]
+        self.breadcrumbs = BreadcrumbRing(snapshot, row)
+        self.anchor_base = int(snapshot.anchor_base[row])
+        self.anchor_seq = int(snapshot.anchor_seq[row])
+        self._anchors = doctrine.anchors if doctrine is not None else []
+
+    def anchors_since(self, seq: int) -> List[Tuple[float, float, float]]:
+        return self._anchors[max(0, seq - self.anchor_base):self.anchor_seq - self.anchor_base]
+
+
+class _DoctrineSnapshots:
+    """``snapshot.doctrine[row]``, built on demand"""
+
+    __slots__ = ('_snapshot',)
+
+    def __init__(self, snapshot: 'FleetSnapshot'):
+        self._snapshot = snapshot
+
+    def __getitem__(self, row: int) -> DoctrineSnapshot:
+        return DoctrineSnapshot(self._snapshot, row)
+
+
+class FleetSnapshot:
+    """Read-only copy of a FleetEngine taken at the end of a tick.
+
+    Exposes the same per-row arrays as the fleet (all copied and marked
+    read-only), so ``DroneStateView``, ``TelemetryEncoder`` and
+    ``FlightRecorder`` read it exactly like a live fleet. Readers on other
+    threads use it without the simulation lock. The breadcrumb ring is
+    copied too, since a full ring overwrites its oldest breadcrumb at the
+    next drop; only rows up to the highest active one are kept.
+    """
+
+    def __init__(self, fleet: FleetEngine, drones: Mapping[str, int]):
+        self.version = fleet.tick           # Ticks are monotonic, so snapshots are ordered by version
+        self.tick = fleet.tick
+        self.sim_time = fleet.sim_time
+        self.capacity = fleet.capacity
+        self.count = fleet.count
+        # Callers that already hold a frozen mapping (SimulationManager) pass it as is
+        self.drones = drones if isinstance(drones, MappingProxyType) else MappingProxyType(dict(drones))
+        self.retrograde_triggers = MappingProxyType(dict(fleet.retrograde_triggers))
+        self.proximity_events = MappingProxyType(dict(fleet.proximity_events))
+        fields = (fleet._VEC3_FIELDS + fleet._SCALAR_FIELDS + fleet._FLAG_FIELDS
+                  + fleet._CODE_FIELDS + fleet._SEQ_FIELDS + ('controls',))
+        for name in fields:
+            copy = getattr(fleet, name).copy()
+            copy.flags.writeable = False
+            setattr(self, name, copy)
+        self.breadcrumbs = fleet.ring_copy(self)
+        self._doctrine = tuple(fleet.doctrine)
+
+    @property
+    def doctrine(self) -> _DoctrineSnapshots:
+        # Built per access: a stored one would make a cycle, and snapshots must
+        # die with their last reader so ring_copy can recycle their buffer
+        return _DoctrineSnapshots(self)
+
+    def state(self, row: int) -> DroneStateView:
+        """DroneState-shaped view of one row (reads only)"""
+        return DroneStateView(self, row)
+
+
+class PhysicsEngine:
+    """A.E.G.I.S Drone physics simulation with doctrine support.
+
+    A thin per-drone view over one row of a FleetEngine. A standalone engine
+    owns a private single-row fleet.
+    """
+
+    # Physical constants
+    GRAVITY = FleetEngine.GRAVITY
+    MASS = FleetEngine.MASS
+    MAX_SPEED = FleetEngine.MAX_SPEED
+    MAX_REVERSE_SPEED = FleetEngine.MAX_REVERSE_SPEED
+    ACCELERATION = FleetEngine.ACCELERATION
+    DECELERATION = FleetEngine.DECELERATION
+    DRAG = FleetEngine.DRAG
+    BASE_YAW_RATE = FleetEngine.BASE_YAW_RATE
+
+    __slots__ = ('fleet', 'row', 'state')
+
+    def __init__(self, fleet: Optional[FleetEngine] = None, row: Optional[int] = None):
+        if fleet is None:
+            fleet = FleetEngine(capacity=1)
+        if row is None:
+            row = fleet.allocate()
+        self.fleet = fleet
+        self.row = row
+        self.state = DroneStateView(fleet, row)
+
+    @property
+    def doctrine(self) -> DoctrineData:
+        return self.fleet.doctrine[self.row]
+
+    @property
+    def control_inputs(self) -> Dict[str, float]:
+        return dict(zip(CONTROL_KEYS, self.fleet.controls[self.row].tolist()))
+
+    @property
+    def speed(self) -> float:
+        return float(self.fleet.speed[self.row])
+
+    @speed.setter
+    def speed(self, value: float):
+        self.fleet.speed[self.row] = value
+
+    @property
+    def yaw_rate(self) -> float:
+        return float(self.fleet.yaw_rate[self.row])
+
+    @yaw_rate.setter
+    def yaw_rate(self, value: float):
+        self.fleet.yaw_rate[self.row] = value
+
+    def update(self, dt: float):
+        """Update physics with A.E.G.I.S doctrine (standalone engines only).
+
+        A step advances the fleet's shared clock, so drones sharing a fleet are
+        advanced together with one ``FleetEngine.step`` per tick instead.
+        """
+        if self.fleet.count > 1:
+            raise RuntimeError(f'Row {self.row} shares its fleet with {self.fleet.count - 1} other drones; '
+                               'advance them with FleetEngine.step')
+        self.fleet.step(dt)
+
+    def _start_retrograde(self, commander_override=False):
+        """Start automatic retrograde return along verified anchors"""
+        self.fleet.start_retrograde(self.row, commander_override)
+
+    def log_anchor(self):
+        """Drop a verified anchor at current position"""
+        if self.state.nav_confidence >= THRESH_REJECT:
+            self.fleet.add_anchor(self.row, self.state.position)
+            return True
+        return False
+
+    def neighbors(self, radius: float = SEPARATION_RADIUS) -> Tuple[np.ndarray, np.ndarray]:
+        """Nearby airborne drones as fleet rows and distances, nearest first"""
+        return self.fleet.neighbors(self.row, radius)
+
+    def adjust_jam(self, delta: float) -> float:
+        """Shift the operator's GPS jam level (clamped 0-100) and return the drone's jam level"""
+        return self.fleet.set_jam(self.row, self.fleet.jam_operator[self.row] + delta)
+
+    def adjust_stress(self, delta: float) -> float:
+        """Former name of ``adjust_jam`` (integrity stress became the GPS jam level)"""
+        return self.adjust_jam(delta)
+
+    def set_controls(self, **kwargs):
+        """Set control inputs"""
+        controls = self.fleet.controls[self.row]
+        for key, value in kwargs.items():
+            if key in CONTROL_KEYS:
+                controls[CONTROL_KEYS.index(key)] = min(1.0, max(-1.0, float(value)))
+
+    def arm(self):
+        """Arm the drone"""
+        # Force battery reset ensures we can always arm
+        if self.state.battery <= 10:
+             self.state.battery = 100.0
+
+        self.state.armed = True
+        self.doctrine.breadcrumbs.clear()  # Clear breadcrumbs on arm
+        self.fleet.last_breadcrumb_time[self.row] = self.fleet.sim_time
+
+    def disarm(self):
+        """Disarm the drone"""
+        self.state.armed = False
+
+    def reset(self):
+        """Reset drone to initial state"""
+        self.fleet.reset_row(self.row)
@@ -0,0 +1,174 @@
+"""
+A.E.G.I.S Retrograde Planner
+Shortest return route over the graph of verified anchors.
+
+Anchors become graph nodes as they are logged. Two anchors are joined when
+they are within the safe-hop radius of each other (found through a uniform
+grid), and consecutive anchors are always joined because the drone has
+already flown that leg. The origin is joined to the first anchor and to any
+anchor within range.
+
+Distances to the origin are kept up to date incrementally. Each new anchor
+relaxes its neighbourhood Dijkstra-style, so planning at RTB time needs no
+search. The planner picks the best first hop from the drone's position and
+follows next-hop pointers home, in O(candidates + route length).
+
+A graph restored from a checkpoint queues its anchors with ``defer`` and
+inserts them on first use, so restoring a fleet costs nothing per anchor
+until a drone actually plans or logs again.
+"""
+
+from collections import deque
+from heapq import heappop, heappush
+from typing import Deque, Dict, List, Tuple
+import math
+
+import numpy as np
+
+Point = Tuple[float, float, float]
+
+ORIGIN_NODE = -1
+DIRECT_SCAN_LIMIT = 512     # Below this many anchors, neighbor queries scan every anchor
+INITIAL_NODES = 16          # Node slots allocated with a graph's first anchor
+_NEIGHBOR_CELLS = [(dx, dy, dz) for dx in (-1, 0, 1) for dy in (-1, 0, 1) for dz in (-1, 0, 1)]
+# Shared by every empty graph; only ever replaced, never written
+_NO_POINTS = np.zeros((0, 3))
+_NO_DIST = np.zeros(0)
+_NO_POINTS.flags.writeable = False
+_NO_DIST.flags.writeable = False
+
+
+def _distance(a: Point, b: Point) -> float:
+    return math.sqrt((a[0] - b[0]) ** 2 + (a[1] - b[1]) ** 2 + (a[2] - b[2]) ** 2)
+
+
+class AnchorGraph:
+    """Verified-anchor graph with incremental shortest paths to the origin"""
+
+    __slots__ = ('origin', 'radius', 'count', 'points', 'dist', 'next_hop', 'edges', 'grid', '_deferred')
+
+    def __init__(self, origin: Point, radius: float):
+        self.origin = tuple(origin)
+        self.radius = radius
+        self.count = 0
+        # Every drone owns a graph, so node arrays start empty and grow on the first anchor
+        self.points = _NO_POINTS                          # node -> position
+        self.dist = _NO_DIST                              # node -> route length to origin
+        self.next_hop: List[int] = []                     # node -> next node toward origin
+        self.edges: List[List[Tuple[int, float]]] = []    # node -> [(neighbor, length)]
+        self.grid: Dict[Tuple[int, int, int], List[int]] = {}
+        self._deferred: Tuple[Point, ...] = ()            # Anchors queued by defer()
+
+    def __len__(self) -> int:
+        return self.count + len(self._deferred)
+
+    def defer(self, points: List[Point]):
+        """Queue anchors to insert, in order, the next time the graph is used"""
+        self._deferred += tuple(points)
+
+    def _settle(self):
+        deferred, self._deferred = self._deferred, ()
+        for point in deferred:
+            self.add(point)
+
+    def _cell(self, point: Point) -> Tuple[int, int, int]:
+        size = self.radius
+        return (math.floor(point[0] / size), math.floor(point[1] / size), math.floor(point[2] / size))
+
+    def neighbors(self, point: Point) -> Tuple[np.ndarray, np.ndarray]:
+        """Anchors within the safe-hop radius of ``point``: (nodes, distances)"""
+        if self._deferred:
+            self._settle()
+        if self.count <= DIRECT_SCAN_LIMIT:
+            # Small graphs: one vectorised pass beats walking 27 grid cells
+            nodes = np.arange(self.count)
+        else:
+            cx, cy, cz = self._cell(point)
+            grid = self.grid
+            found: List[int] = []
+            for dx, dy, dz in _NEIGHBOR_CELLS:
+                cell = grid.get((cx + dx, cy + dy, cz + dz))
+                if cell:
+                    found.extend(cell)
+            nodes = np.array(found, dtype=np.int64)
+        lengths = np.sqrt(((self.points[nodes] - point) ** 2).sum(axis=1))
+        close = lengths <= self.radius
+        return nodes[close], lengths[close]
+
+    def add(self, point: Point):
+        """Insert a verified anchor and repair shortest paths around it"""
+        if self._deferred:
+            self._settle()
+        point = tuple(float(v) for v in point)
+        node = self.count
+        nodes, lengths = self.neighbors(point)
+        links = dict(zip(nodes.tolist(), lengths.tolist()))
+        # The leg just flown is always safe
+        if node:
+            links.setdefault(node - 1, _distance(point, tuple(self.points[node - 1])))
+        to_origin = _distance(point, self.origin)
+        if to_origin <= self.radius or not node:
+            links[ORIGIN_NODE] = to_origin
+
+        if node == len(self.dist):
+            extra = max(INITIAL_NODES, node)
+            self.points = np.concatenate([self.points, np.zeros((extra, 3))])
+            self.dist = np.concatenate([self.dist, np.zeros(extra)])
+        self.points[node] = point
+        self.count += 1
+        self.edges.append([])
+        best, best_hop = math.inf, ORIGIN_NODE
+        dist = self.dist
+        for other, length in links.items():
+            self.edges[node].append((other, length))
+            if other == ORIGIN_NODE:
+                via = length
+            else:
+                self.edges[other].append((node, length))
+                via = dist[other] + length
+            if via < best:
+                best, best_hop = via, other
+        dist[node] = best
+        self.next_hop.append(best_hop)
+        self.grid.setdefault(self._cell(point), []).append(node)
+
+        # Relax outward from the new node (only improves, never worsens)
+        heap = [(best, node)]
+        while heap:
+            d, u = heappop(heap)
+            if d > dist[u]:
+                continue
+            for v, length in self.edges[u]:
+                if v != ORIGIN_NODE and d + length < dist[v]:
+                    dist[v] = d + length
+                    self.next_hop[v] = u
+                    heappush(heap, (d + length, v))
+
+    def route(self, position: Point) -> Deque[Point]:
+        """Shortest verified route from ``position`` home, ending at the origin.
+
+        The first hop is the latest anchor (as flown), any anchor within the
+        safe-hop radius, or the origin itself when it is in range.
+        """
+        if self._deferred:
+            self._settle()
+        position = tuple(position)
+        if not self.count:
+            return deque([self.origin])
+        nodes, lengths = self.neighbors(position)
+        latest = self.count - 1
+        nodes = np.append(nodes, latest)
+        lengths = np.append(lengths, _distance(position, tuple(self.points[latest])))
+        costs = lengths + self.dist[nodes]
+        best = int(np.argmin(costs))
+        node = int(nodes[best])
+        if _distance(position, self.origin) <= min(self.radius, costs[best]):
+            return deque([self.origin])
+
+        route = deque()
+        points, next_hop = self.points, self.next_hop
+        while node != ORIGIN_NODE:
+            route.append(tuple(points[node].tolist()))
+            node = next_hop[node]
+        route.append(self.origin)
+        return route
@@ -0,0 +1,161 @@
+"""
+A.E.G.I.S Proximity Index
+Uniform-grid spatial index for fleet separation and collision checks.
+
+The grid is rebuilt in bulk every tick: drone positions are bucketed into
+cubic cells keyed by a packed int64, and the keys are sorted once. A cell's
+members are then one contiguous slice of the sorted arrays. Nearest-neighbour
+search pairs each cell with itself and with the 13 of its 26 neighbours that
+sort after it, found with one ``searchsorted`` over the occupied cells, so
+every pair is examined exactly once and all of it stays vectorised. Cost is
+linear in the fleet and quadratic only in how many distinct positions share
+a cell, which physical separation keeps small.
+"""
+
+from typing import Optional, Tuple
+import math
+
+import numpy as np
+
+_AXIS_BITS = 21
+_AXIS_LIMIT = 1 << _AXIS_BITS
+_BIAS = _AXIS_LIMIT // 2                # Cells are offset so negative coordinates pack cleanly
+
+
+def _pack(cells: np.ndarray) -> np.ndarray:
+    """int64 key per (x, y, z) cell; neighbouring cells differ by a fixed delta"""
+    cells = np.clip(cells + _BIAS, 1, _AXIS_LIMIT - 2)
+    return (cells[:, 0] << (2 * _AXIS_BITS)) | (cells[:, 1] << _AXIS_BITS) | cells[:, 2]
+
+
+def _delta(dx: int, dy: int, dz: int) -> int:
+    return (dx << (2 * _AXIS_BITS)) + (dy << _AXIS_BITS) + dz
+
+
+# The cell itself plus the 13 neighbours that sort after it
+_FORWARD_DELTAS = [_delta(dx, dy, dz)
+                   for dx in (-1, 0, 1) for dy in (-1, 0, 1) for dz in (-1, 0, 1)
+                   if (dx, dy, dz) >= (0, 0, 0)]
+
+
+class ProximityIndex:
+    """Uniform grid over a set of points, each tagged with its fleet row.
+
+    Coincident points (drones flown with identical inputs) are collapsed to
+    one entry for pair search, so a stacked formation costs no more than a
+    single drone.
+    """
+
+    def __init__(self, cell_size: float):
+        self.cell_size = float(cell_size)
+        self.rows = np.zeros(0, dtype=np.int64)      # Sorted by cell key, then position
+        self.points = np.zeros((0, 3))
+        self.keys = np.zeros(0, dtype=np.int64)
+        self.distinct = np.zeros(0, dtype=np.int64)  # First index of each run of coincident points
+        self.copies = np.zeros(0, dtype=np.int64)    # Length of each run
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def _cells(self, points: np.ndarray) -> np.ndarray:
+        return np.floor(points / self.cell_size).astype(np.int64)
+
+    def build(self, points: np.ndarray, rows: np.ndarray):
+        """Replace the index contents with ``points`` (one per fleet row in ``rows``)"""
+        points = np.asarray(points, dtype=np.float64).reshape(-1, 3)
+        keys = _pack(self._cells(points))
+        order = np.argsort(keys, kind='stable')
+        count = len(keys)
+        # Within shared cells, also order by position so coincident points are adjacent
+        sorted_keys = keys[order]
+        shared = np.zeros(count, dtype=bool)
+        if count > 1:
+            same = sorted_keys[1:] == sorted_keys[:-1]
+            shared[1:] |= same
+            shared[:-1] |= same
+        if shared.any():
+            members = order[shared]
+            at = members[np.lexsort((points[members, 2], points[members, 1], points[members, 0],
+                                     keys[members]))]
+            order[shared] = at
+        self.keys = keys[order]
+        self.points = points[order]
+        self.rows = np.asarray(rows, dtype=np.int64)[order]
+        starts = np.ones(count, dtype=bool)
+        starts[1:] = (self.points[1:] != self.points[:-1]).any(axis=1)
+        self.distinct = np.flatnonzero(starts)
+        self.copies = np.diff(np.append(self.distinct, count))
+
+    def _pairs(self, radius: float) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Pairs of distinct positions closer than ``radius``, as indices into ``distinct``"""
+        keys = self.keys[self.distinct]
+        points = self.points[self.distinct]
+        count = len(keys)
+        empty = np.zeros(0, dtype=np.int64)
+        if not count:
+            return empty, empty, np.zeros(0)
+        index = np.arange(count)
+        # Occupied cells: where each one's slice of the sorted arrays starts and ends
+        starts = np.concatenate([[0], np.flatnonzero(np.diff(keys)) + 1])
+        ends = np.append(starts[1:], count)
+        cells = keys[starts]
+        cell_of = np.repeat(np.arange(len(cells)), ends - starts)
+        firsts, seconds = [], []
+        for delta in _FORWARD_DELTAS:
+            if delta == 0:
+                lo = index + 1                              # Same cell: only later members
+                hi = ends[cell_of]
+            else:
+                found = np.minimum(np.searchsorted(cells, cells + delta), len(cells) - 1)
+                hit = cells[found] == cells + delta
+                if not hit.any():
+                    continue
+                lo = starts[found][cell_of]
+                hi = np.where(hit, ends[found], starts[found])[cell_of]
+            spans = hi - lo
+            total = int(spans.sum())
+            if not total:
+                continue
+            first = np.repeat(index, spans)
+            run_start = np.repeat(np.cumsum(spans) - spans, spans)
+            firsts.append(first)
+            seconds.append(lo[first] + (np.arange(total) - run_start))
+        if not firsts:
+            return empty, empty, np.zeros(0)
+        first, second = np.concatenate(firsts), np.concatenate(seconds)
+        distances = np.sqrt(((points[first] - points[second]) ** 2).sum(axis=1))
+        close = distances <= radius
+        return first[close], second[close], distances[close]
+
+    def nearest(self, radius: Optional[float] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """Every row with another point within ``radius`` (at most the cell size): (rows, nearest distance)"""
+        radius = self.cell_size if radius is None else radius
+        if radius > self.cell_size:
+            raise ValueError(f'Search radius {radius} exceeds the grid cell size {self.cell_size}')
+        first, second, distances = self._pairs(radius)
+        best = np.full(len(self.distinct), np.inf)
+        np.minimum.at(best, first, distances)
+        np.minimum.at(best, second, distances)
+        best[self.copies > 1] = 0.0
+        best = np.repeat(best, self.copies)
+        close = best <= radius
+        return self.rows[close], best[close]
+
+    def query(self, point, radius: float) -> Tuple[np.ndarray, np.ndarray]:
+        """Rows within ``radius`` of ``point`` (any radius): (rows, distances), nearest first"""
+        if not len(self.keys):
+            return np.zeros(0, dtype=np.int64), np.zeros(0)
+        point = np.asarray(point, dtype=np.float64).reshape(1, 3)
+        reach = max(1, math.ceil(radius / self.cell_size))
+        span = np.arange(-reach, reach + 1)
+        offsets = np.stack(np.meshgrid(span, span, span, indexing='ij'), axis=-1).reshape(-1, 3)
+        targets = np.unique(_pack(self._cells(point) + offsets))
+        lo = np.searchsorted(self.keys, targets, side='left')
+        hi = np.searchsorted(self.keys, targets, side='right')
+        members = np.concatenate([np.arange(a, b) for a, b in zip(lo.tolist(), hi.tolist()) if b > a]
+                                 or [np.zeros(0, dtype=np.int64)])
+        distances = np.sqrt(((self.points[members] - point) ** 2).sum(axis=1))
+        close = distances <= radius
+        members, distances = members[close], distances[close]
+        order = np.argsort(distances, kind='stable')
+        return self.rows[members[order]], distances[order]
@@ -0,0 +1,453 @@
+"""
+A.E.G.I.S Flight Recorder
+Append-only per-session recordings of every simulation tick.
+
+Each drone session writes three files named ``<started>_<drone_id>``:
+
+    .rec   128-byte header, then one fixed-size RECORD_DTYPE record per tick
+    .idx   sparse time index: (record number, sim_time) every INDEX_INTERVAL records
+    .anc   ANCHOR_DTYPE record for every verified anchor, by sequence number
+
+Records are sorted by sim_time, so reading a time window is a lookup in the
+small index followed by a search inside one memory-mapped slab of at most
+INDEX_INTERVAL records. Nothing is scanned.
+
+The simulation thread only copies fleet rows into a numpy block and queues
+it (``capture``). A background writer appends the blocks. Queued data is
+bounded by a byte budget. When the writer falls behind, whole ticks are
+dropped and counted rather than ever blocking the loop.
+"""
+
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+import os
+import queue
+import re
+import struct
+import sys
+import threading
+import time
+
+import numpy as np
+
+RECORDER_VERSION = 1
+INDEX_INTERVAL = 64          # Records between sparse index entries
+FLUSH_INTERVAL = 0.25        # Seconds between writer drains
+
+MAGIC = b'AEGISREC'
+HEADER = struct.Struct('<8sHHd64s')   # magic, version, record size, started_at (unix), drone_id
+HEADER_SIZE = 128
+
+RECORD_DTYPE = np.dtype([
+    ('tick', '<u8'),
+    ('sim_time', '<f8'),
+    ('position', '<f4', (3,)),
+    ('velocity', '<f4', (3,)),
+    ('rotation', '<f4', (3,)),
+    ('angular_velocity', '<f4', (3,)),
+    ('target', '<f4', (3,)),
+    ('controls', '<f4', (6,)),
+    ('speed', '<f4'),
+    ('yaw_rate', '<f4'),
+    ('battery', '<f4'),
+    ('nav_confidence', '<f4'),
+    ('gps_jam', '<f4'),
+    ('separation', '<f4'),
+    ('anchor_base', '<u4'),
+    ('anchor_seq', '<u4'),
+    ('breadcrumb_start', '<u4'),
+    ('breadcrumb_seq', '<u4'),
+    ('return_queue_len', '<u2'),
+    ('mode', 'u1'),
+    ('status', 'u1'),
+    ('proximity', 'u1'),
+    ('flags', 'u1'),             # armed | retrograde << 1 | has_target << 2
+])
+INDEX_DTYPE = np.dtype([('record', '<u8'), ('sim_time', '<f8')])
+ANCHOR_DTYPE = np.dtype([('seq', '<u4'), ('sim_time', '<f8'), ('point', '<f4', (3,))])
+
+FLAG_ARMED, FLAG_RETROGRADE, FLAG_HAS_TARGET = 1, 2, 4
+
+# Fleet arrays copied verbatim into records of the same name
+_COPIED = ('position', 'velocity', 'rotation', 'angular_velocity', 'target', 'controls',
+           'speed', 'yaw_rate', 'battery', 'nav_confidence', 'gps_jam', 'separation',
+           'breadcrumb_start', 'breadcrumb_seq', 'return_queue_len', 'mode', 'status', 'proximity')
+
+
+def offload(fn: Callable, *args):
+    """Call ``fn(*args)`` for a background writer, on a real OS thread under eventlet.
+
+    Once eventlet has patched ``threading`` the writers are green threads, and
+    a large write or an fsync would stall every socket on the hub until it
+    returned. ``fn`` must not touch locks or events shared with green threads.
+    """
+    if 'eventlet' in sys.modules:
+        from eventlet import patcher, tpool
+        if patcher.is_monkey_patched('thread'):
+            return tpool.execute(fn, *args)
+    return fn(*args)
+
+
+def session_name(drone_id: str, started_at: float) -> str:
+    """File stem for a session: UTC start time plus a filesystem-safe drone ID"""
+    stamp = time.strftime('%Y%m%dT%H%M%SZ', time.gmtime(started_at))
+    return f"{stamp}_{re.sub(r'[^A-Za-z0-9_.-]', '_', drone_id)}"
+
+
+class _Session:
+    """One drone's recording; file handles belong to the writer thread"""
+
+    def __init__(self, directory: str, drone_id: str, row: int):
+        self.drone_id = drone_id
+        self.row = row
+        self.started_at = time.time()
+        self.name = session_name(drone_id, self.started_at)
+        self.base = os.path.join(directory, self.name)
+        self.anchor_seq = 0                     # Next anchor sequence not yet recorded (capture side)
+        self.records = 0                        # Records written so far (writer side)
+        self.files = None
+
+    def open(self):
+        self.files = {}
+        for ext in ('.rec', '.idx', '.anc'):
+            self.files[ext] = open(self.base + ext, 'ab')
+        header = HEADER.pack(MAGIC, RECORDER_VERSION, RECORD_DTYPE.itemsize, self.started_at,
+                             self.drone_id.encode('utf-8')[:64])
+        self.files['.rec'].write(header.ljust(HEADER_SIZE, b'\0'))
+
+    def append(self, records: np.ndarray):
+        self.files['.rec'].write(records.tobytes())
+        # Index every record whose number is a multiple of INDEX_INTERVAL
+        first = -self.records % INDEX_INTERVAL
+        marks = np.arange(first, len(records), INDEX_INTERVAL)
+        if len(marks):
+            index = np.empty(len(marks), dtype=INDEX_DTYPE)
+            index['record'] = self.records + marks
+            index['sim_time'] = records['sim_time'][marks]
+            self.files['.idx'].write(index.tobytes())
+        self.records += len(records)
+
+    def append_anchors(self, anchors: np.ndarray):
+        self.files['.anc'].write(anchors.tobytes())
+
+    def flush(self):
+        for handle in self.files.values():
+            handle.flush()
+
+    def close(self):
+        files, self.files = self.files, None
+        for handle in files.values():
+            handle.close()
+
+
+class FlightRecorder:
+    """Captures fleet rows every tick and appends them on a background writer.
+
+    ``open_session``, ``close_session`` and ``capture`` run on the simulation
+    side (with the simulation lock held). Everything that touches the disk
+    runs on the writer thread, through ``offload``.
+    """
+
+    def __init__(self, directory: str, buffer_bytes: int = 64 << 20, flush_interval: float = FLUSH_INTERVAL):
+        self.directory = directory
+        self.buffer_bytes = buffer_bytes
+        self.flush_interval = flush_interval
+        os.makedirs(directory, exist_ok=True)
+        self.sessions: Dict[str, _Session] = {}
+        self._members: Tuple[_Session, ...] = ()
+        self._rows = np.zeros(0, dtype=np.int64)
+        self._cursors = np.zeros(0, dtype=np.int64)   # Each member's anchor_seq, kept in step by capture
+        self._queue: 'queue.SimpleQueue' = queue.SimpleQueue()
+        self._lock = threading.Lock()           # Guards pending_bytes
+        self.pending_bytes = 0
+        self.captured_records = 0
+        self.written_records = 0
+        self.dropped_records = 0
+        self.dropped_ticks = 0
+        self.failed_writes = 0
+        self._failed: List[_Session] = []       # Sessions the writer gave up on (list ops are atomic)
+        self._stopping = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='flight-recorder', daemon=True)
+        self._thread.start()
+
+    # ---------- simulation side ----------
+
+    def _membership_changed(self):
+        self._members = tuple(self.sessions.values())
+        self._rows = np.array([session.row for session in self._members], dtype=np.int64)
+        self._cursors = np.array([session.anchor_seq for session in self._members], dtype=np.int64)
+
+    def open_session(self, drone_id: str, row: int, anchor_seq: int = 0) -> str:
+        """Start recording a drone; returns the session file stem"""
+        self.close_session(drone_id)
+        session = _Session(self.directory, drone_id, row)
+        session.anchor_seq = anchor_seq
+        self.sessions[drone_id] = session
+        self._membership_changed()
+        self._queue.put(('open', session))
+        return session.name
+
+    def close_session(self, drone_id: str):
+        """Stop recording a drone; its files are closed once queued ticks are written"""
+        session = self.sessions.pop(drone_id, None)
+        if session is not None:
+            self._membership_changed()
+            self._queue.put(('close', session))
+
+    def capture(self, fleet):
+        """Queue one record per recorded drone for the current tick (never blocks)"""
+        if self._failed:
+            self._drop_failed()
+        members, rows = self._members, self._rows
+        if not members:
+            return
+        nbytes = len(rows) * RECORD_DTYPE.itemsize
+        self.captured_records += len(rows)
+        with self._lock:
+            if self.pending_bytes + nbytes > self.buffer_bytes:
+                self.dropped_records += len(rows)
+                self.dropped_ticks += 1
+                return
+            self.pending_bytes += nbytes
+
+        records = np.empty(len(rows), dtype=RECORD_DTYPE)
+        records['tick'] = fleet.tick
+        records['sim_time'] = fleet.sim_time
+        for name in _COPIED:
+            records[name] = getattr(fleet, name)[rows]
+        records['flags'] = (fleet.armed[rows] * FLAG_ARMED | fleet.retrograde[rows] * FLAG_RETROGRADE
+                            | fleet.has_target[rows] * FLAG_HAS_TARGET)
+
+        records['anchor_base'] = fleet.anchor_base[rows]
+        anchor_seq = fleet.anchor_seq[rows]
+        records['anchor_seq'] = anchor_seq
+        # Doctrine objects are only touched for the few sessions that logged an anchor
+        for index in np.flatnonzero(anchor_seq != self._cursors).tolist():
+            self._capture_anchors(members[index], fleet.doctrine[int(rows[index])], fleet.sim_time)
+            self._cursors[index] = members[index].anchor_seq
+        self._queue.put(('tick', members, records))
+
+    def _drop_failed(self):
+        # The writer has already closed these sessions' files
+        while self._failed:
+            session = self._failed.pop()
+            if self.sessions.get(session.drone_id) is session:
+                del self.sessions[session.drone_id]
+                self._membership_changed()
+
+    def _capture_anchors(self, session: _Session, doctrine, sim_time: float):
+        points = doctrine.anchors_since(session.anchor_seq)
+        first = doctrine.anchor_seq - len(points)
+        anchors = np.empty(len(points), dtype=ANCHOR_DTYPE)
+        anchors['seq'] = np.arange(first, doctrine.anchor_seq)
+        anchors['sim_time'] = sim_time
+        anchors['point'] = np.asarray(points, dtype=np.float32).reshape(-1, 3)
+        session.anchor_seq = doctrine.anchor_seq
+        self._queue.put(('anchors', session, anchors))
+
+    def stats(self) -> Dict:
+        return {
+            'sessions': len(self.sessions),
+            'captured_records': self.captured_records,
+            'written_records': self.written_records,
+            'dropped_records': self.dropped_records,
+            'dropped_ticks': self.dropped_ticks,
+            'failed_writes': self.failed_writes,
+            'pending_bytes': self.pending_bytes,
+        }
+
+    def close(self):
+        """Write everything queued, close all files and stop the writer"""
+        for drone_id in list(self.sessions):
+            self.close_session(drone_id)
+        self._stopping.set()
+        self._thread.join()
+
+    # ---------- writer thread ----------
+
+    def _run(self):
+        while True:
+            stopping = self._stopping.wait(self.flush_interval)
+            items = []
+            while True:
+                try:
+                    items.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            if items:
+                # Every tick taken off the queue gives its bytes back, written or not
+                released = sum(item[2].nbytes for item in items if item[0] == 'tick')
+                try:
+                    offload(self._write, items)
+                except Exception as e:
+                    self.failed_writes += 1
+                    print(f'Flight recorder write failed: {e!r}')
+                with self._lock:
+                    self.pending_bytes -= released
+            if stopping:
+                return
+
+    def _attempt(self, session: _Session, fn: Callable, *args) -> bool:
+        """Run one disk operation for ``session``; a failure closes the session and returns False"""
+        try:
+            fn(*args)
+            return True
+        except OSError as e:
+            self.failed_writes += 1
+            print(f'Flight recording {session.name} failed, closing it: {e}')
+            if session.files is not None:
+                try:
+                    session.close()
+                except OSError:
+                    pass
+            self._failed.append(session)
+            return False
+
+    def _write(self, items: List[tuple]):
+        """Write queued items to disk (see ``offload``)"""
+        touched = set()
+        ticks: List[np.ndarray] = []
+        members = None
+
+        def write_ticks():
+            # Consecutive ticks with the same sessions become one write per session
+            if not ticks:
+                return
+            block = np.stack(ticks)
+            for column, session in enumerate(members):
+                if session.files is not None and self._attempt(session, session.append, block[:, column]):
+                    touched.add(session)
+                    self.written_records += len(block)
+            ticks.clear()
+
+        for item in items:
+            kind = item[0]
+            if kind == 'tick':
+                if item[1] is not members:
+                    write_ticks()
+                    members = item[1]
+                ticks.append(item[2])
+                continue
+            write_ticks()
+            session = item[1]
+            if kind == 'open':
+                self._attempt(session, session.open)
+            elif session.files is None:
+                continue                        # Failed earlier; nothing left to write or close
+            elif kind == 'anchors':
+                if self._attempt(session, session.append_anchors, item[2]):
+                    touched.add(session)
+            elif kind == 'close':
+                touched.discard(session)
+                self._attempt(session, session.close)
+        write_ticks()
+        for session in touched:
+            if session.files is not None:
+                self._attempt(session, session.flush)
+
+
+# ==================== READING ====================
+
+class FlightRecording:
+    """Read-only memory-mapped view of one recorded session.
+
+    Sees the records present when opened; open it again to follow a live session.
+    """
+
+    def __init__(self, path: str):
+        self.base = path[:-4] if path.endswith(('.rec', '.idx', '.anc')) else path
+        with open(self.base + '.rec', 'rb') as handle:
+            magic, version, record_size, started_at, drone_id = HEADER.unpack(handle.read(HEADER.size))
+        if magic != MAGIC or version != RECORDER_VERSION or record_size != RECORD_DTYPE.itemsize:
+            raise ValueError(f'{self.base}.rec is not a version {RECORDER_VERSION} flight recording')
+        self.name = os.path.basename(self.base)
+        self.started_at = started_at
+        self.drone_id = drone_id.rstrip(b'\0').decode('utf-8')
+
+        # A writer may be mid-record; only whole records are mapped
+        count = (os.path.getsize(self.base + '.rec') - HEADER_SIZE) // RECORD_DTYPE.itemsize
+        self.records = (np.memmap(self.base + '.rec', dtype=RECORD_DTYPE, mode='r', offset=HEADER_SIZE,
+                                  shape=(count,)) if count > 0 else np.zeros(0, dtype=RECORD_DTYPE))
+        index = np.fromfile(self.base + '.idx', dtype=INDEX_DTYPE) if os.path.exists(self.base + '.idx') \
+            else np.zeros(0, dtype=INDEX_DTYPE)
+        self.index = index[index['record'] < count]
+        self.anchors = np.fromfile(self.base + '.anc', dtype=ANCHOR_DTYPE) if os.path.exists(self.base + '.anc') \
+            else np.zeros(0, dtype=ANCHOR_DTYPE)
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+    @property
+    def start_time(self) -> Optional[float]:
+        return float(self.records[0]['sim_time']) if len(self.records) else None
+
+    @property
+    def end_time(self) -> Optional[float]:
+        return float(self.records[-1]['sim_time']) if len(self.records) else None
+
+    def locate(self, sim_time: float) -> int:
+        """Number of the first record at or after ``sim_time``"""
+        slot = int(np.searchsorted(self.index['sim_time'], sim_time, side='right')) - 1
+        lo = int(self.index['record'][slot]) if slot >= 0 else 0
+        hi = int(self.index['record'][slot + 1]) + 1 if slot + 1 < len(self.index) else len(self.records)
+        return lo + int(np.searchsorted(self.records['sim_time'][lo:hi], sim_time, side='left'))
+
+    def window(self, start: float, end: float) -> np.ndarray:
+        """Records with ``start <= sim_time < end`` (a view into the mapped file)"""
+        return self.records[self.locate(start):self.locate(end)]
+
+    def chunks(self, start: int = 0, size: int = INDEX_INTERVAL) -> Iterator[np.ndarray]:
+        """Successive slabs of records from record number ``start``, read as they are consumed"""
+        for offset in range(start, len(self.records), size):
+            yield self.records[offset:offset + size]
+
+    def anchors_between(self, first_seq: int, next_seq: int) -> np.ndarray:
+        """Anchor points with sequence numbers in ``[first_seq, next_seq)``"""
+        seqs = self.anchors['seq']
+        lo, hi = np.searchsorted(seqs, first_seq), np.searchsorted(seqs, next_seq)
+        return self.anchors['point'][lo:hi]
+
+    def summary(self) -> Dict:
+        return {
+            'name': self.name,
+            'drone_id': self.drone_id,
+            'started_at': self.started_at,
+            'records': len(self.records),
+            'start_time': self.start_time,
+            'end_time': self.end_time,
+            'anchors': len(self.anchors),
+        }
+
+
+# .rec path -> ((.rec size, .rec mtime, .anc size), summary), so listing only stats unchanged sessions
+_summaries: Dict[str, Tuple[Tuple[int, int, int], Dict]] = {}
+
+
+def _file_key(base: str) -> Tuple[int, int, int]:
+    rec = os.stat(base + '.rec')
+    anc_size = os.path.getsize(base + '.anc') if os.path.exists(base + '.anc') else -1
+    return rec.st_size, rec.st_mtime_ns, anc_size
+
+
+def list_recordings(directory: str) -> List[Dict]:
+    """Summaries of every session in ``directory``, newest first.
+
+    A session is only opened again once its files change (a live one after each flush).
+    """
+    filenames = sorted(os.listdir(directory), reverse=True) if os.path.isdir(directory) else []
+    summaries = []
+    seen = set()
+    for filename in filenames:
+        if filename.endswith('.rec'):
+            path = os.path.join(directory, filename)
+            seen.add(path)
+            try:
+                key = _file_key(path[:-4])
+                cached = _summaries.get(path)
+                if cached is None or cached[0] != key:
+                    cached = _summaries[path] = (key, FlightRecording(path).summary())
+            except (OSError, ValueError, struct.error):
+                continue
+            summaries.append(cached[1])
+    for path in [path for path in _summaries if os.path.dirname(path) == directory and path not in seen]:
+        del _summaries[path]
+    return summaries
@@ -0,0 +1,308 @@
+"""
+A.E.G.I.S Session Replay
+Streams recorded sessions back to clients as ordinary drone_update frames.
+
+Each replay stream owns one row of a private replay fleet. Every broadcast
+tick it advances a playback clock, reads forward through the recording one
+memory-mapped slab at a time, and loads the latest record into its row. The
+regular TelemetryEncoder then turns the row into binary frames, so the
+frontend needs no separate decoder.
+
+A stream is encoded once per tick and emitted once to its room. Viewers who
+open the same recording join the shared stream, along with its speed, pause
+and seek state, so decoding is never repeated per viewer.
+"""
+
+from typing import Callable, Dict, Iterator, Optional, Set
+import os
+import threading
+import time
+import uuid
+
+import numpy as np
+
+from physics import BREADCRUMB_CAPACITY, BREADCRUMB_INTERVAL, FleetEngine
+from recorder import FLAG_ARMED, FLAG_HAS_TARGET, FLAG_RETROGRADE, FlightRecording
+from telemetry import TelemetryEncoder
+
+SPEED_MIN = 0.25
+SPEED_MAX = 16.0
+REPLAY_PREFIX = 'replay:'      # Replay drone IDs never collide with live ones
+STATUS_INTERVAL = 1.0          # Seconds between replay_state updates while playing
+
+# Record fields loaded straight into the replay row
+_LOADED = ('position', 'velocity', 'rotation', 'angular_velocity', 'target', 'controls',
+           'speed', 'yaw_rate', 'battery', 'nav_confidence', 'gps_jam', 'separation',
+           'return_queue_len', 'mode', 'status', 'proximity')
+
+
+class ReplayStream:
+    """Playback of one recording into one replay fleet row"""
+
+    def __init__(self, stream_id: str, recording: FlightRecording, fleet: FleetEngine):
+        self.stream_id = stream_id
+        self.drone_id = REPLAY_PREFIX + stream_id
+        self.recording = recording
+        self.fleet = fleet
+        self.row = fleet.allocate()
+        self.viewers: Set[str] = set()
+        self.speed = 1.0
+        self.paused = False
+        self.time = recording.start_time or 0.0
+        self._chunks: Iterator[np.ndarray] = iter(())
+        self._chunk = recording.records[:0]
+        self._previous: Optional[np.ndarray] = None   # Last record applied, as a 1-record array
+        self.seek(self.time)
+
+    @property
+    def ended(self) -> bool:
+        end = self.recording.end_time
+        return end is None or self.time >= end
+
+    def status(self) -> Dict:
+        return {
+            'stream_id': self.stream_id,
+            'drone_id': self.drone_id,
+            'recording': self.recording.name,
+            'recorded_drone_id': self.recording.drone_id,
+            'time': self.time,
+            'start_time': self.recording.start_time,
+            'end_time': self.recording.end_time,
+            'speed': self.speed,
+            'paused': self.paused,
+            'ended': self.ended,
+            'viewers': len(self.viewers),
+        }
+
+    def set_speed(self, speed: float):
+        self.speed = min(SPEED_MAX, max(SPEED_MIN, float(speed)))
+
+    def seek(self, sim_time: float):
+        """Jump to ``sim_time``: rebuild doctrine and breadcrumbs, restart the lazy reader"""
+        recording = self.recording
+        start, end = recording.start_time, recording.end_time
+        if start is None:
+            return
+        self.time = min(end, max(start, float(sim_time)))
+
+        self.fleet.reset_row(self.row)
+        self._previous = None
+        # Only the breadcrumbs the ring could still hold need replaying; they go in as one slab
+        first = recording.locate(self.time - BREADCRUMB_CAPACITY * BREADCRUMB_INTERVAL)
+        history = np.array(recording.records[first:recording.locate(self.time)])   # Copy out of the mapping
+        if len(history):
+            self._apply_history(history)
+            self._load(history[-1])
+        self._chunks = recording.chunks(first + len(history))
+        self._chunk = recording.records[:0]
+        self._consume(self.time)
+
+    def advance(self, wall_dt: float):
+        """Move the playback clock on by ``wall_dt`` seconds of wall time"""
+        if self.paused or self.ended:
+            return
+        self.time = min(self.recording.end_time, self.time + wall_dt * self.speed)
+        self._consume(self.time)
+
+    def _consume(self, until: float):
+        """Apply every unread record with sim_time <= ``until``; the last one sets the row"""
+        latest = None
+        while True:
+            if not len(self._chunk):
+                self._chunk = next(self._chunks, None)
+                if self._chunk is None:
+                    self._chunk = self.recording.records[:0]
+                    break
+            taken = int(np.searchsorted(self._chunk['sim_time'], until, side='right'))
+            if taken:
+                records = np.array(self._chunk[:taken])   # Copy out of the mapping
+                self._apply_history(records)
+                latest = records[-1]
+            self._chunk = self._chunk[taken:]
+            if len(self._chunk):
+                break
+        if latest is not None:
+            self._load(latest)
+
+    def _apply_history(self, records: np.ndarray):
+        """Breadcrumbs and resets that happened across a run of records, applied in bulk"""
+        ring = self.fleet.doctrine[self.row].breadcrumbs
+        history = records if self._previous is None else np.concatenate([self._previous, records])
+        self._previous = records[-1:]
+        # Record i + 1 of the history cleared and/or dropped a breadcrumb relative to record i
+        cleared = np.flatnonzero(history['breadcrumb_start'][1:] != history['breadcrumb_start'][:-1])
+        dropped = np.flatnonzero(history['breadcrumb_seq'][1:] != history['breadcrumb_seq'][:-1])
+        positions = history['position'][1:]
+        if cleared.size:
+            # Only the last clear matters; a record that clears drops its breadcrumb after clearing
+            before = int(np.searchsorted(dropped, cleared[-1]))
+            ring.extend(positions[dropped[:before]])
+            ring.clear()
+            dropped = dropped[before:]
+        ring.extend(positions[dropped])
+
+    def _load(self, record: np.void):
+        fleet, row = self.fleet, self.row
+        for name in _LOADED:
+            getattr(fleet, name)[row] = record[name]
+        flags = int(record['flags'])
+        fleet.armed[row] = bool(flags & FLAG_ARMED)
+        fleet.retrograde[row] = bool(flags & FLAG_RETROGRADE)
+        fleet.has_target[row] = bool(flags & FLAG_HAS_TARGET)
+
+        doctrine = fleet.doctrine[row]
+        doctrine.target_point = tuple(record['target'].tolist()) if flags & FLAG_HAS_TARGET else None
+        base, seq = int(record['anchor_base']), int(record['anchor_seq'])
+        if base != doctrine.anchor_base:
+            doctrine.anchor_base = base
+            doctrine.anchors = []
+        if seq != doctrine.anchor_seq:
+            points = self.recording.anchors_between(max(base, doctrine.anchor_seq), seq)
+            doctrine.anchors.extend(tuple(p) for p in points.tolist())
+        fleet.anchor_base[row] = doctrine.anchor_base
+        fleet.anchor_seq[row] = doctrine.anchor_seq
+
+    def close(self):
+        self.fleet.release(self.row)
+
+
+class ReplayService:
+    """Owns every replay stream and the background task that plays them.
+
+    ``emit(frame, room)`` sends one frame to one Socket.IO room, while
+    ``status(payload, room)`` sends replay_state. ``spawn`` and ``sleep``
+    come from the server's async mode.
+    """
+
+    def __init__(self, directory: str, emit: Callable, status: Callable,
+                 spawn: Callable, sleep: Callable = time.sleep, rate: float = 30.0):
+        self.directory = directory
+        self.emit = emit
+        self.send_status = status
+        self.spawn = spawn
+        self.sleep = sleep
+        self.interval = 1.0 / rate
+        self.fleet = FleetEngine(4)
+        self.telemetry = TelemetryEncoder(self.fleet)
+        self.streams: Dict[str, ReplayStream] = {}
+        self.shared: Dict[str, str] = {}            # recording name -> shared stream ID
+        self.lock = threading.Lock()
+        self.running = False
+        self.frames_sent = 0
+
+    @staticmethod
+    def room(stream: ReplayStream) -> str:
+        return f'drone:{stream.drone_id}'
+
+    def _path(self, name: str) -> str:
+        # Recording names are bare file stems; nothing outside the directory
+        if not name or os.path.basename(name) != name:
+            raise ValueError(f'Invalid recording name: {name!r}')
+        path = os.path.join(self.directory, name + '.rec')
+        if not os.path.exists(path):
+            raise ValueError(f'No such recording: {name}')
+        return path
+
+    # ---------- viewer commands ----------
+
+    def open(self, name: str, sid: str, shared: bool = True) -> ReplayStream:
+        """Join the shared stream for a recording (or start a private one)"""
+        with self.lock:
+            stream = self.streams.get(self.shared.get(name, '')) if shared else None
+            if stream is None:
+                stream = ReplayStream(uuid.uuid4().hex[:12], FlightRecording(self._path(name)), self.fleet)
+                self.streams[stream.stream_id] = stream
+                if shared:
+                    self.shared[name] = stream.stream_id
+            stream.viewers.add(sid)
+            self.telemetry.force_keyframe(stream.row)
+            if not self.running:
+                self.running = True
+                self.spawn(self._run)
+            return stream
+
+    def leave(self, stream_id: str, sid: str):
+        with self.lock:
+            stream = self.streams.get(stream_id)
+            if stream is not None:
+                stream.viewers.discard(sid)
+                if not stream.viewers:
+                    self._close(stream)
+
+    def drop(self, sid: str):
+        """Forget a disconnected socket in every stream"""
+        with self.lock:
+            for stream in list(self.streams.values()):
+                stream.viewers.discard(sid)
+                if not stream.viewers:
+                    self._close(stream)
+
+    def _close(self, stream: ReplayStream):
+        del self.streams[stream.stream_id]
+        if self.shared.get(stream.recording.name) == stream.stream_id:
+            del self.shared[stream.recording.name]
+        stream.close()
+
+    def control(self, stream_id: str, action: str, value: Optional[float] = None) -> Optional[Dict]:
+        """play / pause / seek(sim_time) / speed(multiplier); returns the new status"""
+        with self.lock:
+            stream = self.streams.get(stream_id)
+            if stream is None:
+                return None
+            if action == 'play':
+                if stream.ended:
+                    stream.seek(stream.recording.start_time)
+                stream.paused = False
+            elif action == 'pause':
+                stream.paused = True
+            elif action == 'seek' and value is not None:
+                stream.seek(value)
+                self.telemetry.force_keyframe(stream.row)
+            elif action == 'speed' and value is not None:
+                stream.set_speed(value)
+            status = stream.status()
+        self.send_status(status, self.room(stream))
+        return status
+
+    def request_keyframe(self, drone_id: str):
+        with self.lock:
+            for stream in self.streams.values():
+                if stream.drone_id == drone_id:
+                    self.telemetry.force_keyframe(stream.row)
+
+    def encode_sync(self, drone_id: str, anchor_seq: int, breadcrumb_seq: int) -> Optional[bytes]:
+        with self.lock:
+            for stream in self.streams.values():
+                if stream.drone_id == drone_id:
+                    return self.telemetry.encode_sync(stream.row, drone_id, anchor_seq, breadcrumb_seq)
+        return None
+
+    # ---------- playback loop ----------
+
+    def _run(self):
+        last = time.perf_counter()
+        last_status = last
+        while True:
+            self.sleep(self.interval)
+            now = time.perf_counter()
+            with self.lock:
+                if not self.streams:
+                    self.running = False
+                    return
+                streams = list(self.streams.values())
+                for stream in streams:
+                    stream.advance(now - last)
+                # Frames are stamped with the replay fleet's clock, which runs at wall
+                # speed whatever the playback speed, so clients interpolate as for live
+                self.fleet.sim_time += now - last
+                self.fleet.tick += 1
+                frames = self.telemetry.encode([s.row for s in streams], [s.drone_id for s in streams])
+                statuses = [s.status() for s in streams] if now - last_status >= STATUS_INTERVAL else []
+            last = now
+            for stream, frame in zip(streams, frames):
+                self.emit(frame, self.room(stream))
+            self.frames_sent += len(frames)
+            if statuses:
+                last_status = now
+                for stream, status in zip(streams, statuses):
+                    self.send_status(status, self.room(stream))
@@ -0,0 +1,325 @@
+"""
+A.E.G.I.S Batch Scenario Runner
+Headless, faster-than-realtime doctrine sweeps over a process pool.
+
+Each worker steps a whole chunk of scenarios as rows of one FleetEngine, applying
+scripted control / GPS-jam / anchor / commander timelines, and records when
+retrograde fires, why, and how long the return to base takes.
+
+    python scenarios.py --seeds 50 --workers 8 --out results.npz
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Sequence, Tuple
+import argparse
+import itertools
+import math
+import os
+import random
+import time
+
+import numpy as np
+
+from physics import (
+    THRESH_ABORT, CTRL_FORWARD, CTRL_THROTTLE, MODE_LANDED, RETROGRADE_CAUSES,
+    FleetEngine, PhysicsEngine
+)
+
+# Retrograde trigger causes, as stored in the ``trigger_cause`` column
+CAUSES = ('none',) + RETROGRADE_CAUSES
+CAUSE_NONE = 0
+CAUSE_CONFIDENCE, CAUSE_BATTERY, CAUSE_COMMANDER = (CAUSES.index(cause) for cause in
+                                                    ('confidence', 'battery', 'commander'))
+
+EVENT_CONTROL, EVENT_JAM, EVENT_ANCHOR, EVENT_COMMANDER = range(4)
+
+
+@dataclass
+class Scenario:
+    """One scripted sortie. Timelines are (time_s, ...) tuples in any order."""
+    scenario_id: int = 0
+    seed: int = 0
+    duration: float = 300.0
+    battery: float = 100.0
+    controls: List[Tuple[float, float, float, float]] = field(default_factory=list)  # t, forward, yaw, throttle
+    jam: List[Tuple[float, float]] = field(default_factory=list)                      # t, gps_jam level
+    anchors: List[float] = field(default_factory=list)                                # t of log_anchor attempts
+    commander: List[float] = field(default_factory=list)                              # t of commander overrides
+    jam_profile: str = 'custom'
+    anchor_layout: str = 'custom'
+
+
+# ==================== SCENARIO CATALOGUE ====================
+
+def jam_timeline(profile: str, duration: float) -> List[Tuple[float, float]]:
+    """Named GPS-jam profiles"""
+    if profile == 'none':
+        return []
+    if profile == 'step':
+        return [(30.0, 90.0)]
+    if profile == 'ramp':
+        return [(t, min(100.0, (t - 20.0) * 1.5)) for t in np.arange(20.0, duration, 5.0).tolist()]
+    if profile == 'pulse':
+        return [(t + dt, level) for t in np.arange(20.0, duration, 40.0).tolist()
+                for dt, level in ((0.0, 85.0), (3.0, 0.0))]
+    if profile == 'marginal':
+        # Hovers around the warn / reject band without reaching abort
+        return [(15.0, 45.0), (60.0, 70.0), (120.0, 30.0)]
+    raise ValueError(f'Unknown jam profile: {profile}')
+
+
+def anchor_times(layout: str, duration: float) -> List[float]:
+    """Named anchor-logging layouts"""
+    if layout == 'none':
+        return []
+    if layout == 'sparse':
+        return np.arange(30.0, duration, 30.0).tolist()
+    if layout == 'dense':
+        return np.arange(5.0, duration, 5.0).tolist()
+    if layout == 'early':
+        return [5.0, 10.0, 15.0]
+    raise ValueError(f'Unknown anchor layout: {layout}')
+
+
+def flight_plan(seed: int, duration: float, leg: float = 4.0) -> List[Tuple[float, float, float, float]]:
+    """Random-walk control timeline: mostly forward, occasional turns and climbs"""
+    rng = random.Random(seed)
+    plan = []
+    t = 0.0
+    while t < duration:
+        forward = rng.choice((1.0, 1.0, 1.0, 0.0, -1.0))
+        yaw = rng.choice((-1.0, 0.0, 0.0, 1.0))
+        throttle = rng.choice((0.0, 0.0, 0.0, 0.7, 0.3))
+        plan.append((t, forward, yaw, throttle))
+        t += leg * rng.uniform(0.5, 1.5)
+    return plan
+
+
+JAM_PROFILES = ('none', 'step', 'ramp', 'pulse', 'marginal')
+BATTERY_LEVELS = (100.0, 50.0, 25.0, 18.0)
+ANCHOR_LAYOUTS = ('none', 'sparse', 'dense')
+
+
+def sweep(jam_profiles: Sequence[str] = JAM_PROFILES, battery_levels: Sequence[float] = BATTERY_LEVELS,
+          anchor_layouts: Sequence[str] = ANCHOR_LAYOUTS, seeds: int = 10,
+          duration: float = 300.0) -> List[Scenario]:
+    """Cartesian product of jam profiles x battery levels x anchor layouts x seeds"""
+    scenarios = []
+    combos = itertools.product(jam_profiles, battery_levels, anchor_layouts, range(seeds))
+    for scenario_id, (profile, battery, layout, seed) in enumerate(combos):
+        scenarios.append(Scenario(
+            scenario_id=scenario_id,
+            seed=seed,
+            duration=duration,
+            battery=battery,
+            controls=flight_plan(seed, duration),
+            jam=jam_timeline(profile, duration),
+            anchors=anchor_times(layout, duration),
+            jam_profile=profile,
+            anchor_layout=layout,
+        ))
+    return scenarios
+
+
+# ==================== BATCH EXECUTION ====================
+
+def _compile_events(scenarios: Sequence[Scenario], dt: float):
+    """Merge every scenario's timelines into one tick-sorted event table"""
+    ticks, rows, kinds, values = [], [], [], []
+
+    def add(t, row, kind, value=(0.0, 0.0, 0.0)):
+        ticks.append(int(round(t / dt)))
+        rows.append(row)
+        kinds.append(kind)
+        values.append(value)
+
+    for row, scenario in enumerate(scenarios):
+        for t, forward, yaw, throttle in scenario.controls:
+            add(t, row, EVENT_CONTROL, (forward, yaw, throttle))
+        for t, level in scenario.jam:
+            add(t, row, EVENT_JAM, (level, 0.0, 0.0))
+        for t in scenario.anchors:
+            add(t, row, EVENT_ANCHOR)
+        for t in scenario.commander:
+            add(t, row, EVENT_COMMANDER)
+
+    order = np.argsort(np.asarray(ticks, dtype=np.int64), kind='stable')
+    return (np.asarray(ticks, dtype=np.int64)[order], np.asarray(rows, dtype=np.int64)[order],
+            np.asarray(kinds, dtype=np.int64)[order], np.asarray(values, dtype=np.float64).reshape(-1, 3)[order])
+
+
+def run_batch(scenarios: Sequence[Scenario], dt: float = 1.0 / 60.0) -> Dict[str, np.ndarray]:
+    """Run scenarios together as rows of one FleetEngine, unthrottled"""
+    n = len(scenarios)
+    fleet = FleetEngine(capacity=n)
+    engines = [PhysicsEngine(fleet) for _ in scenarios]
+    rows = np.array([engine.row for engine in engines], dtype=np.int64)
+    for engine, scenario in zip(engines, scenarios):
+        engine.state.battery = scenario.battery
+        engine.arm()
+
+    ev_tick, ev_row, ev_kind, ev_value = _compile_events(scenarios, dt)
+    end_tick = np.array([int(round(s.duration / dt)) for s in scenarios], dtype=np.int64)
+
+    retrograde_count = np.zeros(n, dtype=np.int64)
+    first_trigger = np.full(n, np.nan)
+    last_trigger = np.full(n, np.nan)
+    trigger_cause = np.zeros(n, dtype=np.int8)
+    land_time = np.full(n, np.nan)
+    anchors_logged = np.zeros(n, dtype=np.int64)
+    anchors_rejected = np.zeros(n, dtype=np.int64)
+    min_confidence = np.full(n, 100.0)
+    max_range = np.zeros(n)
+    battery_depleted = np.zeros(n, dtype=bool)
+    end_time = np.zeros(n)
+
+    def record_trigger(index: np.ndarray, cause: np.ndarray, t: float):
+        retrograde_count[index] += 1
+        fresh = np.isnan(first_trigger[index])
+        first_trigger[index[fresh]] = t
+        trigger_cause[index[fresh]] = cause[fresh]
+        last_trigger[index] = t
+
+    ptr = 0
+    for tick in range(int(end_tick.max()) + 1):
+        t = tick * dt
+        running = fleet.armed[rows] & (tick < end_tick)
+        if not running.any():
+            break
+
+        # Apply this tick's scripted events
+        end = int(np.searchsorted(ev_tick, tick, side='right'))
+        if end > ptr:
+            kinds, ev_rows, values = ev_kind[ptr:end], ev_row[ptr:end], ev_value[ptr:end]
+            live = running[ev_rows]
+            control = live & (kinds == EVENT_CONTROL)
+            fleet.controls[rows[ev_rows[control]], CTRL_FORWARD:CTRL_THROTTLE + 1] = np.clip(values[control], -1, 1)
+            jam = live & (kinds == EVENT_JAM)
+            fleet.gps_jam[rows[ev_rows[jam]]] = np.clip(values[jam, 0], 0.0, 100.0)
+            for i in np.flatnonzero(live & (kinds == EVENT_ANCHOR)):
+                if engines[ev_rows[i]].log_anchor():
+                    anchors_logged[ev_rows[i]] += 1
+                else:
+                    anchors_rejected[ev_rows[i]] += 1
+            commander = ev_rows[live & (kinds == EVENT_COMMANDER)]
+            for row in commander:
+                engines[row]._start_retrograde(commander_override=True)
+            if commander.size:
+                record_trigger(commander, np.full(commander.size, CAUSE_COMMANDER, dtype=np.int8), t)
+            ptr = end
+
+        was_retrograde = fleet.retrograde[rows].copy()
+        fleet.step(dt, rows=rows[running])
+        t += dt
+
+        # Automatic triggers fired inside the step
+        started = np.flatnonzero(running & fleet.retrograde[rows] & ~was_retrograde)
+        if started.size:
+            cause = np.where(fleet.nav_confidence[rows[started]] < THRESH_ABORT,
+                             CAUSE_CONFIDENCE, CAUSE_BATTERY).astype(np.int8)
+            record_trigger(started, cause, t)
+
+        stopped = running & ~fleet.armed[rows]
+        landed = stopped & (fleet.mode[rows] == MODE_LANDED)
+        land_time[landed] = t
+        battery_depleted |= stopped & ~landed & (fleet.battery[rows] <= 0)
+        end_time[running] = t
+
+        min_confidence = np.minimum(min_confidence, fleet.nav_confidence[rows])
+        max_range = np.maximum(max_range, np.hypot(fleet.position[rows, 0], fleet.position[rows, 2]))
+
+    return {
+        'scenario_id': np.array([s.scenario_id for s in scenarios], dtype=np.int64),
+        'seed': np.array([s.seed for s in scenarios], dtype=np.int64),
+        'jam_profile': np.array([s.jam_profile for s in scenarios]),
+        'anchor_layout': np.array([s.anchor_layout for s in scenarios]),
+        'battery_start': np.array([s.battery for s in scenarios]),
+        'retrograde_count': retrograde_count,
+        'first_trigger_time': first_trigger,
+        'trigger_cause': np.array(CAUSES)[trigger_cause],
+        'rtb_time': land_time - last_trigger,
+        'landed': ~np.isnan(land_time),
+        'battery_depleted': battery_depleted,
+        'anchors_logged': anchors_logged,
+        'anchors_rejected': anchors_rejected,
+        'final_battery': fleet.battery[rows].copy(),
+        'min_confidence': min_confidence,
+        'max_range': max_range,
+        'end_time': end_time,
+    }
+
+
+def run_scenarios(scenarios: Sequence[Scenario], workers: Optional[int] = None,
+                  chunk_size: int = 256, dt: float = 1.0 / 60.0) -> Dict[str, np.ndarray]:
+    """Spread scenarios over a ProcessPoolExecutor in chunks and concatenate the columns"""
+    chunks = [scenarios[i:i + chunk_size] for i in range(0, len(scenarios), chunk_size)]
+    if not chunks:
+        return {}
+    if workers == 1 or len(chunks) == 1:
+        results = [run_batch(chunk, dt) for chunk in chunks]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(run_batch, chunks, itertools.repeat(dt)))
+    return {name: np.concatenate([r[name] for r in results]) for name in results[0]}
+
+
+def write_results(columns: Dict[str, np.ndarray], path: str):
+    """Write result columns to .npz (NumPy) or .parquet (requires pyarrow)"""
+    if path.endswith('.parquet'):
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise SystemExit('Writing .parquet requires pyarrow (pip install pyarrow); use .npz instead')
+        pq.write_table(pa.table({name: col for name, col in columns.items()}), path)
+    else:
+        np.savez_compressed(path, **columns)
+
+
+def summarize(columns: Dict[str, np.ndarray]) -> str:
+    """Per jam profile: how often retrograde fires, why, and mean RTB time"""
+    lines = [f"{'jam_profile':<12} {'runs':>6} {'rtb%':>6} {'conf':>6} {'batt':>6} {'cmdr':>6} "
+             f"{'landed%':>8} {'rtb_s':>8}"]
+    for profile in sorted(set(columns['jam_profile'].tolist())):
+        sel = columns['jam_profile'] == profile
+        causes = columns['trigger_cause'][sel]
+        rtb = columns['rtb_time'][sel]
+        mean_rtb = float(np.nanmean(rtb)) if np.isfinite(rtb).any() else math.nan
+        lines.append(
+            f"{profile:<12} {int(sel.sum()):>6} {100 * float((causes != 'none').mean()):>6.1f} "
+            f"{int((causes == 'confidence').sum()):>6} {int((causes == 'battery').sum()):>6} "
+            f"{int((causes == 'commander').sum()):>6} {100 * float(columns['landed'][sel].mean()):>8.1f} "
+            f"{mean_rtb:>8.1f}"
+        )
+    return '\n'.join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='A.E.G.I.S headless doctrine scenario sweep')
+    parser.add_argument('--jam', nargs='+', default=list(JAM_PROFILES), help='GPS-jam profiles')
+    parser.add_argument('--battery', nargs='+', type=float, default=list(BATTERY_LEVELS), help='Start battery %%')
+    parser.add_argument('--anchors', nargs='+', default=list(ANCHOR_LAYOUTS), help='Anchor layouts')
+    parser.add_argument('--seeds', type=int, default=10, help='Flight plans per combination')
+    parser.add_argument('--duration', type=float, default=300.0, help='Sortie length (sim seconds)')
+    parser.add_argument('--rate', type=float, default=60.0, help='Physics rate (Hz)')
+    parser.add_argument('--workers', type=int, default=os.cpu_count(), help='Worker processes')
+    parser.add_argument('--chunk-size', type=int, default=256, help='Scenarios per worker batch')
+    parser.add_argument('--out', default='scenario_results.npz', help='.npz or .parquet output')
+    args = parser.parse_args(argv)
+
+    scenarios = sweep(args.jam, args.battery, args.anchors, args.seeds, args.duration)
+    print(f'Running {len(scenarios)} scenarios on {args.workers} workers...')
+    start = time.perf_counter()
+    columns = run_scenarios(scenarios, args.workers, args.chunk_size, 1.0 / args.rate)
+    elapsed = time.perf_counter() - start
+
+    write_results(columns, args.out)
+    sim_seconds = float(columns['end_time'].sum())
+    print(summarize(columns))
+    print(f'{sim_seconds:.0f} drone-seconds simulated in {elapsed:.1f}s '
+          f'({sim_seconds / max(elapsed, 1e-9):.0f}x realtime); results -> {args.out}')
+
+
+if __name__ == '__main__':
+    main()
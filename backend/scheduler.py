@@ -0,0 +1,117 @@
+"""
+A.E.G.I.S Simulation Scheduler
+Drift-free fixed-timestep loop with capped catch-up and a decoupled broadcast rate
+"""
+
+from typing import Callable, Dict
+import threading
+import time
+
+
+class FixedStepScheduler:
+    """Runs physics at a fixed timestep against a monotonic deadline.
+
+    Physics always advances in whole ``1 / physics_hz`` steps, so simulation
+    time stays locked to wall time: when a tick runs late the missed steps are
+    replayed back-to-back, up to ``max_substeps`` per tick. Anything beyond the
+    cap is dropped (and counted) rather than spiralling. Broadcasts keep their
+    own deadline at ``broadcast_hz``.
+    """
+
+    def __init__(self, step: Callable[[float], None], broadcast: Callable[[], None],
+                 physics_hz: float = 60.0, broadcast_hz: float = 30.0, max_substeps: int = 5,
+                 clock: Callable[[], float] = time.monotonic, sleep: Callable[[float], None] = time.sleep):
+        self.step = step
+        self.broadcast = broadcast
+        self.dt = 1.0 / physics_hz
+        self.broadcast_dt = 1.0 / broadcast_hz
+        self.max_substeps = max_substeps
+        self.clock = clock
+        self.sleep = sleep
+        self.running = False
+
+        # Accounting
+        self.ticks = 0               # Loop iterations that ran at least one step
+        self.steps = 0               # Physics steps executed
+        self.catchup_steps = 0       # Extra steps run to catch up after a late tick
+        self.dropped_steps = 0       # Steps skipped because the catch-up cap was hit
+        self.overruns = 0            # Ticks whose work took longer than one timestep
+        self.broadcasts = 0
+        self.dropped_broadcasts = 0  # Broadcast slots skipped while behind
+        self.lag = 0.0               # How late the last tick started (seconds)
+        self.max_lag = 0.0
+        self.last_tick_time = 0.0    # Work time of the last tick (seconds)
+        self.max_tick_time = 0.0
+        self._lock = threading.Lock()
+
+    def run(self, running: Callable[[], bool]):
+        """Loop until ``running()`` returns False"""
+        self.running = True
+        next_step = self.clock()
+        next_broadcast = next_step
+        while self.running and running():
+            now = self.clock()
+            if now < next_step and now < next_broadcast:
+                self.sleep(min(next_step, next_broadcast) - now)
+                continue
+
+            steps = 0
+            lag = max(0.0, now - next_step)
+            while now >= next_step and steps < self.max_substeps:
+                self.step(self.dt)
+                next_step += self.dt
+                steps += 1
+            dropped = 0
+            if now >= next_step:
+                # Still behind after the cap: skip ahead on the same grid
+                dropped = int((now - next_step) // self.dt) + 1
+                next_step += dropped * self.dt
+
+            broadcast = now >= next_broadcast
+            skipped = 0
+            if broadcast:
+                self.broadcast()
+                next_broadcast += self.broadcast_dt
+                if now >= next_broadcast:
+                    skipped = int((now - next_broadcast) // self.broadcast_dt) + 1
+                    next_broadcast += skipped * self.broadcast_dt
+
+            work = self.clock() - now
+            with self._lock:
+                if steps:
+                    self.ticks += 1
+                    self.steps += steps
+                    self.catchup_steps += steps - 1
+                    self.lag = lag
+                    self.max_lag = max(self.max_lag, lag)
+                self.dropped_steps += dropped
+                self.broadcasts += int(broadcast)
+                self.dropped_broadcasts += skipped
+                self.last_tick_time = work
+                self.max_tick_time = max(self.max_tick_time, work)
+                if work > self.dt:
+                    self.overruns += 1
+        self.running = False
+
+    def stop(self):
+        self.running = False
+
+    def stats(self) -> Dict:
+        """Snapshot of the overrun / lag counters"""
+        with self._lock:
+            return {
+                'physics_hz': round(1.0 / self.dt, 3),
+                'broadcast_hz': round(1.0 / self.broadcast_dt, 3),
+                'max_substeps': self.max_substeps,
+                'ticks': self.ticks,
+                'steps': self.steps,
+                'catchup_steps': self.catchup_steps,
+                'dropped_steps': self.dropped_steps,
+                'overruns': self.overruns,
+                'broadcasts': self.broadcasts,
+                'dropped_broadcasts': self.dropped_broadcasts,
+                'lag_ms': self.lag * 1000.0,
+                'max_lag_ms': self.max_lag * 1000.0,
+                'last_tick_ms': self.last_tick_time * 1000.0,
+                'max_tick_ms': self.max_tick_time * 1000.0,
+            }
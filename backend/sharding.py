@@ -0,0 +1,371 @@
+"""
+A.E.G.I.S Fleet Sharding
+Steps the fleet across worker processes over shared-memory arrays.
+
+Every FleetEngine array lives in one ``multiprocessing.shared_memory`` block.
+Each shard process attaches to it and steps only the rows it owns, so shards
+run on separate cores without copying state. The server process is the single
+broadcaster: its ``SharedFleet`` view feeds ``TelemetryEncoder`` straight from
+shared memory.
+
+Doctrine lists (anchors, return queue) stay with the owning shard. Commands
+from socket handlers are queued per shard and applied at the next tick
+boundary, before that tick's step. Rows only change hands between ticks,
+while every shard is idle.
+"""
+
+from multiprocessing import shared_memory
+from typing import Callable, Dict, List, Optional, Tuple
+import multiprocessing as mp
+import threading
+
+import numpy as np
+
+from physics import (
+    THRESH_REJECT, SEPARATION_RADIUS, BREADCRUMB_CAPACITY, CONTROL_KEYS, RETROGRADE_CAUSES,
+    BreadcrumbRing, DoctrineData, DroneStateView, FleetEngine, PhysicsEngine
+)
+from terrain import Heightfield
+
+_ALIGN = 64
+
+
+def _layout(capacity: int) -> Tuple[List[Tuple[str, tuple, np.dtype, int]], int]:
+    """Byte layout of every fleet array inside the shared block"""
+    fields = []
+    for name in FleetEngine._VEC3_FIELDS:
+        fields.append((name, (capacity, 3), np.dtype(np.float64)))
+    for name in FleetEngine._SCALAR_FIELDS:
+        fields.append((name, (capacity,), np.dtype(np.float64)))
+    for name in FleetEngine._FLAG_FIELDS:
+        fields.append((name, (capacity,), np.dtype(bool)))
+    for name in FleetEngine._CODE_FIELDS:
+        fields.append((name, (capacity,), np.dtype(np.int8)))
+    for name in FleetEngine._SEQ_FIELDS:
+        fields.append((name, (capacity,), np.dtype(np.int64)))
+    fields.append(('breadcrumbs', (capacity, BREADCRUMB_CAPACITY, 3), np.dtype(np.float32)))
+    fields.append(('controls', (capacity, len(CONTROL_KEYS)), np.dtype(np.float64)))
+
+    layout, offset = [], 0
+    for name, shape, dtype in fields:
+        layout.append((name, shape, dtype, offset))
+        nbytes = int(np.prod(shape)) * dtype.itemsize
+        offset += (nbytes + _ALIGN - 1) // _ALIGN * _ALIGN
+    return layout, offset
+
+
+class SharedFleet(FleetEngine):
+    """FleetEngine whose arrays are views into one shared-memory block.
+
+    Capacity is fixed at creation. Pass ``name`` to attach to a block that
+    another process created.
+    """
+
+    def __init__(self, capacity: int, name: Optional[str] = None):
+        layout, size = _layout(capacity)
+        self._layout = layout
+        self.shm = shared_memory.SharedMemory(name=name, create=name is None, size=size)
+        self.owner = name is None
+        super().__init__(capacity)
+
+    def _grow(self, new_capacity: int):
+        if self.capacity:
+            raise RuntimeError(f'Shared fleet is full ({self.capacity} drones); raise SIM_CAPACITY')
+        for name, shape, dtype, offset in self._layout:
+            setattr(self, name, np.ndarray(shape, dtype=dtype, buffer=self.shm.buf, offset=offset))
+        self.doctrine = [None] * new_capacity
+        self._free = list(range(new_capacity - 1, -1, -1))
+        self.capacity = new_capacity
+
+    def close(self):
+        # Drop array views before closing the mapping
+        for name, *_ in self._layout:
+            setattr(self, name, None)
+        self.shm.close()
+        if self.owner:
+            self.shm.unlink()
+
+
+# ==================== SHARD PROCESS ====================
+
+def _shard_main(conn, shm_name: str, capacity: int, terrain: Optional[Tuple[str, int]] = None):
+    """Worker loop: apply queued commands, step owned rows, report back"""
+    fleet = SharedFleet(capacity, name=shm_name)
+    if terrain is not None:
+        # Every shard maps the same tile files; the OS page cache holds one copy
+        fleet.terrain = Heightfield(*terrain)
+    engines: Dict[int, PhysicsEngine] = {}
+
+    def apply(command: tuple):
+        kind, row = command[0], command[1]
+        if kind == 'assign':
+            fleet.doctrine[row] = DoctrineData(BreadcrumbRing(fleet, row), anchor_base=command[2])
+            engines[row] = PhysicsEngine(fleet, row)
+        elif kind == 'import':
+            doctrine = command[2]
+            doctrine.breadcrumbs = BreadcrumbRing(fleet, row)
+            fleet.doctrine[row] = doctrine
+            engines[row] = PhysicsEngine(fleet, row)
+        elif kind == 'release':
+            engines.pop(row, None)
+            fleet.doctrine[row] = None
+        elif row in engines:
+            engine = engines[row]
+            if kind == 'controls':
+                engine.set_controls(**command[2])
+            elif kind == 'jam':
+                fleet.set_jam(row, command[2])
+            elif kind == 'anchor':
+                # Advances the shared anchor_seq column; the server mirrors only the list
+                fleet.add_anchor(row, command[2])
+            elif kind == 'commander':
+                engine._start_retrograde(commander_override=True)
+            elif kind == 'arm':
+                engine.arm()
+            elif kind == 'disarm':
+                engine.disarm()
+            elif kind == 'reset':
+                engine.reset()
+
+    try:
+        rows = np.zeros(0, dtype=np.int64)
+        reported = dict(fleet.retrograde_triggers)
+        while True:
+            message = conn.recv()
+            op = message[0]
+            if op == 'stop':
+                break
+            if op == 'export':
+                # Hand a row's doctrine over to another shard
+                row = message[1]
+                engines.pop(row, None)
+                doctrine, fleet.doctrine[row] = fleet.doctrine[row], None
+                doctrine.breadcrumbs = None  # Re-bound to the shared ring on import
+                rows = np.array(sorted(engines), dtype=np.int64)
+                conn.send(doctrine)
+                continue
+            if op == 'queues':
+                # Remaining retrograde waypoints of owned rows, for checkpoints
+                conn.send({row: list(engine.doctrine.return_queue)
+                           for row, engine in engines.items() if engine.doctrine.return_queue})
+                continue
+
+            commands = message[-1]
+            for command in commands:
+                apply(command)
+            if commands:
+                rows = np.array(sorted(engines), dtype=np.int64)
+            if op == 'apply':
+                conn.send(None)
+                continue
+
+            # Follow the server's clock, which a warm restart may have moved
+            fleet.sim_time, fleet.tick = message[2], message[3]
+            fleet.step(message[1], rows=rows)
+            # Report retrograde triggers since the last step (including commander commands)
+            conn.send({cause: fleet.retrograde_triggers[cause] - reported[cause] for cause in RETROGRADE_CAUSES})
+            reported = dict(fleet.retrograde_triggers)
+    finally:
+        engines.clear()
+        fleet.close()
+
+
+# ==================== SERVER SIDE ====================
+
+class ShardedDrone:
+    """Server-side handle for a drone stepped by a shard.
+
+    Reads go straight to shared memory; writes are queued as commands for the
+    owning shard. Mirrors the PhysicsEngine methods the socket handlers use.
+    """
+
+    __slots__ = ('pool', 'fleet', 'row', 'state', '_jam')
+
+    def __init__(self, pool: 'ShardPool', row: int):
+        self.pool = pool
+        self.fleet = pool.fleet
+        self.row = row
+        self.state = DroneStateView(self.fleet, row)
+        self._jam: Optional[float] = None  # Level after queued jam commands
+
+    @property
+    def doctrine(self) -> DoctrineData:
+        return self.fleet.doctrine[self.row]
+
+    @property
+    def control_inputs(self) -> Dict[str, float]:
+        return dict(zip(CONTROL_KEYS, self.fleet.controls[self.row].tolist()))
+
+    @property
+    def speed(self) -> float:
+        return float(self.fleet.speed[self.row])
+
+    def neighbors(self, radius: float = SEPARATION_RADIUS) -> Tuple[np.ndarray, np.ndarray]:
+        # The server process owns the proximity index
+        return self.fleet.neighbors(self.row, radius)
+
+    def set_controls(self, **kwargs):
+        self.pool.send(self.row, ('controls', self.row, kwargs))
+
+    def adjust_jam(self, delta: float) -> float:
+        base = self._jam if self._jam is not None else float(self.fleet.jam_operator[self.row])
+        self._jam = max(0.0, min(100.0, base + delta))
+        self.pool.send(self.row, ('jam', self.row, self._jam))
+        field_share = float(self.fleet.gps_jam[self.row] - self.fleet.jam_operator[self.row])
+        return max(0.0, min(100.0, self._jam + field_share))
+
+    def log_anchor(self):
+        if self.state.nav_confidence >= THRESH_REJECT:
+            self.pool.send(self.row, ('anchor', self.row, self.state.position))
+            return True
+        return False
+
+    def _start_retrograde(self, commander_override=False):
+        self.pool.send(self.row, ('commander', self.row))
+
+    def arm(self):
+        self.pool.send(self.row, ('arm', self.row))
+
+    def disarm(self):
+        self.pool.send(self.row, ('disarm', self.row))
+
+    def reset(self):
+        self._jam = None
+        self.pool.send(self.row, ('reset', self.row))
+
+
+class ShardPool:
+    """Owns the shared fleet, the shard processes, and row ownership"""
+
+    def __init__(self, shards: int, capacity: int = 1024, terrain: Optional[Heightfield] = None):
+        self.fleet = SharedFleet(capacity)
+        self.fleet.terrain = terrain
+        terrain_spec = (terrain.directory, terrain.budget) if terrain is not None else None
+        self.owner: Dict[int, int] = {}                       # row -> shard index
+        self.loads = [0] * shards
+        self.pending: List[List[tuple]] = [[] for _ in range(shards)]
+        self.migrations = 0
+        self._lock = threading.Lock()                          # Guards pending
+        context = mp.get_context('spawn')
+        self.workers = []
+        for index in range(shards):
+            parent, child = context.Pipe()
+            process = context.Process(target=_shard_main,
+                                      args=(child, self.fleet.shm.name, capacity, terrain_spec),
+                                      name=f'aegis-shard-{index}', daemon=True)
+            process.start()
+            self.workers.append((process, parent))
+
+    # ---------- ownership (call with the simulation lock held) ----------
+
+    def add_drone(self, restore: Optional[Callable[[Optional[BreadcrumbRing]], DoctrineData]] = None
+                  ) -> ShardedDrone:
+        """Allocate a row on the idlest shard.
+
+        ``restore(ring)`` builds a saved DoctrineData in place of a fresh one.
+        It is called twice, for the server's copy and the shard's, so the two
+        never share mutable lists.
+        """
+        row = self.fleet.allocate()
+        shard = min(range(len(self.loads)), key=self.loads.__getitem__)
+        self.owner[row] = shard
+        self.loads[shard] += 1
+        if restore is None:
+            self.send(row, ('assign', row, self.fleet.doctrine[row].anchor_base))
+        else:
+            self.fleet.doctrine[row] = restore(BreadcrumbRing(self.fleet, row))
+            self.send(row, ('import', row, restore(None)))
+        return ShardedDrone(self, row)
+
+    def remove_drone(self, row: int):
+        shard = self.owner.pop(row)
+        self.loads[shard] -= 1
+        with self._lock:
+            # Commands still queued for this row must not reach its next occupant
+            self.pending[shard] = [c for c in self.pending[shard] if c[1] != row]
+            self.pending[shard].append(('release', row))
+        self.fleet.release(row)
+        self._rebalance()
+
+    def _rebalance(self):
+        """Move one drone from the busiest shard to the idlest when they differ by more than one"""
+        busiest = max(range(len(self.loads)), key=self.loads.__getitem__)
+        idlest = min(range(len(self.loads)), key=self.loads.__getitem__)
+        if self.loads[busiest] - self.loads[idlest] <= 1:
+            return
+        row = next(r for r, s in self.owner.items() if s == busiest)
+        self.flush(busiest)  # Anything queued for the row happens before it moves
+        _, conn = self.workers[busiest]
+        conn.send(('export', row))
+        doctrine = conn.recv()
+        self.owner[row] = idlest
+        self.loads[busiest] -= 1
+        self.loads[idlest] += 1
+        self.send(row, ('import', row, doctrine))
+        self.migrations += 1
+
+    # ---------- commands and stepping ----------
+
+    def send(self, row: int, command: tuple):
+        """Queue a command for the shard that owns ``row``"""
+        with self._lock:
+            shard = self.owner.get(row)
+            if shard is not None:
+                self.pending[shard].append(command)
+
+    def _take(self, shard: int) -> List[tuple]:
+        with self._lock:
+            commands, self.pending[shard] = self.pending[shard], []
+        for command in commands:
+            self._mirror(command)
+        return commands
+
+    def _mirror(self, command: tuple):
+        """Keep the server's doctrine copy (used by telemetry) in step with the shard"""
+        kind, row = command[0], command[1]
+        doctrine = self.fleet.doctrine[row]
+        if doctrine is None:
+            return
+        if kind == 'anchor':
+            doctrine.add_anchor(command[2])
+        elif kind == 'reset':
+            self.fleet.doctrine[row] = DoctrineData(BreadcrumbRing(self.fleet, row),
+                                                    anchor_base=doctrine.anchor_seq)
+
+    def return_queues(self) -> Dict[int, List[Tuple[float, float, float]]]:
+        """Every shard's non-empty retrograde return queues by row (call between steps)"""
+        queues = {}
+        for _, conn in self.workers:
+            conn.send(('queues',))
+        for _, conn in self.workers:
+            queues.update(conn.recv())
+        return queues
+
+    def flush(self, shard: int):
+        """Apply one shard's queued commands without advancing time"""
+        _, conn = self.workers[shard]
+        conn.send(('apply', self._take(shard)))
+        conn.recv()
+
+    def step(self, dt: float):
+        """Advance every shard by one timestep in parallel and wait for all of them"""
+        sim_time, tick = self.fleet.sim_time, self.fleet.tick
+        self.fleet.sim_time += dt
+        self.fleet.tick += 1
+        if self.fleet.jam_field is not None:
+            # The jam field lives in this process; shards read the sampled levels from shared memory
+            self.fleet.sample_jam(np.flatnonzero(self.fleet.active))
+        for shard, (_, conn) in enumerate(self.workers):
+            conn.send(('step', dt, sim_time, tick, self._take(shard)))
+        for _, conn in self.workers:
+            for cause, count in conn.recv().items():
+                self.fleet.retrograde_triggers[cause] += count
+
+    def close(self):
+        for process, conn in self.workers:
+            try:
+                conn.send(('stop',))
+            except (BrokenPipeError, OSError):
+                pass
+            process.join(timeout=5)
+        self.fleet.close()
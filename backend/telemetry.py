@@ -0,0 +1,623 @@
+"""
+A.E.G.I.S Telemetry Frames
+Compact, versioned binary drone_update frames: periodic keyframes plus deltas
+carrying only the fields whose quantized value changed.
+
+Frame layout (little endian):
+    u8  version            FRAME_VERSION
+    u8  flags              FLAG_KEYFRAME | FLAG_UUID_ID | FLAG_SYNC
+    u32 seq                per-drone frame sequence number
+    u32 mask               which FIELD_* sections follow, in bit order
+    id                     16 raw bytes if FLAG_UUID_ID, else u8 length + utf-8
+    sections               see FIELD_FORMATS and the doctrine ranges below
+
+Anchors and breadcrumbs are streamed incrementally by sequence number. Their
+sections are ``u32 first_seq, u32 from_seq, u16 count`` followed by ``count``
+float32 xyz points with sequence numbers ``from_seq..``; a longer backlog goes
+out MAX_RANGE_POINTS at a time over consecutive frames. ``first_seq`` is the
+oldest entry the server still retains. A client that sees ``from_seq`` beyond
+what it holds sends ``doctrine_sync`` with its cursors. The server then answers
+with a FLAG_SYNC frame, sent to that client only, holding just the missing entries.
+
+Every stream frame ends with a FIELD_CLOCK section: the simulation tick and
+sim time the frame was sampled at. Together with velocity and yaw rate this
+lets the client buffer a few frames and interpolate (or briefly extrapolate)
+at render rate, so the wire rate can sit well below the frame rate.
+
+Observer views (commanders, spectators) can take ``fleet_update`` instead: one
+columnar frame per tick holding every drone they watch (see FleetFrameEncoder).
+
+The decoder in ``frontend/src/store/droneStore.js`` mirrors this module.
+"""
+
+from typing import Dict, List, Optional, Tuple
+import math
+import struct
+import uuid
+
+import numpy as np
+
+from physics import BREADCRUMB_CAPACITY, CONTROL_KEYS, MODES, PROXIMITY_STATES, STATUSES
+
+FRAME_VERSION = 3
+FLEET_FRAME_VERSION = 1
+KEYFRAME_INTERVAL = 30      # Frames between keyframes (1 s at 30 Hz)
+# Dead-band fields and their units (metres, radians, percent)
+DEADBAND_FIELDS = ('position', 'rotation', 'battery', 'nav_confidence')
+
+FLAG_KEYFRAME = 0x01
+FLAG_UUID_ID = 0x02
+FLAG_SYNC = 0x04            # Out-of-band doctrine resync; does not advance seq
+
+# Section bits, encoded in this order
+FIELD_POSITION = 1 << 0          # float32 x3, absolute
+FIELD_POSITION_DELTA = 1 << 1    # int16 x3, centimetres since the previous frame
+FIELD_VELOCITY = 1 << 2          # int16 x3, cm/s
+FIELD_ROTATION = 1 << 3          # int16 x3, wrapped to [-pi, pi]
+FIELD_ANGULAR_VELOCITY = 1 << 4  # int16 x3, mrad/s
+FIELD_BATTERY = 1 << 5           # uint16, 1/100 %
+FIELD_NAV_CONFIDENCE = 1 << 6    # uint16, 1/100 %
+FIELD_GPS_JAM = 1 << 7           # uint16, 1/100 %
+FIELD_SPEED = 1 << 8             # int16, cm/s
+FIELD_FLAGS = 1 << 9             # uint8, armed | retrograde_active << 1
+FIELD_MODE_STATUS = 1 << 10      # uint8 mode code, uint8 status code
+FIELD_TARGET = 1 << 11           # uint8 present, float32 x3
+FIELD_RETURN_QUEUE = 1 << 12     # uint16 return_queue_length, saturating
+FIELD_CONTROLS = 1 << 13         # int8 x6, 1/127
+FIELD_ANCHORS = 1 << 14          # doctrine range (anchors)
+FIELD_BREADCRUMBS = 1 << 15      # doctrine range (breadcrumbs)
+FIELD_PROXIMITY = 1 << 16        # uint8 proximity code, uint16 separation cm (0xFFFF = none in range)
+FIELD_YAW_RATE = 1 << 17         # int16, mrad/s
+FIELD_CLOCK = 1 << 18            # uint32 tick, float64 sim_time; in every stream frame
+FIELD_LAST = FIELD_CLOCK
+
+FIELD_FORMATS = {
+    FIELD_POSITION: struct.Struct('<3f'),
+    FIELD_POSITION_DELTA: struct.Struct('<3h'),
+    FIELD_VELOCITY: struct.Struct('<3h'),
+    FIELD_ROTATION: struct.Struct('<3h'),
+    FIELD_ANGULAR_VELOCITY: struct.Struct('<3h'),
+    FIELD_BATTERY: struct.Struct('<H'),
+    FIELD_NAV_CONFIDENCE: struct.Struct('<H'),
+    FIELD_GPS_JAM: struct.Struct('<H'),
+    FIELD_SPEED: struct.Struct('<h'),
+    FIELD_FLAGS: struct.Struct('<B'),
+    FIELD_MODE_STATUS: struct.Struct('<BB'),
+    FIELD_TARGET: struct.Struct('<B3f'),
+    FIELD_RETURN_QUEUE: struct.Struct('<H'),
+    FIELD_CONTROLS: struct.Struct('<6b'),
+    FIELD_PROXIMITY: struct.Struct('<BH'),
+    FIELD_YAW_RATE: struct.Struct('<h'),
+    FIELD_CLOCK: struct.Struct('<Id'),
+}
+
+# Quantization scales (value * scale -> integer on the wire)
+POSITION_SCALE = 100.0
+VELOCITY_SCALE = 100.0
+ROTATION_SCALE = 32767.0 / math.pi
+ANGULAR_VELOCITY_SCALE = 1000.0
+PERCENT_SCALE = 100.0
+SPEED_SCALE = 100.0
+CONTROL_SCALE = 127.0
+SEPARATION_SCALE = 100.0
+NO_SEPARATION = 0xFFFF
+
+HEADER = struct.Struct('<BBII')
+FLEET_HEADER = struct.Struct('<BBHId')   # version, flags, count, tick, sim_time
+RANGE = struct.Struct('<IIH')
+POINT = struct.Struct('<3f')
+INT16_MAX = 32767
+UINT16_MAX = 0xFFFF
+UINT8_MAX = 0xFF
+MAX_RANGE_POINTS = UINT16_MAX   # Doctrine range count is a u16
+
+
+def _int16(values: np.ndarray) -> np.ndarray:
+    return np.clip(np.rint(values), -INT16_MAX, INT16_MAX).astype(np.int64)
+
+
+def _uint16(values: np.ndarray) -> np.ndarray:
+    return np.clip(np.rint(values), 0, UINT16_MAX).astype(np.int64)
+
+
+def _encode_id(drone_id: str) -> Tuple[int, bytes]:
+    try:
+        parsed = uuid.UUID(drone_id)
+        if str(parsed) == drone_id:
+            return FLAG_UUID_ID, parsed.bytes
+    except ValueError:
+        pass
+    raw = drone_id.encode('utf-8')
+    return 0, bytes([len(raw)]) + raw
+
+
+def _pack_range(first_seq: int, from_seq: int, points) -> Tuple[bytes, int]:
+    """Doctrine range section for ``points`` (sequence numbers ``from_seq..``).
+
+    At most MAX_RANGE_POINTS go out; the rest follow in later frames. Returns
+    the section and the sequence number after the last point packed.
+    """
+    points = np.asarray(points[:MAX_RANGE_POINTS], dtype='<f4').reshape(-1, 3)
+    return RANGE.pack(first_seq, from_seq, len(points)) + points.tobytes(), from_seq + len(points)
+
+
+class TelemetryEncoder:
+    """Per-drone binary frame streams over a FleetEngine.
+
+    Quantization and change detection run vectorized over the requested rows,
+    on one integer matrix holding every fixed-size section side by side; only
+    the final packing is per drone. A stream restarts (new keyframe, sequence
+    reset) whenever a row is handed to a different drone.
+
+    ``deadbands`` maps DEADBAND_FIELDS to the smallest change worth sending.
+    A field stays out of the frame until it drifts that far from the value the
+    client last received. With ``heartbeat`` > 0, a drone with nothing to send
+    gets no frame at all (``None`` in the result, sequence not advanced). It
+    gets an empty heartbeat frame once every ``heartbeat`` encodes instead.
+    """
+
+    # (name, bit, columns) of the fixed-size quantized sections, in bit order
+    _SECTIONS = (
+        ('velocity', FIELD_VELOCITY, 3), ('rotation', FIELD_ROTATION, 3),
+        ('angular_velocity', FIELD_ANGULAR_VELOCITY, 3), ('battery', FIELD_BATTERY, 1),
+        ('nav_confidence', FIELD_NAV_CONFIDENCE, 1), ('gps_jam', FIELD_GPS_JAM, 1),
+        ('speed', FIELD_SPEED, 1), ('flags', FIELD_FLAGS, 1), ('mode_status', FIELD_MODE_STATUS, 2),
+        ('target', FIELD_TARGET, 4), ('return_queue', FIELD_RETURN_QUEUE, 1),
+        ('controls', FIELD_CONTROLS, 6), ('proximity', FIELD_PROXIMITY, 2),
+        ('yaw_rate', FIELD_YAW_RATE, 1),
+    )
+    _WIDTHS = np.array([width for _, _, width in _SECTIONS])
+    _STARTS = np.concatenate([[0], np.cumsum(_WIDTHS)[:-1]])
+    _COLUMNS = int(_WIDTHS.sum())
+    # Per column: scale to wire units, then clip to what the wire type holds
+    _SCALE = np.array([VELOCITY_SCALE] * 3 + [ROTATION_SCALE] * 3 + [ANGULAR_VELOCITY_SCALE] * 3
+                      + [PERCENT_SCALE] * 3 + [SPEED_SCALE] + [1.0] * 3 + [1.0] + [POSITION_SCALE] * 3
+                      + [1.0] + [CONTROL_SCALE] * 6 + [1.0, SEPARATION_SCALE] + [ANGULAR_VELOCITY_SCALE])
+    _LOW = np.array([-INT16_MAX] * 9 + [0] * 3 + [-INT16_MAX] + [0] * 3 + [0] + [-np.inf] * 3
+                    + [0] + [-INT16_MAX] * 6 + [0, 0] + [-INT16_MAX], dtype=np.float64)
+    _HIGH = np.array([INT16_MAX] * 9 + [UINT16_MAX] * 3 + [INT16_MAX] + [UINT8_MAX] * 3 + [1] + [np.inf] * 3
+                     + [UINT16_MAX] + [INT16_MAX] * 6 + [UINT8_MAX, UINT16_MAX] + [INT16_MAX], dtype=np.float64)
+    # Sections are written in bit order: these come before the doctrine ranges, the rest after
+    _LEADING = tuple(i for i, (_, bit, _) in enumerate(_SECTIONS) if bit < FIELD_ANCHORS)
+    _TRAILING = tuple(i for i, (_, bit, _) in enumerate(_SECTIONS) if bit > FIELD_BREADCRUMBS)
+
+    def __init__(self, fleet, keyframe_interval: int = KEYFRAME_INTERVAL,
+                 deadbands: Optional[Dict[str, float]] = None, heartbeat: int = 0):
+        self.fleet = fleet
+        self.keyframe_interval = keyframe_interval
+        self.heartbeat = heartbeat
+        deadbands = deadbands or {}
+        unknown = set(deadbands) - set(DEADBAND_FIELDS)
+        if unknown:
+            raise ValueError(f'No dead-band for fields: {sorted(unknown)}')
+        # In quantized units, so comparisons run on the integers already computed
+        scales = {'position': POSITION_SCALE, 'rotation': ROTATION_SCALE,
+                  'battery': PERCENT_SCALE, 'nav_confidence': PERCENT_SCALE}
+        self.deadbands = {name: int(deadbands[name] * scales[name]) for name in DEADBAND_FIELDS
+                          if deadbands.get(name)}
+        self._bands = np.repeat([self.deadbands.get(name, 0) for name, _, _ in self._SECTIONS], self._WIDTHS)
+        # (bit, struct, first column, end column) per section, for the packing loop
+        self._layout = [(bit, FIELD_FORMATS[bit], int(start), int(start + width))
+                        for (_, bit, width), start in zip(self._SECTIONS, self._STARTS)]
+        self.capacity = 0
+        self.seq = np.zeros(0, dtype=np.int64)
+        self.force = np.zeros(0, dtype=bool)
+        self.idle = np.zeros(0, dtype=np.int64)     # Encodes skipped since the last frame sent
+        # Accounting
+        self.frames_sent = 0
+        self.heartbeats = 0
+        self.suppressed = 0
+        self.last_position = np.zeros((0, 3), dtype=np.int64)
+        self.last = np.zeros((0, self._COLUMNS), dtype=np.int64)
+        self._row_ids: List[Optional[str]] = []
+        self._id_bytes: Dict[str, Tuple[int, bytes]] = {}
+        # Doctrine cursors: next anchor / breadcrumb sequence already streamed per row
+        self.sent_anchor = np.zeros(0, dtype=np.int64)
+        self.sent_breadcrumb = np.zeros(0, dtype=np.int64)
+        self._grow(fleet.capacity)
+
+    def _grow(self, capacity: int):
+        """Follow the fleet's capacity; new rows start with a forced keyframe"""
+        extra = capacity - self.capacity
+        if extra <= 0:
+            return
+        self.seq = np.concatenate([self.seq, np.zeros(extra, dtype=np.int64)])
+        self.force = np.concatenate([self.force, np.ones(extra, dtype=bool)])
+        self.idle = np.concatenate([self.idle, np.zeros(extra, dtype=np.int64)])
+        self.last_position = np.concatenate([self.last_position, np.zeros((extra, 3), dtype=np.int64)])
+        self.last = np.concatenate([self.last, np.zeros((extra, self._COLUMNS), dtype=np.int64)])
+        self.sent_anchor = np.concatenate([self.sent_anchor, np.zeros(extra, dtype=np.int64)])
+        self.sent_breadcrumb = np.concatenate([self.sent_breadcrumb, np.zeros(extra, dtype=np.int64)])
+        self._row_ids.extend([None] * extra)
+        self.capacity = capacity
+
+    def force_keyframe(self, row: int):
+        """Send a full keyframe for this row on the next encode (new viewer, resync)"""
+        if row < self.capacity:
+            self.force[row] = True
+
+    def _quantize(self, fleet, rows: np.ndarray) -> np.ndarray:
+        """Every fixed-size section of ``rows`` in wire units, one column per value (see _SECTIONS)"""
+        rotation = np.mod(fleet.rotation[rows] + math.pi, 2 * math.pi) - math.pi
+        # No drone in range clips to NO_SEPARATION
+        separation = np.where(fleet.separation[rows] < 0, np.inf, fleet.separation[rows])
+        has_target = fleet.has_target[rows, None]
+        raw = np.concatenate([
+            fleet.velocity[rows], rotation, fleet.angular_velocity[rows],
+            fleet.battery[rows, None], fleet.nav_confidence[rows, None], fleet.gps_jam[rows, None],
+            fleet.speed[rows, None],
+            fleet.armed[rows, None] + 2.0 * fleet.retrograde[rows, None],
+            fleet.mode[rows, None], fleet.status[rows, None],
+            has_target, fleet.target[rows] * has_target,
+            fleet.return_queue_len[rows, None], fleet.controls[rows],
+            fleet.proximity[rows, None], separation[:, None], fleet.yaw_rate[rows, None],
+        ], axis=1)
+        quantized = np.rint(raw * self._SCALE)
+        return np.clip(quantized, self._LOW, self._HIGH, out=quantized).astype(np.int64)
+
+    def encode(self, rows, drone_ids: List[str], source=None) -> List[bytes]:
+        """Encode one frame per row (rows[i] belongs to drone_ids[i]).
+
+        ``source`` is a FleetSnapshot of the fleet to read instead of the live arrays.
+        """
+        fleet = self.fleet if source is None else source
+        if self.capacity < fleet.capacity:
+            self._grow(fleet.capacity)
+        rows = np.asarray(rows, dtype=np.int64)
+        if rows.size == 0:
+            return []
+        row_list = rows.tolist()
+
+        for row, drone_id in zip(row_list, drone_ids):
+            if self._row_ids[row] != drone_id:
+                self._row_ids[row] = drone_id
+                self.sent_anchor[row] = 0
+                self.sent_breadcrumb[row] = 0
+                self.seq[row] = 0
+                self.force[row] = True
+                if drone_id not in self._id_bytes:
+                    self._id_bytes[drone_id] = _encode_id(drone_id)
+
+        quantized = self._quantize(fleet, rows)
+        last = self.last[rows]
+        keyframe = self.force[rows] | (self.seq[rows] % self.keyframe_interval == 0)
+        moved = np.abs(quantized - last) > self._bands
+        changed = np.logical_or.reduceat(moved, self._STARTS, axis=1) | keyframe[:, None]
+
+        position_q = np.rint(fleet.position[rows] * POSITION_SCALE).astype(np.int64)
+        position_delta = position_q - self.last_position[rows]
+        position_changed = (np.abs(position_delta) > self.deadbands.get('position', 0)).any(axis=1)
+        position_absolute = keyframe | (np.abs(position_delta) > INT16_MAX).any(axis=1)
+
+        breadcrumb_next = fleet.breadcrumb_seq[rows]
+        breadcrumb_first = np.maximum(fleet.breadcrumb_start[rows], breadcrumb_next - BREADCRUMB_CAPACITY)
+        breadcrumb_changed = keyframe | (breadcrumb_next != self.sent_breadcrumb[rows])
+        anchor_next = fleet.anchor_seq[rows]
+        anchor_base = fleet.anchor_base[rows]
+        anchor_changed = keyframe | (anchor_next != self.sent_anchor[rows])
+        # Where each stream's doctrine cursors end up (short of *_next if a range was clamped)
+        anchor_sent = anchor_next.copy()
+        breadcrumb_sent = breadcrumb_next.copy()
+
+        sent = np.ones(len(rows), dtype=bool)
+        if self.heartbeat:
+            # Anything to say? (anchors are checked per drone below)
+            pending = position_changed | position_absolute | breadcrumb_changed | changed.any(axis=1)
+            sent = pending | (self.idle[rows] + 1 >= self.heartbeat)
+
+        clock = FIELD_FORMATS[FIELD_CLOCK].pack(fleet.tick & 0xFFFFFFFF, fleet.sim_time)
+        position_pack = FIELD_FORMATS[FIELD_POSITION].pack
+        delta_pack = FIELD_FORMATS[FIELD_POSITION_DELTA].pack
+        layout = self._layout
+        leading = [layout[k] for k in self._LEADING]
+        trailing = [layout[k] for k in self._TRAILING]
+        frames = []
+        for i, (row, values, fields, is_key) in enumerate(zip(row_list, quantized.tolist(), changed.tolist(),
+                                                                keyframe.tolist())):
+            if not sent[i]:
+                if not anchor_changed[i]:
+                    frames.append(None)
+                    continue
+                sent[i] = True
+            mask = 0
+            body = []
+
+            if position_absolute[i]:
+                mask |= FIELD_POSITION
+                body.append(position_pack(*(position_q[i] / POSITION_SCALE).tolist()))
+            elif position_changed[i]:
+                mask |= FIELD_POSITION_DELTA
+                body.append(delta_pack(*position_delta[i].tolist()))
+
+            for k, (bit, fmt, first, end) in zip(self._LEADING, leading):
+                if not fields[k]:
+                    continue
+                mask |= bit
+                if bit == FIELD_TARGET:
+                    body.append(fmt.pack(values[first], *[v / POSITION_SCALE for v in values[first + 1:end]]))
+                else:
+                    body.append(fmt.pack(*values[first:end]))
+
+            # Doctrine lists only carry entries this stream has not sent yet
+            if anchor_changed[i]:
+                base = int(anchor_base[i])
+                from_seq = max(int(self.sent_anchor[row]), base)
+                mask |= FIELD_ANCHORS
+                section, anchor_sent[i] = _pack_range(base, from_seq, fleet.doctrine[row].anchors_since(from_seq))
+                body.append(section)
+            if breadcrumb_changed[i]:
+                first_seq = int(breadcrumb_first[i])
+                from_seq = max(int(self.sent_breadcrumb[row]), first_seq)
+                mask |= FIELD_BREADCRUMBS
+                section, breadcrumb_sent[i] = _pack_range(first_seq, from_seq,
+                                                          fleet.doctrine[row].breadcrumbs.since(from_seq))
+                body.append(section)
+            for k, (bit, fmt, first, end) in zip(self._TRAILING, trailing):
+                if fields[k]:
+                    mask |= bit
+                    body.append(fmt.pack(*values[first:end]))
+            mask |= FIELD_CLOCK
+            body.append(clock)
+
+            id_flag, id_bytes = self._id_bytes[drone_ids[i]]
+            flags = id_flag | (FLAG_KEYFRAME if is_key else 0)
+            header = HEADER.pack(FRAME_VERSION, flags, int(self.seq[row]) & 0xFFFFFFFF, mask)
+            frames.append(header + id_bytes + b''.join(body))
+            if mask == FIELD_CLOCK:
+                self.heartbeats += 1
+
+        # Only what went out becomes the baseline for the next comparison
+        self.suppressed += int(len(rows) - sent.sum())
+        self.frames_sent += int(sent.sum())
+        self.idle[rows] = np.where(sent, 0, self.idle[rows] + 1)
+        self.seq[rows[sent]] += 1
+        self.force[rows[sent]] = False
+        self.last_position[rows] = np.where((position_changed | position_absolute)[:, None],
+                                            position_q, self.last_position[rows])
+        self.sent_breadcrumb[rows] = breadcrumb_sent
+        self.sent_anchor[rows] = anchor_sent
+        self.last[rows] = np.where(np.repeat(changed, self._WIDTHS, axis=1), quantized, last)
+        return frames
+
+    def encode_sync(self, row: int, drone_id: str, anchor_seq: int, breadcrumb_seq: int, source=None) -> bytes:
+        """Build a FLAG_SYNC frame with the anchors/breadcrumbs a client is missing.
+
+        ``anchor_seq`` / ``breadcrumb_seq`` are the client's cursors (the next
+        sequence number it does not hold yet).
+        """
+        doctrine = (self.fleet if source is None else source).doctrine[row]
+        if drone_id not in self._id_bytes:
+            self._id_bytes[drone_id] = _encode_id(drone_id)
+        id_flag, id_bytes = self._id_bytes[drone_id]
+
+        anchor_from = max(anchor_seq, doctrine.anchor_base)
+        breadcrumbs = doctrine.breadcrumbs
+        breadcrumb_first = breadcrumbs.first_seq
+        breadcrumb_from = max(breadcrumb_seq, breadcrumb_first)
+        header = HEADER.pack(FRAME_VERSION, id_flag | FLAG_SYNC, int(self.seq[row]) & 0xFFFFFFFF,
+                             FIELD_ANCHORS | FIELD_BREADCRUMBS)
+        anchors, _ = _pack_range(doctrine.anchor_base, anchor_from, doctrine.anchors_since(anchor_from))
+        breadcrumbs, _ = _pack_range(breadcrumb_first, breadcrumb_from, breadcrumbs.since(breadcrumb_from))
+        return header + id_bytes + anchors + breadcrumbs
+
+
+class FleetFrameEncoder:
+    """Columnar fleet_update frames: every drone an observer watches in one message.
+
+    Layout (little endian): FLEET_HEADER, then the drone IDs (16 raw bytes each
+    if FLAG_UUID_ID, else u8 length + utf-8 each), then one column per field:
+    float32 x[count], y[count], z[count]; int16 yaw[count] (as FIELD_ROTATION);
+    uint8 status code[count]; uint16 nav_confidence[count] (1/100 %).
+
+    Frames are full state, so there is no per-viewer stream to keep in step.
+    Viewers of the same drone set share one encode. Each column holds
+    like-typed, slowly varying values, which permessage-deflate squeezes well.
+    """
+
+    def __init__(self):
+        self._id_bytes: Dict[str, Tuple[int, bytes]] = {}
+        self.frames_sent = 0
+
+    def encode(self, source, rows, drone_ids: List[str]) -> bytes:
+        """One frame over ``rows`` of ``source`` (a FleetEngine or FleetSnapshot)"""
+        rows = np.asarray(rows, dtype=np.int64)
+        encoded = []
+        for drone_id in drone_ids:
+            entry = self._id_bytes.get(drone_id)
+            if entry is None:
+                entry = self._id_bytes[drone_id] = _encode_id(drone_id)
+            encoded.append(entry)
+        if all(id_flag for id_flag, _ in encoded):
+            flags, ids = FLAG_UUID_ID, b''.join(raw for _, raw in encoded)
+        else:
+            flags = 0
+            ids = b''.join(bytes([len(raw)]) + raw for raw in (d.encode('utf-8') for d in drone_ids))
+
+        yaw = np.mod(source.rotation[rows, 1] + math.pi, 2 * math.pi) - math.pi
+        self.frames_sent += 1
+        return b''.join((
+            FLEET_HEADER.pack(FLEET_FRAME_VERSION, flags, len(rows), source.tick & 0xFFFFFFFF, source.sim_time),
+            ids,
+            source.position[rows].T.astype('<f4').tobytes(),
+            _int16(yaw * ROTATION_SCALE).astype('<i2').tobytes(),
+            source.status[rows].astype(np.uint8).tobytes(),
+            _uint16(source.nav_confidence[rows] * PERCENT_SCALE).astype('<u2').tobytes(),
+        ))
+
+
+def decode_fleet_frame(frame: bytes) -> Dict:
+    """Columns of a fleet_update frame as plain lists (tooling and load tests)"""
+    version, flags, count, tick, sim_time = FLEET_HEADER.unpack_from(frame, 0)
+    if version != FLEET_FRAME_VERSION:
+        raise ValueError(f'Unsupported fleet frame version {version}')
+    offset = FLEET_HEADER.size
+    drone_ids = []
+    for _ in range(count):
+        if flags & FLAG_UUID_ID:
+            drone_ids.append(str(uuid.UUID(bytes=bytes(frame[offset:offset + 16]))))
+            offset += 16
+        else:
+            length = frame[offset]
+            drone_ids.append(bytes(frame[offset + 1:offset + 1 + length]).decode('utf-8'))
+            offset += 1 + length
+
+    def column(dtype: str, width: int = 1) -> np.ndarray:
+        nonlocal offset
+        values = np.frombuffer(frame, dtype=dtype, count=count * width, offset=offset)
+        offset += values.nbytes
+        return values
+
+    position = column('<f4', 3).reshape(3, count).T
+    return {
+        'tick': tick,
+        'sim_time': sim_time,
+        'drone_ids': drone_ids,
+        'position': [tuple(p) for p in position.tolist()],
+        'yaw': (column('<i2') / ROTATION_SCALE).tolist(),
+        'status': [STATUSES[code] for code in column('u1').tolist()],
+        'nav_confidence': (column('<u2') / PERCENT_SCALE).tolist(),
+    }
+
+
+class TelemetryDecoder:
+    """Reassembles full drone_update dicts from a stream of binary frames.
+
+    Mirrors the browser decoder; used by tooling and load tests. A result with
+    ``needs_keyframe`` means the caller should emit ``request_keyframe``; one
+    with ``needs_sync`` means it should emit ``doctrine_sync`` with ``cursors()``.
+    """
+
+    def __init__(self):
+        self.drones: Dict[str, Dict] = {}
+        self.lists: Dict[str, Dict[str, Dict]] = {}
+
+    def cursors(self, drone_id: str) -> Dict:
+        """Payload for a ``doctrine_sync`` request"""
+        lists = self._lists(drone_id)
+        return {'drone_id': drone_id,
+                'anchor_seq': lists['anchors']['next'],
+                'breadcrumb_seq': lists['breadcrumbs']['next']}
+
+    def _lists(self, drone_id: str) -> Dict[str, Dict]:
+        if drone_id not in self.lists:
+            self.lists[drone_id] = {kind: {'first': 0, 'next': 0, 'points': []}
+                                    for kind in ('anchors', 'breadcrumbs')}
+        return self.lists[drone_id]
+
+    @staticmethod
+    def _apply_range(held: Dict, first_seq: int, from_seq: int, points: List) -> bool:
+        """Merge a doctrine range into what we hold; False if entries are missing"""
+        if first_seq > held['next']:
+            # Everything we hold was evicted or cleared on the server
+            held.update(first=first_seq, next=first_seq, points=[])
+        elif first_seq > held['first']:
+            held['points'] = held['points'][first_seq - held['first']:]
+            held['first'] = first_seq
+        if from_seq > held['next']:
+            return False
+        fresh = points[held['next'] - from_seq:]
+        if fresh:
+            held['points'] = held['points'] + fresh
+            held['next'] += len(fresh)
+        return True
+
+    def decode(self, frame: bytes) -> Optional[Dict]:
+        """Apply one frame; returns the full update dict (see class docstring for resync flags)"""
+        version, flags, seq, mask = HEADER.unpack_from(frame, 0)
+        if version != FRAME_VERSION:
+            raise ValueError(f'Unsupported telemetry frame version {version}')
+        offset = HEADER.size
+        if flags & FLAG_UUID_ID:
+            drone_id = str(uuid.UUID(bytes=bytes(frame[offset:offset + 16])))
+            offset += 16
+        else:
+            length = frame[offset]
+            drone_id = bytes(frame[offset + 1:offset + 1 + length]).decode('utf-8')
+            offset += 1 + length
+
+        current = self.drones.get(drone_id)
+        if flags & FLAG_SYNC:
+            if current is None:
+                return {'drone_id': drone_id, 'needs_keyframe': True}
+        elif flags & FLAG_KEYFRAME:
+            current = {'position_q': [0, 0, 0], 'state': {}, 'doctrine': {}, 'controls': {}}
+        elif current is None or seq != current['seq'] + 1:
+            return {'drone_id': drone_id, 'needs_keyframe': True}
+        if not flags & FLAG_SYNC:
+            current['seq'] = seq
+        state, doctrine = current['state'], current['doctrine']
+        lists = self._lists(drone_id)
+        needs_sync = False
+
+        bit = 1
+        while bit <= FIELD_LAST:
+            if mask & bit:
+                if bit in (FIELD_ANCHORS, FIELD_BREADCRUMBS):
+                    first_seq, from_seq, count = RANGE.unpack_from(frame, offset)
+                    offset += RANGE.size
+                    points = [tuple(POINT.unpack_from(frame, offset + k * POINT.size)) for k in range(count)]
+                    offset += count * POINT.size
+                    kind = 'anchors' if bit == FIELD_ANCHORS else 'breadcrumbs'
+                    needs_sync |= not self._apply_range(lists[kind], first_seq, from_seq, points)
+                else:
+                    fmt = FIELD_FORMATS[bit]
+                    values = fmt.unpack_from(frame, offset)
+                    offset += fmt.size
+                    self._apply(bit, values, current)
+            bit <<= 1
+
+        state['position'] = tuple(q / POSITION_SCALE for q in current['position_q'])
+        doctrine['anchors'] = lists['anchors']['points']
+        doctrine['breadcrumbs'] = lists['breadcrumbs']['points']
+        self.drones[drone_id] = current
+        return {
+            'drone_id': drone_id,
+            'seq': current['seq'],
+            'tick': current.get('tick'),
+            'sim_time': current.get('sim_time'),
+            'needs_sync': needs_sync,
+            'state': dict(state),
+            'doctrine': dict(doctrine),
+            'controls': dict(current['controls']),
+        }
+
+    @staticmethod
+    def _apply(bit: int, values: Tuple, current: Dict):
+        state, doctrine = current['state'], current['doctrine']
+        if bit == FIELD_POSITION:
+            current['position_q'] = [round(v * POSITION_SCALE) for v in values]
+        elif bit == FIELD_POSITION_DELTA:
+            current['position_q'] = [q + d for q, d in zip(current['position_q'], values)]
+        elif bit == FIELD_VELOCITY:
+            state['velocity'] = tuple(v / VELOCITY_SCALE for v in values)
+        elif bit == FIELD_ROTATION:
+            state['rotation'] = tuple(v / ROTATION_SCALE for v in values)
+        elif bit == FIELD_ANGULAR_VELOCITY:
+            state['angular_velocity'] = tuple(v / ANGULAR_VELOCITY_SCALE for v in values)
+        elif bit == FIELD_BATTERY:
+            state['battery'] = values[0] / PERCENT_SCALE
+        elif bit == FIELD_NAV_CONFIDENCE:
+            state['nav_confidence'] = values[0] / PERCENT_SCALE
+        elif bit == FIELD_GPS_JAM:
+            state['gps_jam'] = values[0] / PERCENT_SCALE
+        elif bit == FIELD_SPEED:
+            state['speed'] = values[0] / SPEED_SCALE
+        elif bit == FIELD_FLAGS:
+            state['armed'] = bool(values[0] & 1)
+            state['retrograde_active'] = bool(values[0] & 2)
+        elif bit == FIELD_MODE_STATUS:
+            state['mode'] = MODES[values[0]]
+            state['status'] = STATUSES[values[1]]
+        elif bit == FIELD_TARGET:
+            doctrine['target_point'] = tuple(values[1:]) if values[0] else None
+        elif bit == FIELD_RETURN_QUEUE:
+            doctrine['return_queue_length'] = values[0]
+        elif bit == FIELD_CONTROLS:
+            current['controls'] = {key: v / CONTROL_SCALE for key, v in zip(CONTROL_KEYS, values)}
+        elif bit == FIELD_PROXIMITY:
+            state['proximity'] = PROXIMITY_STATES[values[0]]
+            state['separation'] = -1.0 if values[1] == NO_SEPARATION else values[1] / SEPARATION_SCALE
+        elif bit == FIELD_YAW_RATE:
+            state['yaw_rate'] = values[0] / ANGULAR_VELOCITY_SCALE
+        elif bit == FIELD_CLOCK:
+            current['tick'], current['sim_time'] = values
@@ -0,0 +1,234 @@
+"""
+A.E.G.I.S Terrain
+Heightfield stored as memory-mapped tiles, read through an LRU cache under a memory budget.
+
+The ground is a square grid of height nodes every ``cell`` metres, split into
+square tiles of ``tile`` cells. Each tile is its own float32 ``.npy`` file
+holding ``(tile + 1) ** 2`` nodes. The last row and column repeat the next
+tile's first, so any bilinear lookup reads exactly one tile. Tiles are opened
+with ``mmap_mode='r'`` the first time a lookup touches them and are dropped
+least-recently-used once the mapped tiles exceed the budget. Shard workers map
+the same files and share the OS page cache. Outside the grid the ground is
+flat at height 0.
+
+    python terrain.py terrain --extent 1024      # write the procedural map used by the server
+"""
+
+from collections import OrderedDict
+from typing import Callable, Dict, Optional, Tuple
+import argparse
+import json
+import os
+import sys
+import threading
+
+import numpy as np
+
+TERRAIN_EXTENT = 512.0      # Metres covered along x and z, centred on the origin
+TERRAIN_CELL = 1.0          # Metres between height nodes
+TERRAIN_TILE = 128          # Cells per tile side
+TERRAIN_BUDGET = 64 << 20   # Bytes of mapped tiles kept in the cache
+TERRAIN_EDGE = 32.0         # Metres over which the procedural map fades to the flat plane
+MANIFEST = 'terrain.json'
+FORMAT_VERSION = 1
+
+
+def procedural_height(x: np.ndarray, z: np.ndarray) -> np.ndarray:
+    """Layered hills with a flattened landing area (the scene's original terrain)"""
+    y = np.sin(x * 0.05) * np.cos(z * 0.05) * 10.0                 # Large mountains
+    y += np.sin(x * 0.15 + 1.4) * np.cos(z * 0.15 + 2.3) * 4.0     # Medium hills
+    y += np.sin(x * 0.5) * np.cos(z * 0.5) * 1.0                   # Small detail
+    # Flat within 10 m of the origin, rising to full height at 20 m
+    dist = np.hypot(x, z)
+    y *= np.clip((dist - 10.0) / 10.0, 0.0, 1.0)
+    return np.maximum(-5.0, y)
+
+
+def _tile_name(tz: int, tx: int) -> str:
+    return f'tile_{tz:03d}_{tx:03d}.npy'
+
+
+def build_terrain(directory: str, height_fn: Callable[[np.ndarray, np.ndarray], np.ndarray] = procedural_height,
+                  extent: float = TERRAIN_EXTENT, cell: float = TERRAIN_CELL, tile: int = TERRAIN_TILE,
+                  edge: float = TERRAIN_EDGE) -> Dict:
+    """Write a heightfield sampled from ``height_fn(x, z)`` one tile at a time; returns the manifest.
+
+    Heights fade to 0 over the outer ``edge`` metres, so the map meets the flat
+    ground beyond it without a cliff.
+    """
+    tiles = max(1, int(np.ceil(extent / cell / tile)))
+    cells = tiles * tile
+    origin = -cells * cell / 2.0
+    half = cells * cell / 2.0
+    os.makedirs(directory, exist_ok=True)
+    low, high = np.inf, -np.inf
+    offsets = np.arange(tile + 1) * cell
+    for tz in range(tiles):
+        zs = origin + tz * tile * cell + offsets
+        for tx in range(tiles):
+            xs = origin + tx * tile * cell + offsets
+            heights = height_fn(xs[None, :], zs[:, None])
+            if edge > 0:
+                border = np.minimum(half - np.abs(xs)[None, :], half - np.abs(zs)[:, None])
+                heights = heights * np.clip(border / edge, 0.0, 1.0)
+            heights = np.ascontiguousarray(heights, dtype='<f4')
+            np.save(os.path.join(directory, _tile_name(tz, tx)), heights)
+            low, high = min(low, float(heights.min())), max(high, float(heights.max()))
+    manifest = {
+        'version': FORMAT_VERSION,
+        'origin': origin,
+        'cell': float(cell),
+        'tile': int(tile),
+        'tiles': tiles,
+        'min_height': low,
+        'max_height': high,
+    }
+    with open(os.path.join(directory, MANIFEST), 'w') as f:
+        json.dump(manifest, f, indent=2)
+    return manifest
+
+
+class Heightfield:
+    """Batched bilinear height lookups over a tiled, memory-mapped heightfield.
+
+    Lookups come from the simulation thread and tile requests from request
+    threads, so the cache takes its own lock.
+    """
+
+    def __init__(self, directory: str, budget: int = TERRAIN_BUDGET):
+        with open(os.path.join(directory, MANIFEST)) as f:
+            manifest = json.load(f)
+        if manifest.get('version') != FORMAT_VERSION:
+            raise ValueError(f'Unsupported terrain format {manifest.get("version")} in {directory}')
+        self.directory = directory
+        self.budget = int(budget)
+        self.manifest = manifest
+        self.origin = float(manifest['origin'])
+        self.cell = float(manifest['cell'])
+        self.tile = int(manifest['tile'])
+        self.tiles = int(manifest['tiles'])
+        self.cells = self.tiles * self.tile
+        self.tile_bytes = (self.tile + 1) ** 2 * 4
+        self._cache: 'OrderedDict[Tuple[int, int], np.ndarray]' = OrderedDict()
+        self._lock = threading.Lock()
+        # Accounting
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @classmethod
+    def open(cls, directory: str, budget: int = TERRAIN_BUDGET) -> 'Heightfield':
+        """Open ``directory``, writing the procedural map there first if it holds none"""
+        if not os.path.exists(os.path.join(directory, MANIFEST)):
+            build_terrain(directory)
+        return cls(directory, budget)
+
+    @property
+    def cached_bytes(self) -> int:
+        return len(self._cache) * self.tile_bytes
+
+    # ---------- tiles ----------
+
+    def _tile(self, tz: int, tx: int) -> np.ndarray:
+        """Mapped tile as a flat node array, loading it and evicting over budget (lock held)"""
+        key = (tz, tx)
+        block = self._cache.get(key)
+        if block is not None:
+            self._cache.move_to_end(key)
+            self.hits += 1
+            return block
+        # A plain ndarray view of the mapping indexes faster than np.memmap
+        block = np.asarray(np.load(os.path.join(self.directory, _tile_name(tz, tx)), mmap_mode='r')).reshape(-1)
+        self.misses += 1
+        self._cache[key] = block
+        # Always keep the tile just loaded, even when one tile exceeds the budget
+        while len(self._cache) > 1 and self.cached_bytes > self.budget:
+            self._cache.popitem(last=False)
+            self.evictions += 1
+        return block
+
+    def tile_data(self, tz: int, tx: int) -> Optional[bytes]:
+        """One tile as little-endian float32, rows along z; None outside the map"""
+        if not (0 <= tz < self.tiles and 0 <= tx < self.tiles):
+            return None
+        with self._lock:
+            return self._tile(tz, tx).tobytes()
+
+    # ---------- lookups ----------
+
+    def height(self, x: np.ndarray, z: np.ndarray) -> np.ndarray:
+        """Bilinear ground height at each (x, z); points are grouped so each tile is read once"""
+        x, z = np.broadcast_arrays(np.asarray(x, dtype=np.float64), np.asarray(z, dtype=np.float64))
+        heights = np.zeros(x.shape)
+        gx = (x - self.origin) / self.cell
+        gz = (z - self.origin) / self.cell
+        inside = (gx >= 0) & (gx <= self.cells) & (gz >= 0) & (gz <= self.cells)
+        if not inside.any():
+            return heights
+        gx, gz = gx[inside], gz[inside]
+        # Nodes i and i + 1 must both exist, so the far edge uses the last cell with fraction 1
+        ix = np.minimum(gx.astype(np.int64), self.cells - 1)
+        iz = np.minimum(gz.astype(np.int64), self.cells - 1)
+        fx, fz = gx - ix, gz - iz
+        tx, tz = ix // self.tile, iz // self.tile
+        # Flat index of each point's lower-left node inside its tile, then its 4 corners
+        width = self.tile + 1
+        local = (iz - tz * self.tile) * width + (ix - tx * self.tile)
+        corners = np.empty((4, gx.size))
+        offsets = np.array([[0], [1], [width], [width + 1]])
+        key = tz * self.tiles + tx
+        order = np.argsort(key, kind='stable')
+        starts = np.flatnonzero(np.diff(key[order], prepend=-1))
+        ends = np.append(starts[1:], order.size)
+        with self._lock:
+            for start, end in zip(starts.tolist(), ends.tolist()):
+                group = order[start:end]
+                first = group[0]
+                nodes = self._tile(int(tz[first]), int(tx[first]))
+                corners[:, group] = nodes[local[group] + offsets]
+        top = corners[0] * (1.0 - fx) + corners[1] * fx
+        bottom = corners[2] * (1.0 - fx) + corners[3] * fx
+        values = top * (1.0 - fz) + bottom * fz
+        heights[inside] = values
+        return heights
+
+    def highest(self, start: Tuple[float, float], end: Tuple[float, float]) -> float:
+        """Highest ground along the straight segment from ``start`` to ``end`` (x, z), every half cell"""
+        length = float(np.hypot(end[0] - start[0], end[1] - start[1]))
+        t = np.linspace(0.0, 1.0, max(2, int(np.ceil(2.0 * length / self.cell)) + 1))
+        return float(self.height(start[0] + (end[0] - start[0]) * t,
+                                 start[1] + (end[1] - start[1]) * t).max())
+
+    def describe(self) -> Dict:
+        """Grid geometry and cache state, for the API"""
+        with self._lock:
+            cached = len(self._cache)
+        return {
+            **self.manifest,
+            'cells': self.cells,
+            'cache': {
+                'tiles': cached,
+                'bytes': cached * self.tile_bytes,
+                'budget': self.budget,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+            },
+        }
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description='Write the procedural A.E.G.I.S heightfield')
+    parser.add_argument('directory', help='Output directory (TERRAIN_DIR)')
+    parser.add_argument('--extent', type=float, default=TERRAIN_EXTENT, help='Metres per side')
+    parser.add_argument('--cell', type=float, default=TERRAIN_CELL, help='Metres between nodes')
+    parser.add_argument('--tile', type=int, default=TERRAIN_TILE, help='Cells per tile side')
+    args = parser.parse_args(argv)
+    manifest = build_terrain(args.directory, extent=args.extent, cell=args.cell, tile=args.tile)
+    print(f"{manifest['tiles'] ** 2} tiles, heights {manifest['min_height']:.1f} to "
+          f"{manifest['max_height']:.1f} m -> {args.directory}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,6 @@
+"""Backend modules import each other flat (``from physics import ...``), as app.py does"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,137 @@
+"""Checkpoints written, restored into a fresh fleet, and flown on in lockstep"""
+
+from functools import partial
+import threading
+
+import numpy as np
+import pytest
+
+import checkpoint as checkpoint_module
+from checkpoint import _FIELDS, Checkpoint, Checkpointer, encode, write_checkpoint
+from physics import BreadcrumbRing, FleetEngine, PhysicsEngine
+from sharding import ShardPool
+
+DT = 1.0 / 60.0
+
+
+def _flown_fleet(count=30, seed=1):
+    fleet = FleetEngine()
+    engines = [PhysicsEngine(fleet) for _ in range(count)]
+    rng = np.random.default_rng(seed)
+    for engine in engines:
+        engine.arm()
+        engine.set_controls(forward=float(rng.uniform(0.8, 1)), yaw=float(rng.uniform(-0.1, 0.1)))
+    # Far enough out that the return routes through several anchors
+    for tick in range(1200):
+        fleet.step(DT)
+        if tick % 60 == 0:
+            for engine in engines[::2]:
+                engine.log_anchor()
+    for engine in engines[::4]:
+        engine._start_retrograde(commander_override=True)
+    for _ in range(30):
+        fleet.step(DT)
+    fleet.update_proximity()
+    drones = {f'drone-{i}': engine.row for i, engine in enumerate(engines)}
+    queues = {row: list(fleet.doctrine[row].return_queue) for row in drones.values()
+              if fleet.doctrine[row].return_queue}
+    return fleet, drones, queues
+
+
+def _restore(checkpoint, fleet=None):
+    fleet = fleet or FleetEngine()
+    rows = []
+    for index in range(len(checkpoint)):
+        engine = PhysicsEngine(fleet)
+        fleet.doctrine[engine.row] = checkpoint.doctrine(index, BreadcrumbRing(fleet, engine.row))
+        rows.append(engine.row)
+    checkpoint.apply(fleet, rows)
+    return fleet, dict(zip(checkpoint.drone_ids, rows))
+
+
+def _assert_same(fleet, drones, restored, restored_drones):
+    for drone_id, row in drones.items():
+        other = restored_drones[drone_id]
+        for name in _FIELDS:
+            assert np.array_equal(getattr(fleet, name)[row], getattr(restored, name)[other]), name
+        original, copy = fleet.doctrine[row], restored.doctrine[other]
+        assert original.anchors == copy.anchors
+        assert list(original.return_queue) == list(copy.return_queue)
+        assert original.target_point == copy.target_point
+        assert original.breadcrumbs.first_seq == copy.breadcrumbs.first_seq
+        assert np.array_equal(original.breadcrumbs.since(0), copy.breadcrumbs.since(0))
+
+
+def test_restore_round_trip(tmp_path):
+    fleet, drones, queues = _flown_fleet()
+    assert queues
+    path = str(tmp_path / 'fleet.ckpt')
+    write_checkpoint(path, fleet.snapshot(drones), queues)
+
+    restored, restored_drones = _restore(Checkpoint.load(path))
+    assert restored.tick == fleet.tick and restored.sim_time == fleet.sim_time
+    assert restored.retrograde_triggers == fleet.retrograde_triggers
+    assert restored.proximity_events == fleet.proximity_events
+    _assert_same(fleet, drones, restored, restored_drones)
+
+    # Returns in flight carry on exactly as they would have
+    for _ in range(300):
+        fleet.step(DT)
+        restored.step(DT)
+    _assert_same(fleet, drones, restored, restored_drones)
+
+
+def test_counters_are_restored_not_added():
+    fleet, drones, queues = _flown_fleet(count=8)
+    checkpoint = Checkpoint(encode(fleet.snapshot(drones), queues))
+    target = FleetEngine()
+    target.retrograde_triggers['commander'] = 5
+    restored, _ = _restore(checkpoint, target)
+    _restore(checkpoint, restored)
+    assert restored.retrograde_triggers == fleet.retrograde_triggers
+
+
+def test_shards_continue_from_restored_clock():
+    fleet, drones, queues = _flown_fleet(count=12)
+    checkpoint = Checkpoint(encode(fleet.snapshot(drones), queues))
+    local, local_drones = _restore(checkpoint)
+    pool = ShardPool(2, capacity=16)
+    try:
+        rows = [pool.add_drone(partial(checkpoint.doctrine, index)).row for index in range(len(checkpoint))]
+        checkpoint.apply(pool.fleet, rows)
+        for _ in range(120):
+            pool.step(DT)
+            local.step(DT)
+        sharded = dict(zip(checkpoint.drone_ids, rows))
+        for name in _FIELDS:
+            for drone_id, row in sharded.items():
+                assert np.array_equal(getattr(pool.fleet, name)[row], getattr(local, name)[local_drones[drone_id]]), name
+    finally:
+        pool.close()
+
+
+def test_rejects_other_files():
+    with pytest.raises(ValueError):
+        Checkpoint(b'NOTACKPT' + bytes(32))
+
+
+def test_checkpointer_survives_failed_writes(tmp_path, monkeypatch):
+    fleet, drones, queues = _flown_fleet(count=4)
+    snapshot = fleet.snapshot(drones)
+
+    def broken(*args):
+        raise ValueError('unencodable')
+
+    monkeypatch.setattr(checkpoint_module, 'write_checkpoint', broken)
+    checkpointer = Checkpointer(str(tmp_path / 'fleet.ckpt'), interval=3600)
+    checkpointer.submit(snapshot, queues)
+    with checkpointer._wake:
+        assert checkpointer._wake.wait_for(lambda: checkpointer._pending is None, 10)
+    monkeypatch.undo()
+    # The failure is counted, the writer keeps going and close() still returns
+    closer = threading.Thread(target=checkpointer.close, args=((snapshot, queues),), daemon=True)
+    closer.start()
+    closer.join(10)
+    assert not closer.is_alive()
+    assert checkpointer.failed == 1 and checkpointer.written == 1
+    assert len(Checkpoint.load(str(tmp_path / 'fleet.ckpt'))) == len(drones)
@@ -0,0 +1,96 @@
+"""Batched FleetEngine steps against drones stepped one at a time"""
+
+import numpy as np
+import pytest
+
+from physics import FleetEngine, PhysicsEngine
+
+DT = 1.0 / 60.0
+DRONES = 12
+# Every per-row array a step writes
+STATE_FIELDS = FleetEngine._VEC3_FIELDS + FleetEngine._SCALAR_FIELDS + FleetEngine._FLAG_FIELDS \
+    + FleetEngine._CODE_FIELDS + FleetEngine._SEQ_FIELDS + ('controls',)
+
+
+def _fly(engines, step, ticks=1500, seed=7):
+    """Drive ``engines`` through the same seeded inputs and doctrine events"""
+    rng = np.random.default_rng(seed)
+    for engine in engines:
+        engine.arm()
+    for tick in range(ticks):
+        if tick % 30 == 0:
+            for engine in engines:
+                engine.set_controls(forward=float(rng.uniform(-1, 1)), yaw=float(rng.uniform(-1, 1)),
+                                    throttle=float(rng.uniform(0.3, 1)))
+        if tick % 200 == 0:
+            for engine in engines[::3]:
+                engine.log_anchor()
+        if tick in (600, 1400):
+            # The first group lands before the end, the second is still returning
+            for engine in engines[:4] if tick == 600 else engines[9:]:
+                engine._start_retrograde(commander_override=True)
+        if tick == 900:
+            engines[5].adjust_jam(60.0)
+            engines[6].reset()
+            engines[6].arm()
+        step()
+
+
+def test_fleet_step_matches_standalone_engines():
+    fleet = FleetEngine()
+    batched = [PhysicsEngine(fleet) for _ in range(DRONES)]
+    _fly(batched, lambda: fleet.step(DT))
+
+    standalone = [PhysicsEngine() for _ in range(DRONES)]
+    _fly(standalone, lambda: [engine.update(DT) for engine in standalone])
+
+    assert fleet.retrograde_triggers['commander'] == 7
+    assert fleet.retrograde[batched[-1].row] and any(engine.doctrine.anchors for engine in batched)
+    for engine, alone in zip(batched, standalone):
+        for name in STATE_FIELDS:
+            assert np.array_equal(getattr(fleet, name)[engine.row], getattr(alone.fleet, name)[alone.row]), name
+        assert engine.doctrine.anchors == alone.doctrine.anchors
+        assert list(engine.doctrine.return_queue) == list(alone.doctrine.return_queue)
+        assert np.array_equal(engine.doctrine.breadcrumbs.since(0), alone.doctrine.breadcrumbs.since(0))
+
+
+def test_update_rejects_shared_fleet():
+    fleet = FleetEngine()
+    engine = PhysicsEngine(fleet)
+    PhysicsEngine(fleet)
+    with pytest.raises(RuntimeError):
+        engine.update(DT)
+    assert fleet.sim_time == 0.0
+
+
+def test_released_row_starts_clean():
+    fleet = FleetEngine()
+    engines = [PhysicsEngine(fleet) for _ in range(3)]
+    _fly(engines, lambda: fleet.step(DT), ticks=300)
+    fleet.release(engines[1].row)
+    reused = PhysicsEngine(fleet)
+    fresh = PhysicsEngine()
+    assert reused.row == engines[1].row
+    assert reused.state.to_dict() == fresh.state.to_dict()
+    assert len(reused.doctrine.breadcrumbs) == 0
+    assert reused.doctrine.anchors == []
+
+
+def test_snapshot_breadcrumbs_survive_later_ticks():
+    fleet = FleetEngine()
+    engines = [PhysicsEngine(fleet) for _ in range(DRONES)]
+    for engine in engines:
+        engine.arm()
+        engine.set_controls(forward=1.0, yaw=0.3)
+    for _ in range(600):
+        fleet.step(DT)
+    held = fleet.snapshot()
+    expected = np.array(held.breadcrumbs)
+    # Enough snapshots come and go to cycle every spare buffer many times
+    for _ in range(400):
+        fleet.step(DT)
+        fleet.snapshot()
+    assert not np.array_equal(fleet.breadcrumbs[:DRONES], expected)
+    assert np.array_equal(held.breadcrumbs, expected)
+    # Dropped snapshots hand their buffer back instead of growing the pool
+    assert len(fleet._ring_copies) <= 2
@@ -0,0 +1,53 @@
+"""Flight recorder writes, and the writer surviving a disk that fails under it"""
+
+import time
+
+import numpy as np
+
+from physics import FleetEngine, PhysicsEngine
+from recorder import FlightRecorder, FlightRecording
+
+DT = 1.0 / 60.0
+
+
+def _fleet(count):
+    fleet = FleetEngine()
+    engines = [PhysicsEngine(fleet) for _ in range(count)]
+    for engine in engines:
+        engine.arm()
+        engine.set_controls(forward=1.0)
+    return fleet, engines
+
+
+def test_failed_session_is_closed_and_the_rest_keep_recording(tmp_path, monkeypatch):
+    fleet, (good, bad) = _fleet(2)
+    recorder = FlightRecorder(str(tmp_path), flush_interval=0.01)
+    good_name = recorder.open_session('good', good.row)
+    recorder.open_session('bad', bad.row)
+    bad_session = recorder.sessions['bad']
+
+    def full(records):
+        raise OSError(28, 'No space left on device')
+
+    monkeypatch.setattr(bad_session, 'append', full)
+    for _ in range(60):
+        fleet.step(DT)
+        recorder.capture(fleet)
+    deadline = time.monotonic() + 10
+    while not recorder.failed_writes and time.monotonic() < deadline:
+        time.sleep(0.01)
+    # The next capture stops recording the failed drone
+    for _ in range(60):
+        fleet.step(DT)
+        recorder.capture(fleet)
+    assert list(recorder.sessions) == ['good']
+    recorder.close()
+
+    stats = recorder.stats()
+    assert stats['failed_writes'] == 1
+    assert stats['pending_bytes'] == 0 and stats['dropped_records'] == 0
+    assert bad_session.files is None
+
+    recording = FlightRecording(str(tmp_path / good_name))
+    assert len(recording.records) == 120
+    assert np.array_equal(recording.records['tick'], np.arange(1, 121))
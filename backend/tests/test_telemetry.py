@@ -0,0 +1,139 @@
+"""Binary frames decoded back against the fleet they were encoded from"""
+
+import numpy as np
+
+from physics import MODES, STATUSES, FleetEngine, PhysicsEngine
+from telemetry import (
+    MAX_RANGE_POINTS, TelemetryDecoder, TelemetryEncoder, FleetFrameEncoder, decode_fleet_frame
+)
+
+DT = 1.0 / 60.0
+
+
+def _flying_fleet(count=8, seed=5):
+    fleet = FleetEngine()
+    engines = [PhysicsEngine(fleet) for _ in range(count)]
+    rng = np.random.default_rng(seed)
+    for engine in engines:
+        engine.arm()
+        engine.set_controls(forward=float(rng.uniform(0.2, 1)), yaw=float(rng.uniform(-0.5, 0.5)),
+                            throttle=float(rng.uniform(0.5, 0.9)))
+    return fleet, engines
+
+
+def _points(points):
+    return np.asarray(points, dtype=np.float64).reshape(-1, 3)
+
+
+def _assert_matches(update, fleet, row, position_tolerance=0.006, battery_tolerance=0.006):
+    """Decoded state equals the fleet row up to quantization (or the dead-bands)"""
+    state, doctrine = update['state'], update['doctrine']
+    assert np.allclose(state['position'], fleet.position[row], atol=position_tolerance)
+    assert np.allclose(state['velocity'], fleet.velocity[row], atol=0.006)
+    assert abs(state['battery'] - fleet.battery[row]) <= battery_tolerance
+    assert state['armed'] == bool(fleet.armed[row])
+    assert state['retrograde_active'] == bool(fleet.retrograde[row])
+    assert state['mode'] == MODES[fleet.mode[row]]
+    assert state['status'] == STATUSES[fleet.status[row]]
+    assert doctrine['return_queue_length'] == fleet.return_queue_len[row]
+    assert np.allclose(_points(doctrine['anchors']), _points(fleet.doctrine[row].anchors), atol=1e-3)
+    assert np.allclose(_points(doctrine['breadcrumbs']), fleet.doctrine[row].breadcrumbs.since(0), atol=1e-3)
+    assert update['tick'] == fleet.tick
+
+
+def test_stream_round_trip():
+    fleet, engines = _flying_fleet()
+    rows, ids = [e.row for e in engines], [f'drone-{i}' for i in range(len(engines))]
+    encoder, decoder = TelemetryEncoder(fleet), TelemetryDecoder()
+    for tick in range(600):
+        if tick % 50 == 0:
+            engines[tick // 50 % len(engines)].log_anchor()
+        if tick == 300:
+            engines[2]._start_retrograde(commander_override=True)
+            engines[3].reset()
+        fleet.step(DT)
+        for row, frame in zip(rows, encoder.encode(rows, ids)):
+            update = decoder.decode(frame)
+            assert not update.get('needs_keyframe') and not update['needs_sync']
+            _assert_matches(update, fleet, row)
+
+
+def test_deadbands_and_heartbeat():
+    fleet, engines = _flying_fleet(count=2)
+    engines[1].disarm()
+    rows, ids = [e.row for e in engines], ['moving', 'idle']
+    for _ in range(120):
+        fleet.step(DT)      # Let the disarmed drone settle on the ground
+    encoder = TelemetryEncoder(fleet, keyframe_interval=1000, deadbands={'position': 0.05, 'battery': 0.5},
+                               heartbeat=5)
+    decoder = TelemetryDecoder()
+    sent = {drone_id: 0 for drone_id in ids}
+    for _ in range(200):
+        fleet.step(DT)
+        for row, drone_id, frame in zip(rows, ids, encoder.encode(rows, ids)):
+            if frame is None:
+                continue
+            sent[drone_id] += 1
+            # Dead-band plus half a quantization step
+            _assert_matches(decoder.decode(frame), fleet, row, position_tolerance=0.0551, battery_tolerance=0.5051)
+    assert sent['moving'] > 150
+    # The idle drone gets its first keyframe, then one heartbeat every fifth encode
+    assert sent['idle'] == 200 // 5
+    assert encoder.heartbeats == sent['idle'] - 1
+
+
+def test_missed_frames_resync():
+    fleet, engines = _flying_fleet(count=1)
+    row, drone_id = engines[0].row, 'solo'
+    encoder, decoder = TelemetryEncoder(fleet, keyframe_interval=1000), TelemetryDecoder()
+    recovered = []
+    for tick in range(400):
+        fleet.step(DT)
+        if tick % 40 == 0:
+            engines[0].log_anchor()
+        frame = encoder.encode([row], [drone_id])[0]
+        if 100 <= tick < 200:
+            # Lost in transit; the sequence gap asks for a keyframe
+            continue
+        update = decoder.decode(frame)
+        if update.get('needs_keyframe'):
+            encoder.force_keyframe(row)
+            recovered.append('keyframe')
+            continue
+        if update['needs_sync']:
+            recovered.append('sync')
+            cursors = decoder.cursors(drone_id)
+            update = decoder.decode(encoder.encode_sync(row, drone_id, cursors['anchor_seq'],
+                                                        cursors['breadcrumb_seq']))
+            assert not update['needs_sync']
+    assert recovered == ['keyframe', 'sync']
+    _assert_matches(update, fleet, row)
+
+
+def test_u16_counts_are_clamped():
+    fleet = FleetEngine()
+    row = PhysicsEngine(fleet).row
+    for seq in range(MAX_RANGE_POINTS + 1000):
+        fleet.add_anchor(row, (float(seq), 0.0, 0.0))
+    fleet.return_queue_len[row] = 100000
+    encoder, decoder = TelemetryEncoder(fleet), TelemetryDecoder()
+    first = decoder.decode(encoder.encode([row], ['many'])[0])
+    assert len(first['doctrine']['anchors']) == MAX_RANGE_POINTS
+    assert first['doctrine']['return_queue_length'] == 0xFFFF
+    second = decoder.decode(encoder.encode([row], ['many'])[0])
+    assert len(second['doctrine']['anchors']) == MAX_RANGE_POINTS + 1000
+    assert second['doctrine']['anchors'][-1] == (float(MAX_RANGE_POINTS + 999), 0.0, 0.0)
+
+
+def test_fleet_frame_round_trip():
+    fleet, engines = _flying_fleet(count=20)
+    for _ in range(120):
+        fleet.step(DT)
+    rows = [e.row for e in engines]
+    ids = [f'drone-{i}' for i in rows]
+    decoded = decode_fleet_frame(FleetFrameEncoder().encode(fleet, rows, ids))
+    assert decoded['drone_ids'] == ids
+    assert decoded['tick'] == fleet.tick
+    assert np.allclose(decoded['position'], fleet.position[rows], atol=1e-3)
+    assert decoded['status'] == [STATUSES[code] for code in fleet.status[rows]]
+    assert np.allclose(decoded['nav_confidence'], fleet.nav_confidence[rows], atol=0.006)
@@ -1,6 +1,7 @@
 import React, { useEffect, useRef } from 'react';
 import * as THREE from 'three';
-import { useDroneStore } from '../store/droneStore';
+import { useDroneStore, sampleMotion, fleetView, STATUSES } from '../store/droneStore';
+import { createTerrain } from './Terrain';
 
 export const DroneScene = React.forwardRef(({ socket }, ref) => {
   const mountRef = useRef(null);
@@ -112,7 +113,9 @@ export const DroneScene = React.forwardRef(({ socket }, ref) => {
     scene.add(sunLight);
 
     // ===== GROUND =====
-    const gridHelper = new THREE.GridHelper(200, 40, 0x00ffff, 0x004444);
+    // Server heightfield; the grid only covers the flattened landing area
+    const terrain = createTerrain(scene);
+    const gridHelper = new THREE.GridHelper(20, 4, 0x00ffff, 0x004444);
     gridHelper.position.y = -0.01;
     gridHelper.material.opacity = 0.5;
     gridHelper.material.transparent = true;
@@ -129,7 +132,7 @@ export const DroneScene = React.forwardRef(({ socket }, ref) => {
     });
     const plane = new THREE.Mesh(planeGeometry, planeMaterial);
     plane.rotation.x = -Math.PI / 2;
-    plane.position.y = -0.02;
+    plane.position.y = -5.5; // Below the lowest terrain
     plane.receiveShadow = true;
     scene.add(plane);
 
@@ -265,6 +268,53 @@ export const DroneScene = React.forwardRef(({ socket }, ref) => {
     trailLineRef.current = trailLine;
     scene.add(trailLine);
 
+    // ===== FLEET (fleet_update observer view) =====
+    // Every other drone is one instance of a single mesh, written straight from
+    // the fleetView typed arrays when a new frame lands; no per-drone React state
+    const fleetGeometry = new THREE.ConeGeometry(0.4, 1.2, 8);
+    fleetGeometry.rotateX(Math.PI / 2); // Nose along +z, the physics forward axis
+    const fleetMaterial = new THREE.MeshLambertMaterial({ color: 0xffffff });
+    const fleetColors = {
+      NOMINAL: new THREE.Color(0x00ffaa),
+      WARNING: new THREE.Color(0xffaa00),
+      SAFETY_OVERRIDE: new THREE.Color(0xff3333),
+      COMMANDER_RTB: new THREE.Color(0xff00ff)
+    };
+    const statusColors = STATUSES.map((status) => fleetColors[status]);
+    const fleetDummy = new THREE.Object3D();
+    let fleetMesh = null;
+    let fleetVersion = -1;
+
+    const syncFleet = () => {
+      if (fleetView.version === fleetVersion) return;
+      fleetVersion = fleetView.version;
+      if (!fleetMesh || fleetMesh.instanceMatrix.count < fleetView.count) {
+        if (fleetMesh) {
+          scene.remove(fleetMesh);
+          fleetMesh.dispose();
+        }
+        fleetMesh = new THREE.InstancedMesh(fleetGeometry, fleetMaterial, Math.max(64, fleetView.yaw.length));
+        fleetMesh.instanceMatrix.setUsage(THREE.DynamicDrawUsage);
+        fleetMesh.frustumCulled = false;
+        scene.add(fleetMesh);
+      }
+      const ownId = useDroneStore.getState().watchedDroneId();
+      const { ids, position, yaw, status } = fleetView;
+      let shown = 0;
+      for (let i = 0; i < fleetView.count; i++) {
+        if (ids[i] === ownId) continue;
+        fleetDummy.position.set(position[i * 3], position[i * 3 + 1], position[i * 3 + 2]);
+        fleetDummy.rotation.set(0, yaw[i], 0);
+        fleetDummy.updateMatrix();
+        fleetMesh.setMatrixAt(shown, fleetDummy.matrix);
+        fleetMesh.setColorAt(shown, statusColors[status[i]] || fleetColors.NOMINAL);
+        shown++;
+      }
+      fleetMesh.count = shown;
+      fleetMesh.instanceMatrix.needsUpdate = true;
+      if (fleetMesh.instanceColor) fleetMesh.instanceColor.needsUpdate = true;
+    };
+
     const handleResize = () => {
       const width = window.innerWidth;
       const height = window.innerHeight;
@@ -279,8 +329,13 @@ export const DroneScene = React.forwardRef(({ socket }, ref) => {
     const animate = () => {
       animationIdRef.current = requestAnimationFrame(animate);
 
-      if (droneModelRef.current) {
-        // SMOOTH INTERPOLATION
+      // Binary frames are timestamped: sample the buffered frames at render time
+      const sampled = sampleMotion(performance.now());
+      if (droneModelRef.current && sampled) {
+        droneModelRef.current.position.set(...sampled.position);
+        droneModelRef.current.quaternion.setFromEuler(new THREE.Euler(...sampled.rotation, 'YXZ'));
+      } else if (droneModelRef.current) {
+        // Untimed (JSON) updates: ease toward the latest state
         const targetPos = new THREE.Vector3(...positionRef.current);
         const currentPos = droneModelRef.current.position;
 
@@ -324,6 +379,9 @@ export const DroneScene = React.forwardRef(({ socket }, ref) => {
       const cameraMode = cameraModeRef.current;
       const cameraDistance = cameraDistanceRef.current;
 
+      syncFleet();
+      terrain.update(position[0], position[2]);
+
       propellersRef.current.forEach((prop) => {
         prop.rotation.y += 0.5;
       });
@@ -410,9 +468,13 @@ export const DroneScene = React.forwardRef(({ socket }, ref) => {
       if (mountRef.current && renderer.domElement) {
         mountRef.current.removeChild(renderer.domElement);
       }
+      terrain.dispose();
       planeGeometry.dispose();
       padGeometry.dispose();
       ringGeometry.dispose();
+      if (fleetMesh) fleetMesh.dispose();
+      fleetGeometry.dispose();
+      fleetMaterial.dispose();
       starsGeometry.dispose();
       bodyGeometry.dispose();
       topGeometry.dispose();
@@ -1,5 +1,6 @@
 import React, { useEffect, useRef, useState } from 'react';
 import { useDroneStore } from '../store/droneStore';
+import { terrainHeight } from './Terrain';
 import './HUD.css';
 
 // Sound generator
@@ -36,9 +37,13 @@ export const HUD = ({ socket }) => {
   const navConfidence = useDroneStore((state) => state.navConfidence);
   const status = useDroneStore((state) => state.status);
   const retrogradeActive = useDroneStore((state) => state.retrogradeActive);
+  const proximity = useDroneStore((state) => state.proximity);
+  const separation = useDroneStore((state) => state.separation);
   const breadcrumbs = useDroneStore((state) => state.breadcrumbs);
   const anchors = useDroneStore((state) => state.anchors);
   const thresholds = useDroneStore((state) => state.thresholds);
+  const replay = useDroneStore((state) => state.replay);
+  const setReplay = useDroneStore((state) => state.setReplay);
 
   const minimapRef = useRef(null);
   const lastStatusRef = useRef('NOMINAL');
@@ -171,6 +176,20 @@ export const HUD = ({ socket }) => {
     }
   };
 
+  const handleReplayControl = (action, value) => {
+    if (socket && replay) {
+      socket.emit('replay_control', { stream_id: replay.stream_id, action, value });
+    }
+  };
+
+  const handleReplayExit = () => {
+    if (socket && replay) {
+      socket.emit('replay_close', { stream_id: replay.stream_id });
+      setReplay(null);
+      if (droneId) socket.emit('request_keyframe', { drone_id: droneId });
+    }
+  };
+
   const getStatusColor = () => {
     if (status === 'COMMANDER_RTB') return '#ff00ff'; // Purple for override
     if (status === 'SAFETY_OVERRIDE' || retrogradeActive) return '#ff3333';
@@ -264,6 +283,12 @@ export const HUD = ({ socket }) => {
               {status.replace('_', ' ')}
             </span>
           </div>
+          <div className="status-row">
+            <span className="label">SEPARATION:</span>
+            <span className={`value ${proximity !== 'CLEAR' ? 'warning' : ''}`}>
+              {proximity === 'CLEAR' ? 'CLEAR' : `${proximity} ${separation.toFixed(1)}m`}
+            </span>
+          </div>
 
           {/* Doctrine bars */}
           <div className="doctrine-section">
@@ -324,6 +349,10 @@ export const HUD = ({ socket }) => {
               <span className="telemetry-label">ALT</span>
               <span className="telemetry-value">{position[1].toFixed(1)}m</span>
             </div>
+            <div className="telemetry-item">
+              <span className="telemetry-label">AGL</span>
+              <span className="telemetry-value">{(position[1] - terrainHeight(position[0], position[2])).toFixed(1)}m</span>
+            </div>
             <div className="telemetry-item">
               <span className="telemetry-label">SPD</span>
               <span className="telemetry-value">{Math.abs(speed || 0).toFixed(1)}m/s</span>
@@ -340,6 +369,27 @@ export const HUD = ({ socket }) => {
         </div>
       </div>
 
+      {/* Bottom Center - Replay transport */}
+      {replay && (
+        <div className="hud-panel hud-bottom-center">
+          <div className="panel-title">REPLAY {replay.recorded_drone_id.slice(0, 8)}</div>
+          <div className="position-display">
+            <span className="pos-item">
+              {formatTime(Math.floor(replay.time - replay.start_time))} / {formatTime(Math.floor(replay.end_time - replay.start_time))}
+            </span>
+            <button className="action-btn" onClick={() => handleReplayControl('seek', replay.time - 10)}>-10s</button>
+            <button className="action-btn" onClick={() => handleReplayControl(replay.paused || replay.ended ? 'play' : 'pause')}>
+              {replay.paused || replay.ended ? 'PLAY' : 'PAUSE'}
+            </button>
+            <button className="action-btn" onClick={() => handleReplayControl('seek', replay.time + 10)}>+10s</button>
+            <button className="action-btn" onClick={() => handleReplayControl('speed', replay.speed / 2)}>×½</button>
+            <span className="pos-item">{replay.speed}x</span>
+            <button className="action-btn" onClick={() => handleReplayControl('speed', replay.speed * 2)}>×2</button>
+            <button className="action-btn reset" onClick={handleReplayExit}>EXIT</button>
+          </div>
+        </div>
+      )}
+
       {/* Bottom Left - Minimap */}
       <div className="hud-panel hud-bottom-left minimap-panel">
         <div className="panel-title">TACTICAL MAP</div>
@@ -1,100 +1,139 @@
-import React, { useRef, useMemo } from 'react';
 import * as THREE from 'three';
 
-// Simple pseudo-random noise function
-const noise = (x, z) => {
-    let y = 0;
-    // Layer 1: Large mountains
-    y += Math.sin(x * 0.05) * Math.cos(z * 0.05) * 10;
-    // Layer 2: Medium hills
-    y += Math.sin(x * 0.15 + 1.4) * Math.cos(z * 0.15 + 2.3) * 4;
-    // Layer 3: Small detail
-    y += Math.sin(x * 0.5) * Math.cos(z * 0.5) * 1;
+// Heightfield tiles served by the backend (GET /api/terrain, /api/terrain/tiles/<tz>/<tx>).
+// The simulation collides with the same tiles, so what you see is what drones fly over.
+const API_BASE = 'http://127.0.0.1:5000';
+const LOAD_RADIUS = 200; // Metres around the drone whose tiles are loaded
 
-    // Flatten center area for landing pad (radius 20)
-    const dist = Math.sqrt(x * x + z * z);
-    if (dist < 20) {
-        y *= Math.max(0, (dist - 10) / 10);
-    }
+// Valley grass -> rock -> snow, by height
+const GRASS = new THREE.Color(0x1c3a1c);
+const ROCK_LOW = new THREE.Color(0x2a3a2a);
+const ROCK_HIGH = new THREE.Color(0x5a5a5a);
+const SNOW = new THREE.Color(0xffffff);
 
-    return Math.max(-5, y); // Floor at -5
+const heightColor = (height, color) => {
+  if (height < 1) {
+    color.copy(GRASS);
+  } else if (height < 8) {
+    color.lerpColors(ROCK_LOW, ROCK_HIGH, (height - 1) / 7);
+  } else {
+    color.lerpColors(ROCK_HIGH, SNOW, Math.min(1, (height - 8) / 8));
+  }
+  return color;
 };
 
-export const Terrain = () => {
-    const meshRef = useRef();
-
-    const { geometry, colors } = useMemo(() => {
-        const size = 400;
-        const resolution = 100;
-        const geom = new THREE.PlaneGeometry(size, size, resolution, resolution);
+let active = null;
 
-        const positions = geom.attributes.position;
-        const colors = [];
-        const colorAttribute = new THREE.Float32BufferAttribute(positions.count * 3, 3);
+// Ground height under (x, z) from the loaded tiles; 0 where nothing is loaded
+export const terrainHeight = (x, z) => (active ? active.heightAt(x, z) : 0);
 
-        const count = positions.count;
-        for (let i = 0; i < count; i++) {
-            const x = positions.getX(i);
-            const z = positions.getY(i); // Plane is consistent X-Y, we rotate later
+// Adds the terrain to `scene`. Call update(x, z) as the drone moves to load nearby tiles.
+export const createTerrain = (scene) => {
+  const group = new THREE.Group();
+  scene.add(group);
+  const material = new THREE.MeshStandardMaterial({
+    vertexColors: true,
+    roughness: 0.9,
+    metalness: 0.1,
+    flatShading: true
+  });
+  const tiles = new Map(); // "tz/tx" -> { heights, mesh } (null while loading)
+  let manifest = null;
+  let disposed = false;
 
-            // Calculate height
-            const height = noise(x, z);
-            positions.setZ(i, height); // Set Z because Plane defaults to XY
+  fetch(`${API_BASE}/api/terrain`)
+    .then((response) => (response.ok ? response.json() : null))
+    .then((data) => { manifest = data; })
+    .catch(() => console.warn('Terrain unavailable; flying over flat ground'));
 
-            // Calculate Color based on Height
-            let color = new THREE.Color();
+  const buildMesh = (tz, tx, heights) => {
+    const { tile, cell, origin } = manifest;
+    const size = tile * cell;
+    const geometry = new THREE.PlaneGeometry(size, size, tile, tile);
+    // Lying flat, vertex i sits at row i / (tile + 1) along +z, matching the tile's node order
+    geometry.rotateX(-Math.PI / 2);
+    geometry.translate(origin + (tx + 0.5) * size, 0, origin + (tz + 0.5) * size);
+    const positions = geometry.attributes.position;
+    const colors = new Float32Array(positions.count * 3);
+    const color = new THREE.Color();
+    for (let i = 0; i < positions.count; i++) {
+      positions.setY(i, heights[i]);
+      heightColor(heights[i], color).toArray(colors, i * 3);
+    }
+    geometry.setAttribute('color', new THREE.BufferAttribute(colors, 3));
+    geometry.computeVertexNormals();
+    const mesh = new THREE.Mesh(geometry, material);
+    mesh.receiveShadow = true;
+    return mesh;
+  };
 
-            if (height < 1) {
-                // Valley / Grass (Dark Green)
-                color.setHSL(0.35, 0.4, 0.15 + Math.random() * 0.05);
-            } else if (height < 8) {
-                // Hills / Rock (Grey-Brown)
-                const t = (height - 1) / 7;
-                color.lerpColors(
-                    new THREE.Color(0x2a3a2a),
-                    new THREE.Color(0x5a5a5a),
-                    t
-                );
-            } else {
-                // Peaks / Snow (White-Grey)
-                const t = Math.min(1, (height - 8) / 8);
-                color.lerpColors(
-                    new THREE.Color(0x5a5a5a),
-                    new THREE.Color(0xffffff),
-                    t
-                );
-            }
+  const load = (tz, tx) => {
+    const key = `${tz}/${tx}`;
+    tiles.set(key, null);
+    fetch(`${API_BASE}/api/terrain/tiles/${tz}/${tx}`)
+      .then((response) => (response.ok ? response.arrayBuffer() : Promise.reject(response.status)))
+      .then((buffer) => {
+        if (disposed) return;
+        const heights = new Float32Array(buffer);
+        const mesh = buildMesh(tz, tx, heights);
+        group.add(mesh);
+        tiles.set(key, { heights, mesh });
+      })
+      .catch(() => tiles.delete(key)); // Retried on a later update
+  };
 
-            colorAttribute.setXYZ(i, color.r, color.g, color.b);
-        }
+  const tileSpan = (low, high) => {
+    const size = manifest.tile * manifest.cell;
+    const first = Math.max(0, Math.floor((low - manifest.origin) / size));
+    const last = Math.min(manifest.tiles - 1, Math.floor((high - manifest.origin) / size));
+    return [first, last];
+  };
 
-        geom.setAttribute('color', colorAttribute);
-        geom.computeVertexNormals();
+  const update = (x, z) => {
+    if (!manifest || disposed) return;
+    const [z0, z1] = tileSpan(z - LOAD_RADIUS, z + LOAD_RADIUS);
+    const [x0, x1] = tileSpan(x - LOAD_RADIUS, x + LOAD_RADIUS);
+    for (let tz = z0; tz <= z1; tz++) {
+      for (let tx = x0; tx <= x1; tx++) {
+        if (!tiles.has(`${tz}/${tx}`)) load(tz, tx);
+      }
+    }
+  };
 
-        return { geometry: geom };
-    }, []);
+  // Same bilinear lookup as terrain.Heightfield.height
+  const heightAt = (x, z) => {
+    if (!manifest) return 0;
+    const { tile, cell, origin, tiles: perSide } = manifest;
+    const cells = perSide * tile;
+    const gx = (x - origin) / cell;
+    const gz = (z - origin) / cell;
+    if (gx < 0 || gz < 0 || gx > cells || gz > cells) return 0;
+    const ix = Math.min(Math.floor(gx), cells - 1);
+    const iz = Math.min(Math.floor(gz), cells - 1);
+    const tx = Math.floor(ix / tile);
+    const tz = Math.floor(iz / tile);
+    const loaded = tiles.get(`${tz}/${tx}`);
+    if (!loaded) return 0;
+    const width = tile + 1;
+    const i = (iz - tz * tile) * width + (ix - tx * tile);
+    const fx = gx - ix;
+    const fz = gz - iz;
+    const h = loaded.heights;
+    const top = h[i] * (1 - fx) + h[i + 1] * fx;
+    const bottom = h[i + width] * (1 - fx) + h[i + width + 1] * fx;
+    return top * (1 - fz) + bottom * fz;
+  };
 
-    return (
-        <group>
-            <mesh
-                ref={meshRef}
-                geometry={geometry}
-                rotation={[-Math.PI / 2, 0, 0]}
-                receiveShadow
-            >
-                <meshStandardMaterial
-                    vertexColors
-                    roughness={0.9}
-                    metalness={0.1}
-                    flatShading={true}
-                />
-            </mesh>
+  const dispose = () => {
+    disposed = true;
+    tiles.forEach((loaded) => loaded && loaded.mesh.geometry.dispose());
+    tiles.clear();
+    material.dispose();
+    scene.remove(group);
+    if (active === terrain) active = null;
+  };
 
-            {/* Water Plane underneath */}
-            <mesh rotation={[-Math.PI / 2, 0, 0]} position={[0, -2, 0]}>
-                <planeGeometry args={[1000, 1000]} />
-                <meshStandardMaterial color="#001133" roughness={0.1} metalness={0.8} />
-            </mesh>
-        </group>
-    );
+  const terrain = { update, heightAt, dispose };
+  active = terrain;
+  return terrain;
 };
@@ -4,6 +4,8 @@ import { useDroneStore } from '../store/droneStore';
 export const useKeyboardControls = (socket) => {
   const droneId = useDroneStore((state) => state.droneId);
   const keyStatesRef = useRef({});
+  // Server drops set_controls older than the newest it has applied
+  const controlSeqRef = useRef(0);
 
   // Track key states
   useEffect(() => {
@@ -106,6 +108,7 @@ export const useKeyboardControls = (socket) => {
       if (socket && droneId) {
         socket.emit('set_controls', {
           drone_id: droneId,
+          seq: ++controlSeqRef.current,
           forward: forward,
           yaw: yaw,
           throttle: throttle
@@ -1,6 +1,9 @@
 import { useEffect, useRef } from 'react';
 import { io } from 'socket.io-client';
-import { useDroneStore } from '../store/droneStore';
+import { useDroneStore, resetTelemetryStreams, doctrineSyncRequest } from '../store/droneStore';
+
+// This tab's drone, so a reload or a server restart hands the same drone back
+const DRONE_ID_KEY = 'aegis.droneId';
 
 export const useSocketIO = () => {
   const socketRef = useRef(null);
@@ -9,6 +12,10 @@ export const useSocketIO = () => {
   const updateDoctrineData = useDroneStore((state) => state.updateDoctrineData);
   const setConnectionStatus = useDroneStore((state) => state.setConnectionStatus);
   const setThresholds = useDroneStore((state) => state.setThresholds);
+  const applyTelemetryFrame = useDroneStore((state) => state.applyTelemetryFrame);
+  const setReplay = useDroneStore((state) => state.setReplay);
+  const applyFleetFrame = useDroneStore((state) => state.applyFleetFrame);
+  const setFleetWatching = useDroneStore((state) => state.setFleetWatching);
 
   useEffect(() => {
     console.log('Initializing Socket.IO connection...');
@@ -20,14 +27,30 @@ export const useSocketIO = () => {
       reconnectionDelayMax: 5000,
       reconnectionAttempts: 5,
       transports: ['websocket', 'polling'],
-      rejectUnauthorized: false
+      rejectUnauthorized: false,
+      // Read on every (re)connect; the server reclaims the drone if it was restored from a checkpoint
+      auth: (cb) => cb({ drone_id: sessionStorage.getItem(DRONE_ID_KEY) })
     });
 
     socketRef.current = socket;
 
     socket.on('connect', () => {
       console.log('✓ Connected to backend');
+      resetTelemetryStreams();
+      setReplay(null);
       setConnectionStatus('connected');
+      // ?replay=<recording> opens a recorded session instead of flying live
+      const params = new URLSearchParams(window.location.search);
+      const recording = params.get('replay');
+      if (recording) {
+        socket.emit('replay_open', { name: recording });
+      }
+      // ?fleet shows every drone, ?fleet=<id>,<id> just those (one fleet_update per tick)
+      setFleetWatching(false);
+      if (params.has('fleet')) {
+        const ids = params.get('fleet');
+        socket.emit('watch_fleet', ids ? { drone_ids: ids.split(',') } : {});
+      }
     });
 
     socket.on('connect_error', (error) => {
@@ -41,7 +64,8 @@ export const useSocketIO = () => {
     });
 
     socket.on('drone_created', (data) => {
-      console.log('✓ Drone created:', data.drone_id);
+      console.log(data.reclaimed ? '✓ Drone reclaimed:' : '✓ Drone created:', data.drone_id);
+      sessionStorage.setItem(DRONE_ID_KEY, data.drone_id);
       setDroneId(data.drone_id);
       if (data.initial_state) {
         updateDroneState(data.initial_state);
@@ -52,8 +76,21 @@ export const useSocketIO = () => {
     });
 
     socket.on('drone_update', (data) => {
-      // Strict ID check to prevent ghosting
-      const currentId = useDroneStore.getState().droneId;
+      // Binary delta frames: ask for a keyframe if we lost sync
+      if (data instanceof ArrayBuffer || ArrayBuffer.isView(data)) {
+        const update = applyTelemetryFrame(data);
+        if (update && update.needsKeyframe) {
+          socket.emit('request_keyframe', { drone_id: update.drone_id });
+        } else if (update && update.needsSync) {
+          // Only the anchors/breadcrumbs past our cursors get resent
+          socket.emit('doctrine_sync', doctrineSyncRequest(update.drone_id));
+        }
+        return;
+      }
+
+      // Server routes updates per drone room; other subscribed drones
+      // (commander views) must not overwrite our own drone's state
+      const currentId = useDroneStore.getState().watchedDroneId();
       if (currentId && data.drone_id && data.drone_id !== currentId) return;
 
       if (data.state) {
@@ -64,6 +101,26 @@ export const useSocketIO = () => {
       }
     });
 
+    socket.on('fleet_update', (data) => {
+      applyFleetFrame(data);
+    });
+
+    socket.on('fleet_view', (data) => {
+      setFleetWatching(!data.stopped);
+    });
+
+    socket.on('replay_state', (data) => {
+      if (data.error) {
+        console.error('✗ Replay:', data.error);
+        return;
+      }
+      const previous = useDroneStore.getState().replay;
+      setReplay(data);
+      if (!previous || previous.drone_id !== data.drone_id) {
+        socket.emit('request_keyframe', { drone_id: data.drone_id });
+      }
+    });
+
     socket.on('status', (data) => {
       const currentId = useDroneStore.getState().droneId;
       if (currentId && data.drone_id && data.drone_id !== currentId) return;
@@ -88,7 +145,7 @@ export const useSocketIO = () => {
     return () => {
       socket.disconnect();
     };
-  }, [setDroneId, updateDroneState, updateDoctrineData, setConnectionStatus, setThresholds]);
+  }, [setDroneId, updateDroneState, updateDoctrineData, setConnectionStatus, setThresholds, applyTelemetryFrame, setReplay, applyFleetFrame, setFleetWatching]);
 
   return socketRef.current;
 };
@@ -120,6 +177,44 @@ export const useSocketEmit = () => {
       if (socketRef.current) {
         socketRef.current.emit('reset');
       }
+    },
+    // Watch other drones' telemetry (replace=true swaps the whole set)
+    subscribe: (droneIds, replace = false) => {
+      if (socketRef.current) {
+        socketRef.current.emit('subscribe', { drone_ids: droneIds, replace });
+      }
+    },
+    unsubscribe: (droneIds) => {
+      if (socketRef.current) {
+        socketRef.current.emit('unsubscribe', { drone_ids: droneIds });
+      }
+    },
+    // Observer view: all drones in one fleet_update per tick (no IDs = whole fleet)
+    watchFleet: (droneIds = null) => {
+      if (socketRef.current) {
+        socketRef.current.emit('watch_fleet', droneIds ? { drone_ids: droneIds } : {});
+      }
+    },
+    unwatchFleet: () => {
+      if (socketRef.current) {
+        socketRef.current.emit('unwatch_fleet');
+      }
+    },
+    // Recorded sessions: GET /api/recordings lists the names
+    replayOpen: (name, shared = true) => {
+      if (socketRef.current) {
+        socketRef.current.emit('replay_open', { name, shared });
+      }
+    },
+    replayControl: (streamId, action, value) => {
+      if (socketRef.current) {
+        socketRef.current.emit('replay_control', { stream_id: streamId, action, value });
+      }
+    },
+    replayClose: (streamId) => {
+      if (socketRef.current) {
+        socketRef.current.emit('replay_close', { stream_id: streamId });
+      }
     }
   };
 };
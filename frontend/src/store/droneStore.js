@@ -1,5 +1,491 @@
 import { create } from 'zustand';
 
+// ==================== TELEMETRY FRAMES ====================
+// Binary drone_update decoder; mirrors backend/telemetry.py (frame version 3)
+
+const FRAME_VERSION = 3;
+const FLAG_KEYFRAME = 0x01;
+const FLAG_UUID_ID = 0x02;
+const FLAG_SYNC = 0x04;
+const HEADER_SIZE = 10;
+
+const FIELD_POSITION = 1 << 0;
+const FIELD_POSITION_DELTA = 1 << 1;
+const FIELD_VELOCITY = 1 << 2;
+const FIELD_ROTATION = 1 << 3;
+const FIELD_ANGULAR_VELOCITY = 1 << 4;
+const FIELD_BATTERY = 1 << 5;
+const FIELD_NAV_CONFIDENCE = 1 << 6;
+const FIELD_GPS_JAM = 1 << 7;
+const FIELD_SPEED = 1 << 8;
+const FIELD_FLAGS = 1 << 9;
+const FIELD_MODE_STATUS = 1 << 10;
+const FIELD_TARGET = 1 << 11;
+const FIELD_RETURN_QUEUE = 1 << 12;
+const FIELD_CONTROLS = 1 << 13;
+const FIELD_ANCHORS = 1 << 14;
+const FIELD_BREADCRUMBS = 1 << 15;
+const FIELD_PROXIMITY = 1 << 16;
+const FIELD_YAW_RATE = 1 << 17;
+const FIELD_CLOCK = 1 << 18;
+
+const POSITION_SCALE = 100;
+const VELOCITY_SCALE = 100;
+const ROTATION_SCALE = 32767 / Math.PI;
+const ANGULAR_VELOCITY_SCALE = 1000;
+const PERCENT_SCALE = 100;
+const SPEED_SCALE = 100;
+const CONTROL_SCALE = 127;
+const SEPARATION_SCALE = 100;
+const NO_SEPARATION = 0xffff;
+
+const MODES = ['STABILIZE', 'RETROGRADE', 'COMMANDER_RTB', 'LANDED'];
+export const STATUSES = ['NOMINAL', 'WARNING', 'SAFETY_OVERRIDE', 'COMMANDER_RTB'];
+const PROXIMITY_STATES = ['CLEAR', 'WARNING', 'COLLISION'];
+const CONTROL_KEYS = ['forward', 'yaw', 'throttle', 'pitch', 'roll', 'yaw_rate'];
+
+// Per-drone reassembled state (kept outside the store to avoid re-renders)
+const telemetryStreams = new Map();
+// Per-drone anchors/breadcrumbs by sequence number; survive keyframes
+const doctrineLists = new Map();
+
+const getDoctrineLists = (droneId) => {
+  let lists = doctrineLists.get(droneId);
+  if (!lists) {
+    lists = {
+      anchors: { first: 0, next: 0, points: [] },
+      breadcrumbs: { first: 0, next: 0, points: [] }
+    };
+    doctrineLists.set(droneId, lists);
+  }
+  return lists;
+};
+
+const formatUuid = (bytes) => {
+  const hex = Array.from(bytes, (b) => b.toString(16).padStart(2, '0')).join('');
+  return `${hex.slice(0, 8)}-${hex.slice(8, 12)}-${hex.slice(12, 16)}-${hex.slice(16, 20)}-${hex.slice(20)}`;
+};
+
+const readVec3 = (view, offset, reader, scale) => [
+  reader.call(view, offset, true) / scale,
+  reader.call(view, offset + 2, true) / scale,
+  reader.call(view, offset + 4, true) / scale
+];
+
+// Merge a doctrine range section; returns [inSync, nextOffset]
+const readRange = (view, offset, held) => {
+  const firstSeq = view.getUint32(offset, true);
+  const fromSeq = view.getUint32(offset + 4, true);
+  const count = view.getUint16(offset + 8, true);
+  const end = offset + 10 + count * 12;
+
+  if (firstSeq > held.next) {
+    // Everything we hold was evicted or cleared on the server
+    held.first = firstSeq;
+    held.next = firstSeq;
+    held.points = [];
+  } else if (firstSeq > held.first) {
+    held.points = held.points.slice(firstSeq - held.first);
+    held.first = firstSeq;
+  }
+  if (fromSeq > held.next) return [false, end];
+
+  const fresh = [];
+  for (let i = held.next - fromSeq; i < count; i++) {
+    const p = offset + 10 + i * 12;
+    fresh.push([view.getFloat32(p, true), view.getFloat32(p + 4, true), view.getFloat32(p + 8, true)]);
+  }
+  if (fresh.length) {
+    held.points = held.points.concat(fresh);
+    held.next += fresh.length;
+  }
+  return [true, end];
+};
+
+/**
+ * Apply one binary telemetry frame.
+ * Returns { drone_id, seq, state, doctrine, controls } with the same shape as the
+ * legacy JSON drone_update, or { drone_id, needsKeyframe: true } after a sequence gap.
+ * needsSync is set when anchors/breadcrumbs are missing; send doctrineSyncRequest().
+ */
+export const decodeTelemetryFrame = (buffer) => {
+  const bytes = buffer instanceof ArrayBuffer
+    ? new Uint8Array(buffer)
+    : new Uint8Array(buffer.buffer, buffer.byteOffset, buffer.byteLength);
+  const view = new DataView(bytes.buffer, bytes.byteOffset, bytes.byteLength);
+
+  const version = view.getUint8(0);
+  if (version !== FRAME_VERSION) {
+    console.warn('Unsupported telemetry frame version', version);
+    return null;
+  }
+  const flags = view.getUint8(1);
+  const seq = view.getUint32(2, true);
+  const mask = view.getUint32(6, true);
+
+  let offset = HEADER_SIZE;
+  let droneId;
+  if (flags & FLAG_UUID_ID) {
+    droneId = formatUuid(bytes.subarray(offset, offset + 16));
+    offset += 16;
+  } else {
+    const length = view.getUint8(offset);
+    droneId = new TextDecoder().decode(bytes.subarray(offset + 1, offset + 1 + length));
+    offset += 1 + length;
+  }
+
+  let stream = telemetryStreams.get(droneId);
+  if (flags & FLAG_SYNC) {
+    if (!stream) return { drone_id: droneId, needsKeyframe: true };
+    stream.syncPending = false;
+  } else if (flags & FLAG_KEYFRAME) {
+    stream = { positionQ: [0, 0, 0], state: {}, doctrine: {}, controls: {}, syncPending: false };
+    telemetryStreams.set(droneId, stream);
+  } else if (!stream || seq !== stream.seq + 1) {
+    return { drone_id: droneId, needsKeyframe: true };
+  }
+  if (!(flags & FLAG_SYNC)) stream.seq = seq;
+  const { state, doctrine } = stream;
+  const lists = getDoctrineLists(droneId);
+  let inSync = true;
+  let rangeOk;
+
+  if (mask & FIELD_POSITION) {
+    stream.positionQ = [0, 4, 8].map((o) => Math.round(view.getFloat32(offset + o, true) * POSITION_SCALE));
+    offset += 12;
+  }
+  if (mask & FIELD_POSITION_DELTA) {
+    stream.positionQ = stream.positionQ.map((q, i) => q + view.getInt16(offset + i * 2, true));
+    offset += 6;
+  }
+  if (mask & FIELD_VELOCITY) {
+    state.velocity = readVec3(view, offset, view.getInt16, VELOCITY_SCALE);
+    offset += 6;
+  }
+  if (mask & FIELD_ROTATION) {
+    state.rotation = readVec3(view, offset, view.getInt16, ROTATION_SCALE);
+    offset += 6;
+  }
+  if (mask & FIELD_ANGULAR_VELOCITY) {
+    state.angular_velocity = readVec3(view, offset, view.getInt16, ANGULAR_VELOCITY_SCALE);
+    offset += 6;
+  }
+  if (mask & FIELD_BATTERY) {
+    state.battery = view.getUint16(offset, true) / PERCENT_SCALE;
+    offset += 2;
+  }
+  if (mask & FIELD_NAV_CONFIDENCE) {
+    state.nav_confidence = view.getUint16(offset, true) / PERCENT_SCALE;
+    offset += 2;
+  }
+  if (mask & FIELD_GPS_JAM) {
+    state.gps_jam = view.getUint16(offset, true) / PERCENT_SCALE;
+    offset += 2;
+  }
+  if (mask & FIELD_SPEED) {
+    state.speed = view.getInt16(offset, true) / SPEED_SCALE;
+    offset += 2;
+  }
+  if (mask & FIELD_FLAGS) {
+    const bits = view.getUint8(offset);
+    state.armed = Boolean(bits & 1);
+    state.retrograde_active = Boolean(bits & 2);
+    offset += 1;
+  }
+  if (mask & FIELD_MODE_STATUS) {
+    state.mode = MODES[view.getUint8(offset)];
+    state.status = STATUSES[view.getUint8(offset + 1)];
+    offset += 2;
+  }
+  if (mask & FIELD_TARGET) {
+    doctrine.target_point = view.getUint8(offset)
+      ? [view.getFloat32(offset + 1, true), view.getFloat32(offset + 5, true), view.getFloat32(offset + 9, true)]
+      : null;
+    offset += 13;
+  }
+  if (mask & FIELD_RETURN_QUEUE) {
+    doctrine.return_queue_length = view.getUint16(offset, true);
+    offset += 2;
+  }
+  if (mask & FIELD_CONTROLS) {
+    stream.controls = {};
+    CONTROL_KEYS.forEach((key, i) => {
+      stream.controls[key] = view.getInt8(offset + i) / CONTROL_SCALE;
+    });
+    offset += 6;
+  }
+  if (mask & FIELD_ANCHORS) {
+    [rangeOk, offset] = readRange(view, offset, lists.anchors);
+    inSync = inSync && rangeOk;
+  }
+  if (mask & FIELD_BREADCRUMBS) {
+    [rangeOk, offset] = readRange(view, offset, lists.breadcrumbs);
+    inSync = inSync && rangeOk;
+  }
+  if (mask & FIELD_PROXIMITY) {
+    state.proximity = PROXIMITY_STATES[view.getUint8(offset)];
+    const separation = view.getUint16(offset + 1, true);
+    state.separation = separation === NO_SEPARATION ? -1 : separation / SEPARATION_SCALE;
+    offset += 3;
+  }
+  if (mask & FIELD_YAW_RATE) {
+    state.yaw_rate = view.getInt16(offset, true) / ANGULAR_VELOCITY_SCALE;
+    offset += 2;
+  }
+  if (mask & FIELD_CLOCK) {
+    stream.tick = view.getUint32(offset, true);
+    stream.simTime = view.getFloat64(offset + 4, true);
+    offset += 12;
+  }
+
+  // Ask once per gap; the sync reply clears the flag
+  const needsSync = !inSync && !stream.syncPending;
+  if (needsSync) stream.syncPending = true;
+
+  state.position = stream.positionQ.map((q) => q / POSITION_SCALE);
+  doctrine.anchors = lists.anchors.points;
+  doctrine.breadcrumbs = lists.breadcrumbs.points;
+  return {
+    drone_id: droneId,
+    seq: stream.seq,
+    tick: stream.tick,
+    simTime: stream.simTime,
+    needsSync,
+    state: { ...state },
+    doctrine: { ...doctrine },
+    controls: { ...stream.controls }
+  };
+};
+
+// Payload for a doctrine_sync request: the next sequence numbers we do not hold
+export const doctrineSyncRequest = (droneId) => {
+  const lists = getDoctrineLists(droneId);
+  return {
+    drone_id: droneId,
+    anchor_seq: lists.anchors.next,
+    breadcrumb_seq: lists.breadcrumbs.next
+  };
+};
+
+// Drops frame state only; doctrine lists are kept so a reconnect can resync
+// from its cursors instead of refetching everything
+export const resetTelemetryStreams = () => {
+  telemetryStreams.clear();
+  resetMotion();
+};
+
+// ==================== MOTION BUFFER ====================
+// Frames arrive at the broadcast rate (10 Hz by default) but the scene renders
+// at display rate. Recent frames are buffered against the server's sim clock
+// and the scene samples them a little in the past, so there is almost always a
+// frame on either side to interpolate between. Past the newest frame, velocity
+// and yaw rate carry the drone forward for a short while.
+
+const MOTION_BUFFER = 32;            // Frames kept
+const MIN_INTERP_DELAY = 0.05;       // Seconds behind the newest frame, at least
+const MAX_EXTRAPOLATION = 0.25;      // Seconds of dead reckoning past the newest frame
+const CLOCK_SNAP = 1.0;              // Clock error (s) that resets instead of drifting
+const CLOCK_GAIN = 0.05;             // Share of each late-frame clock error taken per frame
+const CLOCK_SLEW = 0.1;              // Render clock runs at most 10% fast or slow while correcting
+
+const motion = {
+  droneId: null,
+  samples: [],     // { t, position, rotation, velocity, yawRate }, oldest first
+  offset: null,    // Server sim time minus local seconds, as rendered
+  target: null,    // Latest estimate of that offset; offset slews toward it
+  rendered: null,  // Local seconds of the previous sampleMotion call
+  interval: 0.1    // Smoothed seconds between frames
+};
+
+export const resetMotion = () => {
+  motion.droneId = null;
+  motion.samples = [];
+  motion.offset = null;
+  motion.target = null;
+  motion.rendered = null;
+};
+
+const pushMotionSample = (droneId, simTime, state, nowMs) => {
+  if (simTime === undefined || !state.position || !state.rotation) return;
+  const local = nowMs / 1000;
+  const samples = motion.samples;
+  const last = samples[samples.length - 1];
+  if (motion.droneId !== droneId || (last && simTime < last.t)) {
+    // New drone, replay seek or server restart: start the timeline over
+    resetMotion();
+    motion.droneId = droneId;
+  } else if (last && simTime === last.t) {
+    return;
+  }
+
+  const error = simTime - local - (motion.target ?? 0);
+  if (motion.target === null || Math.abs(error) > CLOCK_SNAP) {
+    motion.target = simTime - local;
+    motion.offset = motion.target;
+  } else {
+    // Track the least-delayed frames: late ones nudge the estimate back gently,
+    // early ones move it forward at once
+    motion.target += error > 0 ? error : error * CLOCK_GAIN;
+  }
+  if (last) {
+    // Heartbeat gaps from an idle drone (1 s apart) say nothing about the stream rate
+    const gap = simTime - last.t;
+    if (gap < 0.9) motion.interval += (gap - motion.interval) * 0.1;
+  }
+
+  samples.push({
+    t: simTime,
+    position: state.position,
+    rotation: state.rotation,
+    velocity: state.velocity || [0, 0, 0],
+    yawRate: state.yaw_rate || 0
+  });
+  if (samples.length > MOTION_BUFFER) samples.shift();
+};
+
+const lerpAngle = (a, b, k) => {
+  let d = (b - a) % (2 * Math.PI);
+  if (d > Math.PI) d -= 2 * Math.PI;
+  if (d < -Math.PI) d += 2 * Math.PI;
+  return a + d * k;
+};
+
+/**
+ * Position and rotation of the watched drone at render time `nowMs`
+ * (performance.now()), or null before the first timed frame arrives.
+ */
+export const sampleMotion = (nowMs) => {
+  const samples = motion.samples;
+  if (!samples.length) return null;
+  const local = nowMs / 1000;
+  if (motion.rendered !== null) {
+    // Slew instead of jumping so clock corrections never show as a stutter
+    const limit = CLOCK_SLEW * Math.max(0, local - motion.rendered);
+    motion.offset += Math.max(-limit, Math.min(limit, motion.target - motion.offset));
+  }
+  motion.rendered = local;
+  const delay = Math.max(MIN_INTERP_DELAY, motion.interval * 1.5);
+  const t = local + motion.offset - delay;
+
+  const newest = samples[samples.length - 1];
+  if (t >= newest.t) {
+    const dt = Math.min(t - newest.t, MAX_EXTRAPOLATION);
+    return {
+      position: newest.position.map((p, i) => p + newest.velocity[i] * dt),
+      rotation: [newest.rotation[0], newest.rotation[1] + newest.yawRate * dt, newest.rotation[2]]
+    };
+  }
+  let i = samples.length - 1;
+  while (i > 0 && samples[i - 1].t > t) i--;
+  if (i === 0) return { position: samples[0].position, rotation: samples[0].rotation };
+
+  const a = samples[i - 1];
+  const b = samples[i];
+  const k = (t - a.t) / (b.t - a.t);
+  return {
+    position: a.position.map((p, j) => p + (b.position[j] - p) * k),
+    rotation: a.rotation.map((r, j) => lerpAngle(r, b.rotation[j], k))
+  };
+};
+
+// ==================== FLEET FRAMES ====================
+// Columnar fleet_update decoder; mirrors FleetFrameEncoder in backend/telemetry.py.
+// Observer views get every watched drone in one frame. Its columns land in the
+// typed arrays below, which the scene's instanced mesh reads each animation
+// frame, so hundreds of drones cost no React work beyond a change of count.
+
+const FLEET_FRAME_VERSION = 1;
+const FLEET_HEADER_SIZE = 16;
+
+export const fleetView = {
+  version: 0,                      // Bumped per applied frame; renderers compare it
+  count: 0,
+  tick: 0,
+  simTime: 0,
+  ids: [],
+  position: new Float32Array(0),   // x, y, z interleaved
+  yaw: new Float32Array(0),
+  status: new Uint8Array(0),       // Index into STATUSES
+  navConfidence: new Float32Array(0)
+};
+let fleetIdBytes = new Uint8Array(0);
+
+const growFleetView = (count) => {
+  if (fleetView.yaw.length >= count) return;
+  const capacity = Math.max(64, 2 ** Math.ceil(Math.log2(count)));
+  fleetView.position = new Float32Array(capacity * 3);
+  fleetView.yaw = new Float32Array(capacity);
+  fleetView.status = new Uint8Array(capacity);
+  fleetView.navConfidence = new Float32Array(capacity);
+};
+
+export const resetFleetView = () => {
+  fleetView.count = 0;
+  fleetView.ids = [];
+  fleetView.version += 1;
+  fleetIdBytes = new Uint8Array(0);
+};
+
+/** Apply one binary fleet_update frame to fleetView; returns it, or null if unreadable */
+export const decodeFleetFrame = (buffer) => {
+  const bytes = buffer instanceof ArrayBuffer
+    ? new Uint8Array(buffer)
+    : new Uint8Array(buffer.buffer, buffer.byteOffset, buffer.byteLength);
+  const view = new DataView(bytes.buffer, bytes.byteOffset, bytes.byteLength);
+
+  const version = view.getUint8(0);
+  if (version !== FLEET_FRAME_VERSION) {
+    console.warn('Unsupported fleet frame version', version);
+    return null;
+  }
+  const flags = view.getUint8(1);
+  const count = view.getUint16(2, true);
+  let offset = FLEET_HEADER_SIZE;
+
+  // The roster rarely changes between frames: only rebuild ID strings when it does
+  const idStart = offset;
+  if (flags & FLAG_UUID_ID) {
+    offset += count * 16;
+  } else {
+    for (let i = 0; i < count; i++) offset += 1 + view.getUint8(offset);
+  }
+  const idBytes = bytes.subarray(idStart, offset);
+  const sameRoster = idBytes.length === fleetIdBytes.length && idBytes.every((b, i) => b === fleetIdBytes[i]);
+  if (!sameRoster) {
+    const ids = [];
+    for (let p = idStart; p < offset;) {
+      if (flags & FLAG_UUID_ID) {
+        ids.push(formatUuid(bytes.subarray(p, p + 16)));
+        p += 16;
+      } else {
+        const length = view.getUint8(p);
+        ids.push(new TextDecoder().decode(bytes.subarray(p + 1, p + 1 + length)));
+        p += 1 + length;
+      }
+    }
+    fleetView.ids = ids;
+    fleetIdBytes = idBytes.slice();
+  }
+
+  growFleetView(count);
+  const { position, yaw, status, navConfidence } = fleetView;
+  for (let axis = 0; axis < 3; axis++) {
+    for (let i = 0; i < count; i++) {
+      position[i * 3 + axis] = view.getFloat32(offset, true);
+      offset += 4;
+    }
+  }
+  for (let i = 0; i < count; i++, offset += 2) yaw[i] = view.getInt16(offset, true) / ROTATION_SCALE;
+  for (let i = 0; i < count; i++, offset += 1) status[i] = view.getUint8(offset);
+  for (let i = 0; i < count; i++, offset += 2) navConfidence[i] = view.getUint16(offset, true) / PERCENT_SCALE;
+
+  fleetView.count = count;
+  fleetView.tick = view.getUint32(4, true);
+  fleetView.simTime = view.getFloat64(8, true);
+  fleetView.version += 1;
+  return fleetView;
+};
+
 export const useDroneStore = create((set, get) => ({
   // Drone state
   droneId: null,
@@ -18,6 +504,10 @@ export const useDroneStore = create((set, get) => ({
   retrogradeActive: false,
   status: 'NOMINAL',  // NOMINAL, WARNING, SAFETY_OVERRIDE, COMMANDER_RTB
 
+  // Fleet separation
+  proximity: 'CLEAR',  // CLEAR, WARNING, COLLISION
+  separation: -1,      // Metres to the nearest drone in range, -1 if none
+
   // Doctrine data
   breadcrumbs: [],
   anchors: [],
@@ -48,6 +538,13 @@ export const useDroneStore = create((set, get) => ({
     distance: 10
   },
 
+  // Replay being watched (replay_state from the server), null when live
+  replay: null,
+
+  // fleet_update observer view; the drones themselves live in fleetView
+  fleetWatching: false,
+  fleetSize: 0,
+
   // UI state
   showHUD: true,
   showDebug: false,
@@ -61,6 +558,26 @@ export const useDroneStore = create((set, get) => ({
 
   setThresholds: (thresholds) => set({ thresholds }),
 
+  setReplay: (replay) => set({ replay }),
+
+  setFleetWatching: (fleetWatching) => {
+    if (!fleetWatching) resetFleetView();
+    set({ fleetWatching, fleetSize: fleetView.count });
+  },
+
+  // Decode a fleet_update; only a change in drone count reaches React
+  applyFleetFrame: (buffer) => {
+    const view = decodeFleetFrame(buffer);
+    if (view && view.count !== get().fleetSize) set({ fleetSize: view.count });
+    return view;
+  },
+
+  // Drone whose telemetry drives the scene: the replay while one is open
+  watchedDroneId: () => {
+    const { replay, droneId } = get();
+    return replay ? replay.drone_id : droneId;
+  },
+
   updateDroneState: (state) => set({
     position: state.position,
     velocity: state.velocity,
@@ -73,7 +590,9 @@ export const useDroneStore = create((set, get) => ({
     gpsJam: state.gps_jam !== undefined ? state.gps_jam : state.integrity_stress, // Handle legacy
     navConfidence: state.nav_confidence,
     retrogradeActive: state.retrograde_active,
-    status: state.status
+    status: state.status,
+    proximity: state.proximity || 'CLEAR',
+    separation: state.separation !== undefined ? state.separation : -1
   }),
 
   updateDoctrineData: (doctrine) => set({
@@ -83,6 +602,20 @@ export const useDroneStore = create((set, get) => ({
     returnQueueLength: doctrine.return_queue_length || 0
   }),
 
+  // Decode a binary drone_update and feed our own drone's state into the store
+  applyTelemetryFrame: (buffer) => {
+    const update = decodeTelemetryFrame(buffer);
+    if (!update || update.needsKeyframe) return update;
+
+    const currentId = get().watchedDroneId();
+    if (currentId && update.drone_id !== currentId) return update;
+
+    pushMotionSample(update.drone_id, update.simTime, update.state, performance.now());
+    get().updateDroneState(update.state);
+    get().updateDoctrineData(update.doctrine);
+    return update;
+  },
+
   setControls: (controls) => set({ controls }),
 
   updateControl: (key, value) => set((state) => ({